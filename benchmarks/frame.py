@@ -0,0 +1,78 @@
+"""
+Microbenchmark the humidity frame parser against the regex path it replaced.
+
+    python benchmarks/frame.py --packets 200000
+"""
+
+
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+
+from pathlib import Path
+from time import perf_counter
+from orchidarium.lib.frame import FrameParser
+
+# The fake devices live with the tests.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'tests'))
+
+from fakes import humidity_packet  # noqa: E402
+
+
+def legacy(packet: bytes):
+    """
+    The previous HumiditySensor.collect parse: three regexes compiled per call, applied to the decoded packet.
+    """
+    _match = re.compile(r'T: [0-9]+.[0-9]+, RH: [0-9]+.[0-9]+')
+    _extract_temperature = re.compile(r'(?<=T: )[0-9]+.?[0-9]*(?=,)')
+    _extract_humidity = re.compile(r'(?<=, RH: )[0-9+.?[0-9]*')
+    _res = packet.decode('utf-8', errors='replace')
+    if re.match(_match, _res):
+        _search_temperature = re.search(_extract_temperature, _res)
+        _search_humidity = re.search(_extract_humidity, _res)
+        if _search_temperature and _search_humidity:
+            return float(_search_temperature.group(0)), float(_search_humidity.group(0))
+    return None
+
+
+def split_stream(packets: list, size: int = 64) -> list:
+    """
+    Re-chunk a stream of frames at fixed offsets, so that frames straddle packet boundaries.
+    """
+    stream = b''.join(packet.rstrip(b'\0') for packet in packets)
+    return [stream[i:i + size] for i in range(0, len(stream), size)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--packets', type=int, default=200_000)
+    args = parser.parse_args()
+
+    packets = [humidity_packet(60 + i % 300 / 10, 40 + i % 500 / 10) for i in range(args.packets)]
+    views = [memoryview(packet) for packet in packets]
+
+    _start = perf_counter()
+    parsed = sum(legacy(packet) is not None for packet in packets)
+    elapsed = perf_counter() - _start
+    print(f'regex (per call compile):   {args.packets / elapsed:12,.0f} packets/s  {elapsed / args.packets * 1e6:6.2f}us/packet  {parsed} frames')
+
+    frames = FrameParser((b'T', b'RH'))
+    _start = perf_counter()
+    parsed = sum(len(frames.feed(view)) for view in views)
+    elapsed = perf_counter() - _start
+    print(f'FrameParser (padded):       {args.packets / elapsed:12,.0f} packets/s  {elapsed / args.packets * 1e6:6.2f}us/packet  {parsed} frames')
+
+    chunks = split_stream(packets)
+    legacy_parsed = sum(legacy(chunk) is not None for chunk in chunks)
+    frames = FrameParser((b'T', b'RH'))
+    _start = perf_counter()
+    parsed = sum(len(frames.feed(chunk)) for chunk in chunks)
+    elapsed = perf_counter() - _start
+    print(f'FrameParser (split frames): {len(chunks) / elapsed:12,.0f} packets/s  {elapsed / len(chunks) * 1e6:6.2f}us/packet  {parsed} frames (regex path recovers {legacy_parsed})')
+    print(f'parse errors: {dict(frames.errors)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark probe latency and resident memory of the Flask and asyncio healthcheck servers.
+
+Each server runs in its own process so that its memory footprint can be measured in isolation.
+
+    python benchmarks/health.py --requests 20000 --concurrency 8
+"""
+
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import os
+import socket
+import subprocess
+import sys
+
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter, sleep
+
+
+_SERVER = '''
+import time
+from orchidarium.lib.health import registry
+from orchidarium.api import start
+registry.register('bench', 60.0)
+registry.update('bench', readout=True, publish=True)
+start({mode!r})
+time.sleep(3600)
+'''
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def rss_kib(pid: int) -> dict:
+    """
+    Read the current and peak resident set size of a process.
+
+    Args:
+        pid (int): process ID.
+
+    Returns:
+        dict: 'VmRSS' and 'VmHWM' in KiB.
+    """
+    with open(f'/proc/{pid}/status') as f:
+        return {
+            line.split(':')[0]: int(line.split()[1]) for line in f if line.startswith(('VmRSS', 'VmHWM'))
+        }
+
+
+def probe(port: int, count: int, path: str) -> list:
+    conn = http.client.HTTPConnection('127.0.0.1', port)
+    latencies = []
+    for _ in range(count):
+        _start = perf_counter()
+        conn.request('GET', path)
+        response = conn.getresponse()
+        response.read()
+        latencies.append(perf_counter() - _start)
+    conn.close()
+    return latencies
+
+
+def bench(mode: str, requests: int, concurrency: int) -> None:
+    port = free_port()
+    proc = subprocess.Popen(
+        [sys.executable, '-c', _SERVER.format(mode=mode)],
+        env={**os.environ, 'HEALTHCHECK_PORT': str(port), 'HEALTHCHECK_CACHE_PATH': ''},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+
+    try:
+        for _ in range(100):
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=0.1).close()
+                break
+            except OSError:
+                sleep(0.05)
+        idle = rss_kib(proc.pid)
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            _start = perf_counter()
+            results = list(pool.map(lambda i: probe(port, requests // concurrency, '/health' if i % 2 else '/ready'), range(concurrency)))
+            elapsed = perf_counter() - _start
+
+        loaded = rss_kib(proc.pid)
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    latencies = sorted(latency for result in results for latency in result)
+    p = lambda q: latencies[min(int(q * len(latencies)), len(latencies) - 1)] * 1e3
+
+    print(
+        f'{mode:8} {len(latencies) / elapsed:10,.0f} req/s  p50 {p(0.50):6.3f}ms  p99 {p(0.99):6.3f}ms  max {latencies[-1] * 1e3:7.3f}ms  '
+        f'RSS idle {idle["VmRSS"] / 1024:5.1f} MiB  loaded {loaded["VmRSS"] / 1024:5.1f} MiB  peak {loaded["VmHWM"] / 1024:5.1f} MiB'
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=20_000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--mode', choices=('flask', 'asyncio'), action='append')
+    args = parser.parse_args()
+
+    for mode in args.mode or ('flask', 'asyncio'):
+        bench(mode, args.requests, args.concurrency)
+
+
+if __name__ == '__main__':
+    main()
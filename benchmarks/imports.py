@@ -0,0 +1,101 @@
+"""
+Benchmark how long importing the daemon's entry points takes, using the interpreter's `-X importtime` report.
+
+Every sample runs in a fresh interpreter so that nothing is already cached in `sys.modules`. Use `--json` to record the
+results of a release and compare them with the next one.
+
+    python benchmarks/imports.py --runs 10
+    python benchmarks/imports.py --module orchidarium.entrypoint --top 15
+"""
+
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from statistics import median
+
+
+_MODULES = (
+    'orchidarium.entrypoint',
+    'orchidarium.runtime',
+    'orchidarium.sensors',
+    'orchidarium.api.server',
+    'orchidarium.api.app',
+    'orchidarium.publishers.influxdb',
+)
+
+
+def importtime(module: str) -> dict:
+    """
+    Import a module in a fresh interpreter and parse its `-X importtime` report.
+
+    Args:
+        module (str): dotted module name.
+
+    Returns:
+        dict: the module's cumulative import time and the self time of every module it pulled in, in microseconds.
+    """
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        env={**os.environ, 'HEALTHCHECK_CACHE_PATH': ''},
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+    modules = {}
+    cumulative = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _self, _cumulative, name = line.removeprefix('import time:').split('|')
+        modules[name.strip()] = int(_self)
+        if name.strip() == module:
+            cumulative = int(_cumulative)
+
+    return {
+        'cumulative': cumulative,
+        'modules': modules
+    }
+
+
+def bench(module: str, runs: int, top: int) -> dict:
+    samples = [importtime(module) for _ in range(runs)]
+    cumulative = median(sample['cumulative'] for sample in samples)
+    count = len(samples[-1]['modules'])
+
+    print(f'{module:34} {cumulative / 1e3:8.2f} ms  ({count} modules imported)')
+
+    if top:
+        heaviest = sorted(samples[-1]['modules'].items(), key=lambda item: item[1], reverse=True)[:top]
+        for name, us in heaviest:
+            print(f'    {us / 1e3:8.2f} ms  {name}')
+
+    return {
+        'median_ms': cumulative / 1e3,
+        'modules': count
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters per module; the median is reported')
+    parser.add_argument('--module', action='append', help='module to import (repeatable; default: the daemon entry points)')
+    parser.add_argument('--top', type=int, default=0, help='also list the N modules with the highest self time')
+    parser.add_argument('--json', metavar='PATH', help='write the results to this file')
+    args = parser.parse_args()
+
+    results = {module: bench(module, args.runs, args.top) for module in args.module or _MODULES}
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'python': sys.version.split()[0], 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
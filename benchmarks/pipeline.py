@@ -0,0 +1,324 @@
+"""
+Benchmark every stage of the daemon loop against fake USB devices and a local InfluxDB stand-in, without hardware or a
+network.
+
+Each stage is timed call by call (p50/p99/max latency and throughput), then run again under tracemalloc to report its
+peak allocation. The process's resident memory is reported at the end. Use `--json` to keep the results of a release
+and compare them with the next one.
+
+    python benchmarks/pipeline.py --iterations 5000
+    python benchmarks/pipeline.py --stage frame.parse --stage runtime.sample
+"""
+
+
+from __future__ import annotations
+
+import os
+
+# Configure the daemon before it is imported: no healthcheck files or spool, a fast flush, and USB backoff short
+# enough that injected busy errors and timeouts measure the retry path rather than the sleep.
+os.environ.setdefault('HEALTHCHECK_CACHE_PATH', '')
+os.environ.setdefault('SPOOL_PATH', '')
+os.environ.setdefault('INFLUXDB_FLUSH_INTERVAL', '0.05')
+os.environ.setdefault('USB_RETRY_BASE_DELAY', '0.0001')
+os.environ.setdefault('USB_RETRY_MAX_DELAY', '0.001')
+
+import argparse
+import http.client
+import json
+import logging
+import socket
+import sys
+import tempfile
+import tracemalloc
+
+from itertools import cycle
+from pathlib import Path
+from time import perf_counter, sleep, time_ns
+from orchidarium import env
+from orchidarium.lib import bus
+from orchidarium.lib.frame import FrameParser
+from orchidarium.lib.health import registry
+from orchidarium.lib.json import write_json
+from orchidarium.lib.metrics import exposition, histogram
+from orchidarium.simulate import InfluxDBSink
+from typing import Callable, Dict
+
+# The fake devices live with the tests.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'tests'))
+
+from fakes import FakeDevice, fake_finder, humidity_stream  # noqa: E402
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def rss_kib() -> dict:
+    with open('/proc/self/status') as f:
+        return {
+            line.split(':')[0]: int(line.split()[1]) for line in f if line.startswith(('VmRSS', 'VmHWM'))
+        }
+
+
+def measure(name: str, call: Callable[[], object], iterations: int, items: int = 1) -> dict:
+    """
+    Time a stage call by call, then measure its peak allocation over a tenth as many calls.
+
+    Args:
+        name (str): stage name.
+        call (Callable[[], object]): zero-argument callable running the stage once.
+        iterations (int): number of timed calls.
+        items (int): units of work (e.g. points) per call, for the throughput figure. (default: 1)
+
+    Returns:
+        dict: latency percentiles in microseconds, throughput and peak allocation.
+    """
+    latencies = []
+    _start = perf_counter()
+    for _ in range(iterations):
+        _t = perf_counter()
+        call()
+        latencies.append(perf_counter() - _t)
+    elapsed = perf_counter() - _start
+
+    tracemalloc.start()
+    for _ in range(max(iterations // 10, 1)):
+        call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    p = lambda q: latencies[min(int(q * len(latencies)), len(latencies) - 1)] * 1e6
+    result = {
+        'per_second': iterations * items / elapsed,
+        'p50_us': p(0.50),
+        'p99_us': p(0.99),
+        'max_us': latencies[-1] * 1e6,
+        'peak_kib': peak / 1024
+    }
+
+    print(
+        f'{name:18} {result["per_second"]:12,.0f}/s  p50 {result["p50_us"]:9.1f}us  p99 {result["p99_us"]:9.1f}us  '
+        f'max {result["max_us"]:10.1f}us  peak alloc {result["peak_kib"]:8.1f} KiB'
+    )
+
+    return result
+
+
+## Stages
+
+
+def bench_bus_read(iterations: int) -> dict:
+    manager = bus.DeviceManager(finder=fake_finder([FakeDevice(humidity_stream(1000))]))
+    handle = manager.get(0x0487, 0x0007)
+    assert handle is not None
+    return measure('bus.read', handle.read, iterations)
+
+
+def bench_bus_read_faults(iterations: int) -> dict:
+    stream = humidity_stream(1000, busy=0.01, timeout=0.01, seed=1)
+    manager = bus.DeviceManager(finder=fake_finder([FakeDevice(stream)]))
+    handle = manager.get(0x0487, 0x0007)
+    assert handle is not None
+    return measure('bus.read+faults', handle.read, iterations)
+
+
+def bench_frame_parse(iterations: int) -> dict:
+    # Without busy or timeout faults the stream holds only packets.
+    packets = cycle(memoryview(p) for p in humidity_stream(1000, split=0.2, seed=2) if isinstance(p, bytes))
+    parser = FrameParser((b'T', b'RH'))
+    return measure('frame.parse', lambda: parser.feed(next(packets)), iterations)
+
+
+def bench_sensor_collect(iterations: int) -> dict:
+    from orchidarium.sensors import HumiditySensor
+
+    bus.devices._find = fake_finder([FakeDevice(humidity_stream(1000, split=0.2, busy=0.01, timeout=0.01, seed=3))])
+    sensor = HumiditySensor()
+    try:
+        return measure('sensor.collect', sensor.collect, iterations)
+    finally:
+        sensor.close()
+
+
+def bench_health_update(iterations: int) -> dict:
+    registry.register('bench', 60.0)
+    return measure('health.update', lambda: registry.update('bench', readout=True, publish=True), iterations)
+
+
+def bench_health_persist(iterations: int) -> dict:
+    record = {'readout': True, 'publish': True, 'last_readout': 0.0, 'last_publish': 0.0, 'period': 60.0}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench_healthcheck.json')
+        return measure('health.persist', lambda: write_json(record, path, atomic=True), iterations)
+
+
+def bench_health_http(iterations: int) -> dict:
+    from orchidarium.api.server import HealthServer
+
+    registry.register('bench', 60.0)
+    registry.update('bench', readout=True, publish=True)
+
+    port = free_port()
+    HealthServer().run_in_thread('127.0.0.1', port)
+    for _ in range(100):
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.1).close()
+            break
+        except OSError:
+            sleep(0.05)
+
+    conn = http.client.HTTPConnection('127.0.0.1', port)
+
+    def probe() -> None:
+        conn.request('GET', '/health')
+        conn.getresponse().read()
+
+    try:
+        return measure('health.http', probe, iterations)
+    finally:
+        conn.close()
+
+
+def bench_metrics_observe(iterations: int) -> dict:
+    latency = histogram('bench_seconds', 'Benchmark observations', labels=('sensor',))
+    return measure('metrics.observe', lambda: latency.observe(0.001, 'bench'), iterations)
+
+
+def bench_metrics_scrape(iterations: int) -> dict:
+    return measure('metrics.scrape', exposition, iterations // 10 or 1)
+
+
+def bench_readings_record(iterations: int) -> dict:
+    from orchidarium.lib.tsdb import ReadingStore
+
+    store = ReadingStore(3600)
+    fields = {'temperature': 72.5, 'humidity': 48.0}
+    return measure('readings.record', lambda: store.record('bench', fields), iterations)
+
+
+def bench_readings_query(iterations: int) -> dict:
+    from time import time_ns
+    from orchidarium.lib.tsdb import ReadingStore
+
+    store = ReadingStore(3600)
+    now = time_ns()
+    # A day of readings every 10 seconds.
+    for i in range(8640):
+        store.record('bench', {'temperature': 70.0 + i % 100 / 10}, now - (8640 - i) * 10_000_000_000)
+    series = store.series('temperature')['bench']
+    since = now - 86400 * 1_000_000_000
+
+    return measure('readings.query', lambda: series.downsample(since, 3600), iterations // 10 or 1)
+
+
+def bench_encode_point(iterations: int) -> dict:
+    from influxdb_client import Point, WritePrecision
+
+    def encode() -> bytes:
+        point = Point('humidity').tag('scale', 'F').tag('device', '1-1.2').field('temperature', 72.5).field('humidity', 48.1)
+        return point.time(time_ns(), WritePrecision.NS).to_line_protocol(precision=WritePrecision.NS).encode('utf-8')
+
+    return measure('encode.point', encode, iterations)
+
+
+def bench_encode_schema(iterations: int) -> dict:
+    from orchidarium.lib.lineprotocol import Schema
+
+    schema = Schema('humidity', {'scale': 'F', 'device': '1-1.2'}, ('temperature', 'humidity'))
+    return measure('encode.schema', lambda: schema.encode((72.5, 48.1)), iterations)
+
+
+def bench_publisher(iterations: int, points: int = 100, encoded: bool = False) -> dict:
+    from influxdb_client import Point
+    from orchidarium.lib.lineprotocol import Schema
+    from orchidarium.publishers.influxdb import InfluxDBPublisher
+
+    schema = Schema('bench', {'scale': 'F'}, ('temperature', 'humidity'))
+
+    with InfluxDBSink() as influx:
+        env['INFLUXDB_HOST'] = influx.url
+        publisher = InfluxDBPublisher()
+        publisher.connect()
+
+        def submit() -> None:
+            if encoded:
+                for i in range(points):
+                    publisher.submit(schema.encode((72.5, float(i))))
+            else:
+                for i in range(points):
+                    publisher.submit(Point('bench').tag('scale', 'F').field('temperature', 72.5).field('humidity', float(i)))
+
+        try:
+            result = measure('publisher.encoded' if encoded else 'publisher.submit', submit, iterations // 10 or 1, items=points)
+            _start = perf_counter()
+        finally:
+            publisher.close()
+        print(f'{"":18} delivered {influx.points:,} point(s) in {influx.requests:,} request(s), drained in {perf_counter() - _start:.3f}s')
+
+    return result
+
+
+def bench_runtime_sample(iterations: int) -> dict:
+    from orchidarium.publishers.influxdb import InfluxDBPublisher
+    from orchidarium.runtime import Runtime
+    from orchidarium.sensors import HumiditySensor
+
+    bus.devices._find = fake_finder([FakeDevice(humidity_stream(1000, split=0.2, seed=4))])
+
+    with InfluxDBSink() as influx:
+        env['INFLUXDB_HOST'] = influx.url
+        with Runtime(publisher=InfluxDBPublisher, sensors=[HumiditySensor]) as runtime:
+            sensor, publisher = runtime.sensors[0], runtime.publisher
+            assert publisher is not None
+            result = measure('runtime.sample', lambda: runtime._sample(sensor, publisher), iterations)
+        print(f'{"":18} delivered {influx.points:,} point(s) in {influx.requests:,} request(s)')
+
+    return result
+
+
+_STAGES: Dict[str, Callable[[int], dict]] = {
+    'bus.read': bench_bus_read,
+    'bus.read+faults': bench_bus_read_faults,
+    'frame.parse': bench_frame_parse,
+    'sensor.collect': bench_sensor_collect,
+    'health.update': bench_health_update,
+    'health.persist': bench_health_persist,
+    'health.http': bench_health_http,
+    'metrics.observe': bench_metrics_observe,
+    'metrics.scrape': bench_metrics_scrape,
+    'readings.record': bench_readings_record,
+    'readings.query': bench_readings_query,
+    'encode.point': bench_encode_point,
+    'encode.schema': bench_encode_schema,
+    'publisher.submit': bench_publisher,
+    'publisher.encoded': lambda iterations: bench_publisher(iterations, encoded=True),
+    'runtime.sample': bench_runtime_sample,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=5000, help='timed calls per stage')
+    parser.add_argument('--stage', action='append', choices=list(_STAGES), help='only run this stage (repeatable)')
+    parser.add_argument('--json', metavar='PATH', help='write the results to this file')
+    parser.add_argument('--verbose', action='store_true', help='show the daemon\'s own logging')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.CRITICAL)
+
+    results = {name: _STAGES[name](args.iterations) for name in args.stage or _STAGES}
+
+    memory = rss_kib()
+    print(f'RSS {memory["VmRSS"] / 1024:.1f} MiB, peak {memory["VmHWM"] / 1024:.1f} MiB')
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'iterations': args.iterations, 'stages': results, 'rss_kib': memory}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Compare the thread-pool runtime (RUNTIME=threads) with the asyncio runtime (RUNTIME=asyncio) under load.
+
+Every run is an `orchidarium simulate` in a fresh interpreter, writing to a local InfluxDB stand-in, so that the two
+runtimes are measured on the same synthetic sensors. Reported per runtime and sensor count: delivered points per
+second, process CPU, peak thread count, sample-to-write latency and late or skipped ticks. Use `--json` to record the
+results of a release and compare them with the next one.
+
+    python benchmarks/runtimes.py --sensors 10 100 500 --rate 2 --duration 20
+"""
+
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+
+_RUNTIMES = ('threads', 'asyncio')
+
+
+def simulate(runtime: str, sensors: int, rate: float, duration: float, workers: int) -> dict:
+    """
+    Run one simulation in a fresh interpreter.
+
+    Args:
+        runtime (str): 'threads' or 'asyncio'.
+        sensors (int): number of synthetic sensors.
+        rate (float): samples per second per sensor.
+        duration (float): seconds to run for.
+        workers (int): SENSOR_WORKERS for the run.
+
+    Returns:
+        dict: the simulation report.
+    """
+    proc = subprocess.run(
+        [
+            sys.executable, '-m', 'orchidarium.entrypoint', 'simulate',
+            '--runtime', runtime,
+            '--sensors', str(sensors),
+            '--rate', str(rate),
+            '--duration', str(duration),
+            '--json'
+        ],
+        env={**os.environ, 'HEALTHCHECK_CACHE_PATH': '', 'SENSOR_WORKERS': str(workers)},
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sensors', type=int, nargs='+', default=[10, 100, 500], help='sensor counts to run (default: 10 100 500)')
+    parser.add_argument('--rate', type=float, default=2.0, help='samples per second per sensor (default: 2)')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per run (default: 10)')
+    parser.add_argument('--workers', type=int, default=32, help='SENSOR_WORKERS for both runtimes (default: 32)')
+    parser.add_argument('--runtime', choices=_RUNTIMES, action='append', help='runtime to run (repeatable; default: both)')
+    parser.add_argument('--json', metavar='PATH', help='write the results to this file')
+    args = parser.parse_args()
+
+    print(f'{"runtime":8} {"sensors":>7} {"points/s":>9} {"cpu %":>7} {"threads":>7} {"p50 ms":>8} {"p99 ms":>8} {"late":>6} {"skipped":>7}')
+
+    results = []
+    for sensors in args.sensors:
+        for runtime in args.runtime or _RUNTIMES:
+            report = simulate(runtime, sensors, args.rate, args.duration, args.workers)
+            results.append(report)
+            print(
+                f'{runtime:8} {sensors:>7} {report["points_per_second"]:>9.1f} {report["process_cpu_percent"]:>7.2f} '
+                f'{report["threads_max"]:>7} {report["latency_p50_ms"]:>8.1f} {report["latency_p99_ms"]:>8.1f} '
+                f'{report["ticks_late"]:>6} {report["ticks_skipped"]:>7}'
+            )
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'python': sys.version.split()[0], 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
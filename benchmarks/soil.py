@@ -0,0 +1,79 @@
+"""
+Benchmark reading the soil probe's seven channels in one multi-register Modbus transaction against one round trip per
+channel, over a fake serial line that takes as long as the real one.
+
+    python benchmarks/soil.py --samples 20 --baudrate 4800 --latency 0.02
+    python benchmarks/soil.py --samples 20000 --baudrate 0   # client CPU cost only
+"""
+
+
+from __future__ import annotations
+
+import argparse
+import sys
+
+from pathlib import Path
+from time import perf_counter, process_time
+from orchidarium.lib.modbus import ModbusClient, ModbusError
+
+# The fake devices live with the tests.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'tests'))
+
+from fakes import FakeModbusTransport, soil_registers  # noqa: E402
+
+CHANNELS = 7
+
+
+def bulk(client: ModbusClient) -> tuple:
+    return client.read_registers(0x0000, CHANNELS)
+
+
+def per_channel(client: ModbusClient) -> tuple:
+    return tuple(client.read_registers(address, 1)[0] for address in range(CHANNELS))
+
+
+def run(name: str, read, args: argparse.Namespace) -> None:
+    transport = FakeModbusTransport(
+        soil_registers(),
+        baudrate=args.baudrate or None,
+        latency=args.latency,
+        corrupt=args.corrupt,
+        seed=args.seed
+    )
+    client = ModbusClient(transport, timeout=1.0)
+    expected = tuple(soil_registers())
+    failed = 0
+
+    _start, _cpu = perf_counter(), process_time()
+    for _ in range(args.samples):
+        try:
+            assert read(client) == expected
+        except ModbusError:
+            failed += 1
+    elapsed, cpu = perf_counter() - _start, process_time() - _cpu
+
+    print(
+        f'{name:<12} {elapsed / args.samples * 1e3:9.2f}ms/sample  {cpu / args.samples * 1e6:8.1f}us CPU/sample  '
+        f'{transport.transactions / args.samples:5.2f} transactions/sample  '
+        f'{(transport.bytes_written + transport.bytes_read) / args.samples:6.1f} bytes/sample  {failed} failed'
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--samples', type=int, default=20)
+    parser.add_argument('--baudrate', type=int, default=4800, help='line speed to simulate; 0 for an instant line')
+    parser.add_argument('--latency', type=float, default=0.02, help='seconds the probe takes to start answering')
+    parser.add_argument('--corrupt', type=float, default=0.0, help='probability of a response with a flipped byte')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if not args.baudrate:
+        args.latency = 0.0
+
+    run('bulk', bulk, args)
+    run('per-channel', per_channel, args)
+
+
+if __name__ == '__main__':
+    main()
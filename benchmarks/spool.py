@@ -0,0 +1,88 @@
+"""
+Benchmark spooling and replaying a multi-hour publisher backlog.
+
+    python benchmarks/spool.py --hours 6 --sensors 20 --rate 1
+"""
+
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import tempfile
+
+from pathlib import Path
+from time import perf_counter, time_ns
+from orchidarium.lib.spool import Spool
+from typing import Iterator, List
+
+
+def backlog(hours: float, sensors: int, rate: float, batch: int) -> Iterator[List[bytes]]:
+    """
+    Generate line-protocol batches equivalent to an outage of the given length.
+
+    Args:
+        hours (float): length of the outage.
+        sensors (int): number of sensors sampling during the outage.
+        rate (float): samples per second per sensor.
+        batch (int): records per spooled batch.
+
+    Yields:
+        List[bytes]: batches of line-protocol records.
+    """
+    total = int(hours * 3600 * rate * sensors)
+    start = time_ns() - int(hours * 3600 * 1e9)
+    step = int(1e9 / (rate * sensors))
+    records = []
+    for i in range(total):
+        records.append(
+            b'humidity,device=probe%d,scale=F temperature=%.1f,humidity=%.1f %d' % (i % sensors, 70 + i % 10 / 10, 60 + i % 7 / 10, start + i * step)
+        )
+        if len(records) == batch:
+            yield records
+            records = []
+    if records:
+        yield records
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--hours', type=float, default=6.0)
+    parser.add_argument('--sensors', type=int, default=20)
+    parser.add_argument('--rate', type=float, default=1.0, help='samples per second per sensor')
+    parser.add_argument('--batch', type=int, default=500, help='records per spooled batch')
+    parser.add_argument('--chunk-bytes', type=int, default=4 * 2**20)
+    parser.add_argument('--gzip', action='store_true', help='compress every replayed chunk, as the publisher does on the wire')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        spool = Spool(Path(tmp), max_bytes=2**40)
+
+        points = 0
+        _start = perf_counter()
+        for records in backlog(args.hours, args.sensors, args.rate, args.batch):
+            spool.append(records)
+            points += len(records)
+        spool.close()
+        append_seconds = perf_counter() - _start
+        size = spool.size
+
+        chunks = 0
+
+        def send(body: bytes) -> None:
+            nonlocal chunks
+            chunks += 1
+            if args.gzip:
+                gzip.compress(body, compresslevel=1)
+
+        _start = perf_counter()
+        delivered = spool.replay(send, chunk_bytes=args.chunk_bytes)
+        replay_seconds = perf_counter() - _start
+
+    print(f'backlog:  {points} points, {size / 2**20:.1f} MiB on disk')
+    print(f'append:   {append_seconds:.3f}s ({points / append_seconds:,.0f} points/s)')
+    print(f'replay:   {replay_seconds:.3f}s ({points / replay_seconds:,.0f} points/s, {delivered / 2**20 / replay_seconds:.1f} MiB/s) in {chunks} request(s)')
+
+
+if __name__ == '__main__':
+    main()
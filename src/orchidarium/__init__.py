@@ -8,20 +8,91 @@ from typing import Dict
 log = logging.getLogger(__name__)
 
 env: Dict[str, str]  = {
-    'DEBUG':                  os.getenv('DEBUG',                                              ''),
-    'INFLUXDB_HOST':          os.getenv('INFLUXDB_HOST',                         'influxdb:8086'),
-    'INFLUXDB_TOKEN':         os.getenv('INFLUXDB_TOKEN',                                     ''),
-    'INFLUXDB_ORG':           os.getenv('INFLUXDB_ORG',                            'orchidarium'),
-    'INFLUXDB_DATABASE':      os.getenv('INFLUXDB_DATABASE',                       'orchidarium'),
-    'INTERVAL':               os.getenv('INTERVAL',                                         '60'),
-    # 'HEALTHCHECK_CACHE_TTL':  os.getenv('HEALTHCHECK_CACHE_TTL',                             '5'),
-    'HEALTHCHECK_CACHE_PATH': os.getenv('HEALTHCHECK_CACHE_PATH', '/opt/orchidarium/healthcheck'),
-    'HEALTHCHECK_PORT':       os.getenv('HEALTHCHECK_PORT',                               '8085')
+    'DEBUG':                        os.getenv('DEBUG',                                              ''),
+    'INFLUXDB_HOST':                os.getenv('INFLUXDB_HOST',                         'influxdb:8086'),
+    'INFLUXDB_TOKEN':               os.getenv('INFLUXDB_TOKEN',                                     ''),
+    'INFLUXDB_ORG':                 os.getenv('INFLUXDB_ORG',                            'orchidarium'),
+    'INFLUXDB_DATABASE':            os.getenv('INFLUXDB_DATABASE',                       'orchidarium'),
+    'INFLUXDB_BATCH_SIZE':          os.getenv('INFLUXDB_BATCH_SIZE',                             '500'),
+    'INFLUXDB_FLUSH_INTERVAL':      os.getenv('INFLUXDB_FLUSH_INTERVAL',                          '10'),
+    'INFLUXDB_QUEUE_SIZE':          os.getenv('INFLUXDB_QUEUE_SIZE',                           '10000'),
+    'INFLUXDB_BACKPRESSURE':        os.getenv('INFLUXDB_BACKPRESSURE',                   'drop-oldest'),
+    'SPOOL_PATH':                   os.getenv('SPOOL_PATH',                   '/opt/orchidarium/spool'),
+    'SPOOL_MAX_BYTES':              os.getenv('SPOOL_MAX_BYTES',                           '268435456'),
+    'SPOOL_SEGMENT_BYTES':          os.getenv('SPOOL_SEGMENT_BYTES',                         '8388608'),
+    'SPOOL_REPLAY_CHUNK_BYTES':     os.getenv('SPOOL_REPLAY_CHUNK_BYTES',                    '4194304'),
+    'SPOOL_REPLAY_SEGMENTS':        os.getenv('SPOOL_REPLAY_SEGMENTS',                             '1'),
+    'USB_RETRY_BASE_DELAY':         os.getenv('USB_RETRY_BASE_DELAY',                            '0.1'),
+    'USB_RETRY_MAX_DELAY':          os.getenv('USB_RETRY_MAX_DELAY',                               '5'),
+    'USB_RETRY_DEADLINE':           os.getenv('USB_RETRY_DEADLINE',                               '10'),
+    'USB_BREAKER_THRESHOLD':        os.getenv('USB_BREAKER_THRESHOLD',                             '5'),
+    'USB_BREAKER_RESET':            os.getenv('USB_BREAKER_RESET',                                '30'),
+    'USB_STREAMING':                os.getenv('USB_STREAMING',                                      ''),
+    'SOIL_PORT':                    os.getenv('SOIL_PORT',                              '/dev/ttyUSB0'),
+    'SOIL_BAUDRATE':                os.getenv('SOIL_BAUDRATE',                                  '4800'),
+    'SOIL_UNIT':                    os.getenv('SOIL_UNIT',                                         '1'),
+    'SOIL_TIMEOUT':                 os.getenv('SOIL_TIMEOUT',                                      '1'),
+    'SENSORS_ENABLED':              os.getenv('SENSORS_ENABLED',                                    ''),
+    'SENSORS_DISABLED':             os.getenv('SENSORS_DISABLED',                                   ''),
+    'SENSOR_PERIODS':               os.getenv('SENSOR_PERIODS',                                     ''),
+    'RUNTIME':                      os.getenv('RUNTIME',                                     'threads'),
+    'SENSOR_WORKERS':               os.getenv('SENSOR_WORKERS',                                    '8'),
+    'SENSOR_ISOLATION':             os.getenv('SENSOR_ISOLATION',                                   ''),
+    'SENSOR_DEADLINE':              os.getenv('SENSOR_DEADLINE',                                    ''),
+    'OVERSAMPLE_PERIOD':            os.getenv('OVERSAMPLE_PERIOD',                                  ''),
+    'DEADBAND':                     os.getenv('DEADBAND',                                           ''),
+    'DEADBAND_HEARTBEAT':           os.getenv('DEADBAND_HEARTBEAT',                              '900'),
+    'ADAPTIVE':                     os.getenv('ADAPTIVE',                                           ''),
+    'ADAPTIVE_MIN_PERIOD':          os.getenv('ADAPTIVE_MIN_PERIOD',                               '5'),
+    'ADAPTIVE_MAX_PERIOD':          os.getenv('ADAPTIVE_MAX_PERIOD',                                ''),
+    'ADAPTIVE_ALPHA':               os.getenv('ADAPTIVE_ALPHA',                                  '0.3'),
+    'READINGS_CAPACITY':            os.getenv('READINGS_CAPACITY',                              '3600'),
+    'INTERVAL':                     os.getenv('INTERVAL',                                         '60'),
+    # 'HEALTHCHECK_CACHE_TTL':      os.getenv('HEALTHCHECK_CACHE_TTL',                             '5'),
+    'HEALTHCHECK_CACHE_PATH':       os.getenv('HEALTHCHECK_CACHE_PATH', '/opt/orchidarium/healthcheck'),
+    'HEALTHCHECK_STALENESS_FACTOR': os.getenv('HEALTHCHECK_STALENESS_FACTOR',                      '3'),
+    'HEALTHCHECK_PERSIST_INTERVAL': os.getenv('HEALTHCHECK_PERSIST_INTERVAL',                      '5'),
+    'DEBUG_ENDPOINTS':              os.getenv('DEBUG_ENDPOINTS',                                    ''),
+    'HEALTHCHECK_SERVER':           os.getenv('HEALTHCHECK_SERVER',                            'flask'),
+    'HEALTHCHECK_HOST':             os.getenv('HEALTHCHECK_HOST',                          '127.0.0.1'),
+    'HEALTHCHECK_PORT':             os.getenv('HEALTHCHECK_PORT',                               '8085')
 }
 
 try:
     int(env['INTERVAL'])
+    int(env['SENSOR_WORKERS'])
+    if env['SENSOR_ISOLATION'] not in ('', 'process'):
+        raise ValueError(f'SENSOR_ISOLATION must be empty or "process", received "{env["SENSOR_ISOLATION"]}"')
+    if env['SENSOR_DEADLINE']:
+        float(env['SENSOR_DEADLINE'])
+    if env['OVERSAMPLE_PERIOD']:
+        float(env['OVERSAMPLE_PERIOD'])
+    float(env['DEADBAND_HEARTBEAT'])
+    float(env['ADAPTIVE_MIN_PERIOD'])
+    if env['ADAPTIVE_MAX_PERIOD']:
+        float(env['ADAPTIVE_MAX_PERIOD'])
+    float(env['ADAPTIVE_ALPHA'])
+    int(env['READINGS_CAPACITY'])
+    int(env['INFLUXDB_BATCH_SIZE'])
+    float(env['INFLUXDB_FLUSH_INTERVAL'])
+    int(env['INFLUXDB_QUEUE_SIZE'])
+    int(env['SPOOL_MAX_BYTES'])
+    int(env['SPOOL_SEGMENT_BYTES'])
+    int(env['SPOOL_REPLAY_CHUNK_BYTES'])
+    if int(env['SPOOL_REPLAY_SEGMENTS']) < 1:
+        raise ValueError(f'SPOOL_REPLAY_SEGMENTS must be at least 1, received "{env["SPOOL_REPLAY_SEGMENTS"]}"')
+    float(env['USB_RETRY_BASE_DELAY'])
+    float(env['USB_RETRY_MAX_DELAY'])
+    float(env['USB_RETRY_DEADLINE'])
+    int(env['USB_BREAKER_THRESHOLD'])
+    float(env['USB_BREAKER_RESET'])
+    int(env['SOIL_BAUDRATE'])
+    if not 1 <= int(env['SOIL_UNIT']) <= 247:
+        raise ValueError(f'SOIL_UNIT must be a Modbus unit address between 1 and 247, received "{env["SOIL_UNIT"]}"')
+    float(env['SOIL_TIMEOUT'])
     # int(env['HEALTHCHECK_CACHE_TTL'])
+    float(env['HEALTHCHECK_STALENESS_FACTOR'])
+    float(env['HEALTHCHECK_PERSIST_INTERVAL'])
     int(env['HEALTHCHECK_PORT'])
 except ValueError as e:
     log.error(e)
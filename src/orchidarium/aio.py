@@ -0,0 +1,246 @@
+"""
+Asyncio runtime: every sensor is a task on one event loop, blocking sensor I/O runs in a bounded executor, points are
+written by an asyncio HTTP writer, and the health API is served from the same loop.
+
+Selected with RUNTIME=asyncio; see `orchidarium.runtime.Runtime` for the default thread-pool runtime.
+"""
+
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import signal
+import traceback
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from orchidarium import env
+from orchidarium.lib.health import registry
+from orchidarium.lib.metrics import histogram, summary
+from orchidarium.lib.scheduler import Task
+from orchidarium.runtime import create_sensors
+from orchidarium.sensors import sensor_specs, SensorSpec
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Type
+    from orchidarium.publishers import AsyncPublisher
+    from orchidarium.sensors import Sensor
+
+
+__all__ = [
+    'AsyncRuntime',
+    'daemon'
+]
+
+log = logging.getLogger(__name__)
+
+# The same series as the thread-pool runtime, so dashboards work with either; tick metrics are recorded by `Task`.
+_setup_seconds = summary('runtime_setup_seconds', 'Time spent creating sensors, the worker pool and the publisher connection.')
+_sample_seconds = histogram('sensor_sample_seconds', 'Time spent collecting and publishing one sample, by sensor', labels=('sensor',))
+
+
+class AsyncRuntime:
+    """
+    Create sensors, a bounded executor for their blocking I/O and a publisher connection once, and sample every sensor
+    on its own period from a task on the running event loop until `stop()` is called.
+
+    Args:
+        publisher (Optional[Callable[[], AsyncPublisher]]): factory for the publisher that the sensors submit data to; None to only collect.
+        sensors (Optional[Iterable[Type[Sensor] | SensorSpec]]): sensors to run; every enabled sensor in the registry if omitted. (default: None)
+        late_tolerance (float): fraction of a period a tick may start past its deadline before it is counted as late. (default: 0.1)
+    """
+
+    def __init__(self,
+                 publisher: Optional[Callable[[], AsyncPublisher]],
+                 sensors: Optional[Iterable[Type[Sensor] | SensorSpec]] = None,
+                 late_tolerance: float = 0.1) -> None:
+        self._publisher_factory = publisher
+        self._specs: Tuple[SensorSpec, ...] = tuple(
+            s if isinstance(s, SensorSpec) else SensorSpec.of(s) for s in sensors
+        ) if sensors is not None else sensor_specs()
+        self._late_tolerance = late_tolerance
+        self.sensors: List[Sensor] = []
+        self.publisher: Optional[AsyncPublisher] = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopped: Optional[asyncio.Event] = None
+        self._tasks: Dict[str, Task] = {}
+
+    async def start(self) -> None:
+        """
+        Instantiate every sensor, start the executor and open the publisher connection, if there is a publisher.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+
+        with _setup_seconds.time():
+            # Creating sensors enumerates USB devices, which blocks.
+            _isolated = env['SENSOR_ISOLATION'] == 'process'
+            self.sensors = await self._loop.run_in_executor(None, partial(create_sensors, self._specs, isolated=_isolated))
+            # Only blocking calls occupy a worker, so this bounds concurrent device I/O, not the number of sensors.
+            self._pool = ThreadPoolExecutor(
+                max_workers=max(min(len(self.sensors), int(env['SENSOR_WORKERS'])), 1),
+                thread_name_prefix='sensor'
+            )
+            if self._publisher_factory is not None:
+                self.publisher = self._publisher_factory()
+                await self.publisher.connect()
+
+        log.info(f'Started asyncio runtime with {len(self.sensors)} sensor(s) in {_setup_seconds.snapshot()["last"]:.4f}s')
+
+    async def run(self) -> None:
+        """
+        Sample every sensor on its own period until `stop()` is called.
+
+        Each sensor has its own task, so a slow or stuck sensor only delays (and skips) its own ticks.
+        """
+        if self._stopped is None or self.publisher is None:
+            raise RuntimeError('Runtime must be started before it can run')
+
+        tasks: List[asyncio.Task] = []
+        for sensor in self.sensors:
+            if sensor.oversampling:
+                tasks.append(asyncio.create_task(
+                    self._every(f'{sensor.name}:sample', sensor.sample_period, partial(self._oversample, sensor)),  # type: ignore[arg-type]
+                    name=f'{sensor.name}:sample'
+                ))
+            tasks.append(asyncio.create_task(
+                self._every(
+                    sensor.name,
+                    sensor.period,
+                    partial(self._sample, sensor, self.publisher),
+                    # With adaptive sampling, each sample may change the sensor's period.
+                    adapt=partial(getattr, sensor, 'period')
+                ),
+                name=sensor.name
+            ))
+
+        await self._stopped.wait()
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        log.info(f'Scheduler stopped. Tick statistics: {self.stats()}')
+
+    def stop(self) -> None:
+        """
+        Ask a running runtime to return from `run()`. Safe to call from any thread, and from signal handlers.
+        """
+        if self._loop is not None and self._stopped is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._stopped.set)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Report how many ticks of each sensor were fired, late or skipped.
+
+        Returns:
+            Dict[str, Dict[str, int]]: a mapping of task names to their tick statistics.
+        """
+        return {name: task.stats() for name, task in self._tasks.items()}
+
+    async def _every(self,
+                     name: str,
+                     period: float,
+                     callback: Callable[[], None],
+                     adapt: Optional[Callable[[], float]] = None) -> None:
+        """
+        Run a blocking callback in the executor on a fixed-rate schedule.
+
+        Deadlines, lateness and skipped ticks are tracked by a `Task`, exactly as the thread-pool runtime's scheduler
+        does: the schedule does not drift, ticks that come due while a run is still going are skipped rather than
+        queued behind it, and if `adapt` returns a different period after a run the task is retimed to it.
+        """
+        assert self._loop is not None
+
+        loop = self._loop
+        task = self._tasks[name] = Task(name, period, callback, origin=loop.time())
+
+        while True:
+            if (delay := task.deadline - loop.time()) > 0:
+                await asyncio.sleep(delay)
+
+            task.dispatch(loop.time(), self._late_tolerance)
+            await loop.run_in_executor(self._pool, callback)
+
+            if (missed := task.advance(loop.time())) > 0:
+                task.skip(missed)
+                log.warning(f'Task "{name}" missed {missed} tick(s)')
+
+            if adapt is not None and (_period := adapt()) != task.period:
+                task.retime(_period)
+
+    @staticmethod
+    def _sample(sensor: Sensor, publisher: AsyncPublisher) -> None:
+        try:
+            with _sample_seconds.time(sensor.name):
+                sensor(publisher)  # type: ignore[arg-type]
+        except Exception:
+            log.error(f'Sensor "{sensor.name}" failed. Full traceback: {traceback.format_exc()}')
+
+    @staticmethod
+    def _oversample(sensor: Sensor) -> None:
+        try:
+            sensor.sample()
+        except Exception:
+            log.error(f'Sensor "{sensor.name}" failed to sample. Full traceback: {traceback.format_exc()}')
+
+    async def close(self) -> None:
+        """
+        Shut down the executor, release the sensors and flush and close the publisher connection.
+        """
+        self.stop()
+        loop = asyncio.get_running_loop()
+
+        if self._pool is not None:
+            await loop.run_in_executor(None, partial(self._pool.shutdown, wait=True, cancel_futures=True))
+            self._pool = None
+
+        # Releasing a sensor may talk to its device (e.g. re-attaching a kernel driver).
+        def _close() -> None:
+            for sensor in self.sensors:
+                sensor.close()
+
+        await loop.run_in_executor(None, _close)
+
+        if self.publisher is not None:
+            await self.publisher.close()
+            self.publisher = None
+
+        # Make sure the last state of every sensor reaches disk, regardless of the persistence interval.
+        await loop.run_in_executor(None, registry.persist)
+
+        log.info(f'Asyncio runtime stopped')
+
+    async def __aenter__(self) -> AsyncRuntime:
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.close()
+
+
+async def daemon() -> None:
+    """
+    Serve the health API and sample every sensor from the running event loop until SIGTERM or SIGINT.
+    """
+    from orchidarium.api.server import HealthServer
+    from orchidarium.publishers.influxdb_async import AsyncInfluxDBPublisher
+
+    if env['HEALTHCHECK_SERVER'] != 'asyncio':
+        log.info(f'The asyncio runtime serves the healthcheck API from its own event loop, ignoring HEALTHCHECK_SERVER "{env["HEALTHCHECK_SERVER"]}"')
+
+    server = await HealthServer().start(env['HEALTHCHECK_HOST'], int(env['HEALTHCHECK_PORT']))
+
+    try:
+        async with AsyncRuntime(publisher=AsyncInfluxDBPublisher) as runtime:
+            loop = asyncio.get_running_loop()
+            for _signal in (signal.SIGTERM, signal.SIGINT):
+                loop.add_signal_handler(_signal, runtime.stop)
+
+            await runtime.run()
+    finally:
+        server.close()
+        await server.wait_closed()
@@ -1,34 +1,122 @@
 """
 This module is responsible for the healthcheck API.
+
+The same endpoints are served either by the Flask app in `orchidarium.api.app` or by the dependency-free asyncio server
+in `orchidarium.api.server`, selected with HEALTHCHECK_SERVER. Neither is imported until it is needed.
+
+Routes shared by both are framework-agnostic handlers that take the query parameters and return a `Reply`; the asyncio
+server calls them directly and `add_routes()` adapts them to Flask views.
 """
 
 
+from __future__ import annotations
+
+import json
 import logging
 
-from flask import Flask
-from flask_cors import CORS
+from functools import partial
+from http import HTTPStatus
+from threading import Thread
+from orchidarium import env
+from typing import TYPE_CHECKING
 
+if TYPE_CHECKING:
+    from typing import Any, Callable, Mapping, Optional, Tuple
+    from flask import Flask, Response
+
+    # The status, content type and encoded body of a response.
+    Reply = Tuple[HTTPStatus, str, bytes]
+    Handler = Callable[[Mapping[str, str]], Reply]
 
-# cli = sys.modules['flask.cli']
-# cli.show_server_banner = lambda *x: None  # type: ignore
 
 log = logging.getLogger(__name__)
 
-wz_log = logging.getLogger('werkzeug')
-wz_log.disabled = True
 
-app = Flask(__name__)
-CORS(app)
+__all__ = [
+    'add_routes',
+    'app',
+    'json_reply',
+    'start'
+]
+
 
-log.debug(f'Set up CORS on app')
+def __getattr__(name: str) -> Any:
+    # Defer importing Flask until the app is actually asked for.
+    if name == 'app':
+        from orchidarium.api.app import app
+        return app
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
 
-__all__ = [
-    'app'
-]
+def json_reply(data: object, status: HTTPStatus = HTTPStatus.OK) -> Reply:
+    """
+    Build a JSON reply for a route.
+
+    Args:
+        data (object): JSON-serializable response body.
+        status (HTTPStatus): response status. (default: HTTPStatus.OK)
+
+    Returns:
+        Reply: the status, content type and encoded body.
+    """
+    return status, 'application/json', json.dumps(data).encode('utf-8')
+
+
+def add_routes(app: Flask, routes: Mapping[str, Handler]) -> None:
+    """
+    Serve framework-agnostic handlers from a Flask app, as GET routes.
+
+    Args:
+        app (Flask): Flask app instance.
+        routes (Mapping[str, Handler]): handlers by request path.
+    """
+    from flask import Response, request
+
+    def _view(handler: Handler) -> Callable[[], Response]:
+        def _f() -> Response:
+            status, content_type, body = handler(request.args)
+            return Response(body, status=status, content_type=content_type)
+        return _f
+
+    for path, handler in routes.items():
+        app.add_url_rule(path, endpoint=path, view_func=_view(handler), methods=['GET'])
+
+
+def start(mode: Optional[str] = None) -> Thread:
+    """
+    Start serving the healthcheck API in a daemon thread.
+
+    Args:
+        mode (Optional[str]): 'flask' or 'asyncio'; defaults to HEALTHCHECK_SERVER. (default: None)
+
+    Raises:
+        ValueError: if the mode is not recognized.
 
+    Returns:
+        Thread: the thread serving the API.
+    """
+    mode = mode or env['HEALTHCHECK_SERVER']
 
-from orchidarium.api.health import create_healthcheck_api
+    if mode == 'asyncio':
+        from orchidarium.api.server import HealthServer
 
+        return HealthServer().run_in_thread(env['HEALTHCHECK_HOST'], int(env['HEALTHCHECK_PORT']))
+    elif mode == 'flask':
+        from orchidarium.api.app import app
 
-create_healthcheck_api(app)
\ No newline at end of file
+        thread = Thread(
+            target=partial(
+                app.run,
+                host=env['HEALTHCHECK_HOST'],
+                port=int(env['HEALTHCHECK_PORT']),
+                debug=bool(env['DEBUG']),
+                use_reloader=False
+            ),
+            # Do not block upon start().
+            daemon=True,
+            name='healthcheck'
+        )
+        thread.start()
+        return thread
+    else:
+        raise ValueError(f'Unknown HEALTHCHECK_SERVER "{mode}", expected "flask" or "asyncio"')
@@ -0,0 +1,44 @@
+"""
+Flask app that serves the healthcheck API.
+"""
+
+
+import logging
+
+from flask import Flask
+from orchidarium import env
+from flask_cors import CORS
+
+
+# cli = sys.modules['flask.cli']
+# cli.show_server_banner = lambda *x: None  # type: ignore
+
+log = logging.getLogger(__name__)
+
+wz_log = logging.getLogger('werkzeug')
+wz_log.disabled = True
+
+app = Flask(__name__)
+CORS(app)
+
+log.debug(f'Set up CORS on app')
+
+
+__all__ = [
+    'app'
+]
+
+
+from orchidarium.api.health import create_healthcheck_api
+from orchidarium.api.metrics import create_metrics_api
+from orchidarium.api.readings import create_readings_api
+
+
+create_healthcheck_api(app)
+create_metrics_api(app)
+create_readings_api(app)
+
+if env['DEBUG_ENDPOINTS']:
+    from orchidarium.api.debug import create_debug_api
+
+    create_debug_api(app)
\ No newline at end of file
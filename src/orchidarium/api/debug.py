@@ -0,0 +1,149 @@
+"""
+Serve on-demand profiling and memory introspection endpoints when DEBUG_ENDPOINTS is set.
+
+The handlers are framework-agnostic so that both the Flask app and the asyncio server can serve them. Both block for
+as long as the requested profile runs, so they must not be called on an event loop.
+"""
+
+
+from __future__ import annotations
+
+import logging
+
+from http import HTTPStatus
+from orchidarium.api import add_routes, json_reply
+from orchidarium.lib.profile import MAX_SECONDS, ProfilerBusyError, collapsed, memory, profile, top
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Dict, Mapping, Sequence
+    from flask import Flask
+    from orchidarium.api import Handler, Reply
+
+
+log = logging.getLogger(__name__)
+
+
+__all__ = [
+    'ROUTES',
+    'create_debug_api',
+    'memory_reply',
+    'profile_reply'
+]
+
+
+def _text(body: str, status: HTTPStatus = HTTPStatus.OK) -> Reply:
+    return status, 'text/plain; charset=utf-8', body.encode('utf-8')
+
+
+def _number(args: Mapping[str, str], name: str, default: float, low: float, high: float) -> float:
+    """
+    Read a numeric query parameter.
+
+    Args:
+        args (Mapping[str, str]): query parameters.
+        name (str): the parameter to read.
+        default (float): the value if the parameter is absent.
+        low (float): the smallest value allowed.
+        high (float): the largest value allowed.
+
+    Returns:
+        float: the value.
+
+    Raises:
+        ValueError: if the parameter is not a number between `low` and `high`.
+    """
+    value = float(args.get(name, default))
+    if not low <= value <= high:
+        raise ValueError(f'"{name}" must be between {low:g} and {high:g}')
+    return value
+
+
+def _choice(args: Mapping[str, str], name: str, choices: Sequence[str]) -> str:
+    """
+    Read a query parameter that must be one of a few values.
+
+    Args:
+        args (Mapping[str, str]): query parameters.
+        name (str): the parameter to read.
+        choices (Sequence[str]): the values allowed; the first is the default.
+
+    Returns:
+        str: the value.
+
+    Raises:
+        ValueError: if the parameter is not one of `choices`.
+    """
+    if (value := args.get(name, choices[0])) not in choices:
+        raise ValueError(f'"{name}" must be one of {", ".join(choices)}')
+    return value
+
+
+def profile_reply(args: Mapping[str, str]) -> Reply:
+    """
+    Profile every thread for `seconds` (default 10) and reply with collapsed stacks, or with a pstats-like table of
+    functions if `format=top`.
+
+    Args:
+        args (Mapping[str, str]): query parameters: seconds, interval, format ('collapsed' or 'top') and limit.
+
+    Returns:
+        Reply: the status, content type and body.
+    """
+    try:
+        seconds = _number(args, 'seconds', 10.0, 0.0, MAX_SECONDS)
+        interval = _number(args, 'interval', 0.01, 0.001, 1.0)
+        limit = int(_number(args, 'limit', 50, 1, 10_000))
+        fmt = _choice(args, 'format', ('collapsed', 'top'))
+    except ValueError as e:
+        return _text(f'{e}\n', HTTPStatus.BAD_REQUEST)
+
+    try:
+        stacks = profile(seconds, interval)
+    except ProfilerBusyError as e:
+        return _text(f'{e}\n', HTTPStatus.CONFLICT)
+
+    return _text(collapsed(stacks) if fmt == 'collapsed' else top(stacks, limit))
+
+
+def memory_reply(args: Mapping[str, str]) -> Reply:
+    """
+    Trace allocations for `seconds` (default 10) and reply with the `limit` (default 25) sites that grew the most.
+
+    Args:
+        args (Mapping[str, str]): query parameters: seconds, limit and group ('lineno', 'filename' or 'traceback').
+
+    Returns:
+        Reply: the status, content type and body.
+    """
+    try:
+        seconds = _number(args, 'seconds', 10.0, 0.0, MAX_SECONDS)
+        limit = int(_number(args, 'limit', 25, 1, 10_000))
+        group = _choice(args, 'group', ('lineno', 'filename', 'traceback'))
+    except ValueError as e:
+        return _text(f'{e}\n', HTTPStatus.BAD_REQUEST)
+
+    try:
+        report = memory(seconds, limit, group)
+    except ProfilerBusyError as e:
+        return _text(f'{e}\n', HTTPStatus.CONFLICT)
+
+    return json_reply(report)
+
+
+ROUTES: Dict[str, Handler] = {
+    '/debug/profile': profile_reply,
+    '/debug/memory': memory_reply
+}
+
+
+def create_debug_api(app: Flask) -> None:
+    """
+    Create the debug API for a Flask app instance.
+
+    Args:
+        app (Flask): Flask app instance.
+    """
+    log.debug(f'Creating debug API')
+
+    add_routes(app, ROUTES)
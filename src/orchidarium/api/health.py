@@ -3,40 +3,75 @@ Serve a healthcheck endpoint when in daemon mode.
 """
 
 
-from http import HTTPStatus
-from flask import Response
-from flask import Flask
-from pathlib import Path
-from orchidarium.lib.json import read_json
-from orchidarium.support import sensor_count
-from orchidarium import env
+from __future__ import annotations
 
 import logging
 
+from http import HTTPStatus
+from orchidarium.api import add_routes, json_reply
+from orchidarium.lib.health import registry
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Dict, Mapping
+    from flask import Flask
+    from orchidarium.api import Handler, Reply
+
 
 log = logging.getLogger(__name__)
 
 
 __all__ = [
-    'create_healthcheck_api'
+    'ROUTES',
+    'create_healthcheck_api',
+    'health_reply',
+    'ready_reply'
 ]
 
 
-_FAILED = Response(
-    {
-        'status': 'Failed'
-    },
-    status=HTTPStatus.SERVICE_UNAVAILABLE,
-    mimetype='application/json'
-)
+_FAILED = json_reply({'status': 'Failed'}, HTTPStatus.SERVICE_UNAVAILABLE)
+
+_OK = json_reply({'status': 'OK'})
+
+
+def health_reply(args: Mapping[str, str]) -> Reply:
+    """
+    Quick unauthenticated healthcheck endpoint.
+
+    Args:
+        args (Mapping[str, str]): query parameters; unused.
+
+    Returns:
+        Reply: the status, content type and a body like
+
+        {
+            "status": "OK"
+        }
+    """
+    return _OK if registry.healthy() else _FAILED
+
+
+def ready_reply(args: Mapping[str, str]) -> Reply:
+    """
+    Quick unauthenticated readiness endpoint.
+
+    Args:
+        args (Mapping[str, str]): query parameters; unused.
+
+    Returns:
+        Reply: the status, content type and a body like
+
+        {
+            "status": "OK"
+        }
+    """
+    return _OK if registry.ready() else _FAILED
+
 
-_OK = Response(
-    {
-        'status': 'OK'
-    },
-    status=HTTPStatus.OK,
-    mimetype='application/json'
-)
+ROUTES: Dict[str, Handler] = {
+    '/health': health_reply,
+    '/ready': ready_reply
+}
 
 
 def create_healthcheck_api(app: Flask) -> None:
@@ -49,50 +84,4 @@ def create_healthcheck_api(app: Flask) -> None:
 
     log.debug(f'Creating healthcheck API')
 
-    @app.get('/health')
-    def healthcheck() -> Response:
-        """
-        Quick unauthenticated healthcheck endpoint.
-
-        Returns:
-            Response: an object with schema like
-
-            {
-                "status": "OK"
-            }
-        """
-        if len(list(Path(env['HEALTHCHECK_CACHE_PATH']).iterdir())) == sensor_count():
-            for sensor_health_result_f in Path(env['HEALTHCHECK_CACHE_PATH']).iterdir():
-                if not read_json(path=sensor_health_result_f)['healthcheck']['readout']:
-                    return _FAILED
-            else:
-                if len(list(Path(env['HEALTHCHECK_CACHE_PATH']).iterdir())) != 0:
-                    return _OK
-                else:
-                    return _FAILED
-        else:
-            return _FAILED
-
-    @app.get('/ready')
-    def readiness() -> Response:
-        """
-        Quick unauthenticated readiness endpoint.
-
-        Returns:
-            Response: an object with schema like
-
-            {
-                "status": "OK"
-            }
-        """
-        if len(list(Path(env['HEALTHCHECK_CACHE_PATH']).iterdir())) == sensor_count():
-            for sensor_health_result_f in Path(env['HEALTHCHECK_CACHE_PATH']).iterdir():
-                if not ((_jsn := read_json(path=sensor_health_result_f))['healthcheck']['publish']) and not _jsn['healthcheck']['readout']:
-                    return _FAILED
-            else:
-                if len(list(Path(env['HEALTHCHECK_CACHE_PATH']).iterdir())) != 0:
-                    return _OK
-                else:
-                    return _FAILED
-        else:
-            return _FAILED
\ No newline at end of file
+    add_routes(app, ROUTES)
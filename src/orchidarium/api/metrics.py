@@ -0,0 +1,38 @@
+"""
+Serve the daemon's metrics in the Prometheus text format.
+"""
+
+
+from flask import Flask, Response
+from orchidarium.lib.metrics import CONTENT_TYPE, exposition
+
+import logging
+
+
+log = logging.getLogger(__name__)
+
+
+__all__ = [
+    'create_metrics_api'
+]
+
+
+def create_metrics_api(app: Flask) -> None:
+    """
+    Create a metrics API for a Flask app instance.
+
+    Args:
+        app (Flask): Flask app instance.
+    """
+
+    log.debug(f'Creating metrics API')
+
+    @app.get('/metrics')
+    def metrics() -> Response:
+        """
+        Unauthenticated Prometheus scrape endpoint.
+
+        Returns:
+            Response: every registered counter, gauge, histogram and summary in the text exposition format.
+        """
+        return Response(exposition(), status=200, content_type=CONTENT_TYPE)
@@ -0,0 +1,172 @@
+"""
+Serve recent readings from the in-memory store, so that local consumers do not have to query InfluxDB.
+
+The handlers are framework-agnostic so that both the Flask app and the asyncio server can serve them. They only copy
+out of the store, so they are cheap enough to run on an event loop.
+"""
+
+
+from __future__ import annotations
+
+import logging
+import re
+
+from http import HTTPStatus
+from math import isfinite
+from time import time
+from orchidarium.api import add_routes, json_reply
+from orchidarium.lib.tsdb import readings
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Dict, Mapping, Optional, Sequence
+    from flask import Flask
+    from orchidarium.api import Handler, Reply
+
+
+log = logging.getLogger(__name__)
+
+
+__all__ = [
+    'ROUTES',
+    'create_readings_api',
+    'latest_reply',
+    'readings_reply'
+]
+
+_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+_DURATION = re.compile(r'(\d+(?:\.\d+)?)([smhd])')
+
+_NS = 1_000_000_000
+
+
+def _error(message: str, status: HTTPStatus = HTTPStatus.BAD_REQUEST) -> Reply:
+    return json_reply({'error': message}, status)
+
+
+def _duration(value: str) -> float:
+    """
+    Parse a duration such as '90', '90s', '15m', '6h' or '7d' into seconds.
+
+    Args:
+        value (str): the duration.
+
+    Raises:
+        ValueError: if the value is not a finite, positive duration.
+
+    Returns:
+        float: the duration in seconds.
+    """
+    if (match := _DURATION.fullmatch(value)) is not None:
+        seconds = float(match[1]) * _UNITS[match[2]]
+    else:
+        try:
+            seconds = float(value)
+        except ValueError:
+            raise ValueError(f'"{value}" is not a duration, expected e.g. "90", "15m", "6h" or "7d"') from None
+    if not isfinite(seconds) or seconds <= 0:
+        raise ValueError(f'"{value}" is not a finite, positive duration')
+    return seconds
+
+
+def _since(value: Optional[str]) -> float:
+    """
+    Parse the start of a query: a Unix timestamp in seconds, or a duration with a unit ('15m', '1h', ...) before now.
+
+    Args:
+        value (Optional[str]): the start of the query; an hour ago if None.
+
+    Raises:
+        ValueError: if the value is neither a finite Unix timestamp nor a duration.
+
+    Returns:
+        float: the start as a Unix timestamp in seconds.
+    """
+    if value is None:
+        return time() - 3600
+    if _DURATION.fullmatch(value) is not None:
+        return time() - _duration(value)
+    try:
+        since = float(value)
+    except ValueError:
+        since = float('nan')
+    if not isfinite(since):
+        raise ValueError(f'"{value}" is neither a Unix timestamp nor a duration such as "15m"')
+    return since
+
+
+def latest_reply(args: Mapping[str, str]) -> Reply:
+    """
+    Reply with the newest value of every field of every sensor, or of one sensor's with `sensor`.
+
+    Args:
+        args (Mapping[str, str]): query parameters: sensor.
+
+    Returns:
+        Reply: the status, content type and a body like {"humidity": {"temperature": {"time": 1.7e9, "value": 72.5}}}.
+    """
+    sensor = args.get('sensor')
+    return json_reply({
+        name: {field: {'time': t / _NS, 'value': value} for field, (t, value) in fields.items()}
+        for name, fields in readings.latest().items()
+        if sensor is None or name == sensor
+    })
+
+
+def readings_reply(args: Mapping[str, str]) -> Reply:
+    """
+    Reply with the samples of one field since a point in time, optionally downsampled into buckets of `step`.
+
+    Args:
+        args (Mapping[str, str]): query parameters: field (required), sensor, since (default: 1h) and step.
+
+    Returns:
+        Reply: the status, content type and a body with one set of columns per sensor: time and value for raw samples,
+        or time, mean, min, max and count for downsampled ones. Times are Unix timestamps in seconds.
+    """
+    if not readings.enabled:
+        return _error('The readings store is disabled (READINGS_CAPACITY=0)', HTTPStatus.NOT_FOUND)
+
+    if not (field := args.get('field')):
+        return _error('"field" is required')
+
+    try:
+        since = int(_since(args.get('since')) * _NS)
+        step = int(_duration(args['step'])) if args.get('step') else None
+    except ValueError as e:
+        return _error(f'{e}')
+    except OverflowError:
+        # Finite, but too far off to count in nanoseconds.
+        return _error(f'"since" or "step" is out of range')
+
+    if step is not None and step < 1:
+        return _error('"step" must be at least 1s')
+
+    series: Dict[str, Dict[str, Sequence[float]]] = {}
+    for sensor, _series in readings.series(field, args.get('sensor')).items():
+        if step is None:
+            times, values = _series.raw(since)
+            series[sensor] = {'time': [t / _NS for t in times], 'value': values}
+        else:
+            times, means, mins, maxs, counts = _series.downsample(since, step)
+            series[sensor] = {'time': [t / _NS for t in times], 'mean': means, 'min': mins, 'max': maxs, 'count': counts}
+
+    return json_reply({'field': field, 'since': since / _NS, 'step': step, 'series': series})
+
+
+ROUTES: Dict[str, Handler] = {
+    '/readings/latest': latest_reply,
+    '/readings': readings_reply
+}
+
+
+def create_readings_api(app: Flask) -> None:
+    """
+    Create the readings API for a Flask app instance.
+
+    Args:
+        app (Flask): Flask app instance.
+    """
+    log.debug(f'Creating readings API')
+
+    add_routes(app, ROUTES)
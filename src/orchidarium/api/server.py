@@ -0,0 +1,228 @@
+"""
+Minimal asyncio HTTP server for the healthcheck API that runs without Flask or Werkzeug.
+"""
+
+
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from functools import partial
+from http import HTTPStatus
+from threading import Thread
+from urllib.parse import parse_qs
+from orchidarium import env
+from orchidarium.lib.metrics import CONTENT_TYPE, exposition
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Callable, Dict, List, Mapping, Optional, Set
+    from orchidarium.api import Handler, Reply
+
+    Query = Dict[str, List[str]]
+    Route = Callable[[Query], Reply]
+
+
+__all__ = [
+    'HealthServer'
+]
+
+log = logging.getLogger(__name__)
+
+# Guard against clients that never finish sending their headers.
+_MAX_HEADERS = 100
+_READ_TIMEOUT = 10.0
+# Every route is a GET, so a request body is read only to be discarded; refuse to read more than this.
+_MAX_BODY = 64 * 1024
+
+
+def _content_length(headers: Dict[str, str]) -> Optional[int]:
+    """
+    Parse a request's Content-Length header.
+
+    Args:
+        headers (Dict[str, str]): request headers, by lower-cased name.
+
+    Returns:
+        Optional[int]: the length (0 if the header is absent), or None if it is not a non-negative decimal integer.
+    """
+    value = headers.get('content-length', '') or '0'
+    # int() would also accept signs, underscores and surrounding whitespace.
+    return int(value) if value.isascii() and value.isdigit() else None
+
+
+def _last_values(handler: Handler, query: Query) -> Reply:
+    """
+    Call a shared handler, which takes one value per query parameter as Flask's request.args gives them.
+
+    Args:
+        handler (Handler): the shared handler.
+        query (Query): the parsed query string, with every value of each parameter.
+
+    Returns:
+        Reply: the handler's reply, given the last value of each parameter.
+    """
+    return handler({key: values[-1] for key, values in query.items()})
+
+
+class HealthServer:
+    """
+    Serve GET routes over HTTP/1.1 with keep-alive from a single asyncio event loop.
+
+    Exposes the same `/health`, `/ready`, `/metrics`, `/readings` and (with DEBUG_ENDPOINTS) `/debug` contract as the
+    Flask app.
+    Further routes can be added with `route()`.
+    """
+
+    def __init__(self) -> None:
+        self._routes: Dict[str, Route] = {
+            '/metrics': lambda _: (HTTPStatus.OK, CONTENT_TYPE, exposition().encode('utf-8'))
+        }
+        # Routes that take a while (e.g. profiling) run on the default executor so that they do not stall the loop.
+        self._blocking: Set[str] = set()
+        self._server: Optional[asyncio.Server] = None
+
+        from orchidarium.api.health import ROUTES as HEALTH
+        from orchidarium.api.readings import ROUTES as READINGS
+
+        self._add(HEALTH)
+        self._add(READINGS)
+
+        if env['DEBUG_ENDPOINTS']:
+            from orchidarium.api.debug import ROUTES as DEBUG
+
+            self._add(DEBUG, blocking=True)
+
+    def _add(self, routes: Mapping[str, Handler], blocking: bool = False) -> None:
+        for path, handler in routes.items():
+            self.route(path, partial(_last_values, handler), blocking=blocking)
+
+    def route(self, path: str, handler: Route, blocking: bool = False) -> None:
+        """
+        Register a handler for GET requests to a path.
+
+        Args:
+            path (str): request path, without a query string.
+            handler (Route): callable that takes the parsed query string and returns a reply.
+            blocking (bool): run the handler in a worker thread rather than on the event loop. (default: False)
+        """
+        self._routes[path] = handler
+        if blocking:
+            self._blocking.add(path)
+        else:
+            self._blocking.discard(path)
+
+    async def start(self, host: str, port: int) -> asyncio.Server:
+        """
+        Start listening on the running event loop.
+
+        Args:
+            host (str): interface to bind to.
+            port (int): port to bind to.
+
+        Returns:
+            asyncio.Server: the listening server.
+        """
+        self._server = await asyncio.start_server(self._handle, host, port)
+        log.info(f'Serving healthcheck API on {host}:{port}')
+        return self._server
+
+    async def serve_forever(self, host: str, port: int) -> None:
+        server = await self.start(host, port)
+        async with server:
+            await server.serve_forever()
+
+    def run_in_thread(self, host: str, port: int) -> Thread:
+        """
+        Run the server on its own event loop in a daemon thread.
+
+        Args:
+            host (str): interface to bind to.
+            port (int): port to bind to.
+
+        Returns:
+            Thread: the started thread.
+        """
+        thread = Thread(
+            target=asyncio.run,
+            args=(self.serve_forever(host, port),),
+            daemon=True,
+            name='healthcheck'
+        )
+        thread.start()
+        return thread
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await asyncio.wait_for(reader.readline(), _READ_TIMEOUT)
+                if not request_line:
+                    break
+
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self._respond(writer, (HTTPStatus.BAD_REQUEST, 'text/plain', b'Bad Request'), keep_alive=False)
+                    break
+
+                headers: Dict[str, str] = {}
+                for _ in range(_MAX_HEADERS):
+                    line = await asyncio.wait_for(reader.readline(), _READ_TIMEOUT)
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                # The connection cannot be reused once the end of the request body is unknown, so close it.
+                if (length := _content_length(headers)) is None:
+                    await self._respond(writer, (HTTPStatus.BAD_REQUEST, 'text/plain', b'Bad Request'), keep_alive=False)
+                    break
+                if length > _MAX_BODY:
+                    await self._respond(writer, (HTTPStatus.REQUEST_ENTITY_TOO_LARGE, 'text/plain', b'Content Too Large'), keep_alive=False)
+                    break
+                if length > 0:
+                    await reader.readexactly(length)
+
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'
+
+                path, _, query = target.partition('?')
+
+                if method not in ('GET', 'HEAD'):
+                    reply: Reply = (HTTPStatus.METHOD_NOT_ALLOWED, 'text/plain', b'Method Not Allowed')
+                elif (handler := self._routes.get(path)) is None:
+                    reply = (HTTPStatus.NOT_FOUND, 'text/plain', b'Not Found')
+                else:
+                    try:
+                        if path in self._blocking:
+                            reply = await asyncio.get_running_loop().run_in_executor(None, handler, parse_qs(query))
+                        else:
+                            reply = handler(parse_qs(query))
+                    except Exception as e:
+                        log.error(f'Handler for "{path}" failed: {e}')
+                        reply = (HTTPStatus.INTERNAL_SERVER_ERROR, 'text/plain', b'Internal Server Error')
+
+                await self._respond(writer, reply, keep_alive=keep_alive, head=method == 'HEAD')
+
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, reply: Reply, keep_alive: bool, head: bool = False) -> None:
+        status, content_type, body = reply
+        writer.write(
+            (
+                f'HTTP/1.1 {status.value} {status.phrase}\r\n'
+                f'Content-Type: {content_type}\r\n'
+                f'Content-Length: {len(body)}\r\n'
+                f'Access-Control-Allow-Origin: *\r\n'
+                f'Connection: {"keep-alive" if keep_alive else "close"}\r\n'
+                f'\r\n'
+            ).encode('latin-1') + (b'' if head else body)
+        )
+        await writer.drain()
@@ -5,32 +5,28 @@ Read temperature and humidity data from USB sensor in my Orchidarium.
 
 from __future__ import annotations
 
+import argparse
+import json
 import logging
+import signal
 import sys
-import traceback
 
-from typing import TYPE_CHECKING
-from setproctitle import setproctitle
-from time import sleep
-from functools import partial
-from threading import Thread
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from orchidarium.publishers.influxdb import InfluxDBPublisher
-from orchidarium.api import app
-from orchidarium.support import sensor_count, sensor_generator
+from datetime import datetime, timezone
+from threading import Event
 from orchidarium import env
+from typing import TYPE_CHECKING
+
+# Heavier dependencies (the InfluxDB client, Flask, pyusb) are imported by the command that needs them, so that
+# `orchidarium read` and container restarts do not pay for subsystems they never use.
 
 if TYPE_CHECKING:
-    from typing import List
-    from concurrent.futures import Future
+    from typing import Any, Dict, List, Optional, Sequence
+    from threading import Thread
 
 
 log = logging.getLogger(__name__)
-logging.basicConfig(
-    stream=sys.stdout,
-    level=logging.DEBUG if env['DEBUG'] != '' else logging.INFO,
-    format='%(asctime)s | %(levelname)s | %(name)s | %(message)s'
-)
+
+_LOG_FORMAT = '%(asctime)s | %(levelname)s | %(name)s | %(message)s'
 
 
 ## Main
@@ -43,66 +39,38 @@ def daemon() -> int:
     Returns:
         int: 0 if successful, 1 or another exit code, otherwise.
     """
-    _ret_code = 0
+    from setproctitle import setproctitle
 
     setproctitle('orchidarium')
 
+    if env['RUNTIME'] == 'asyncio':
+        return _daemon_asyncio()
+    elif env['RUNTIME'] != 'threads':
+        log.error(f'Unknown RUNTIME "{env["RUNTIME"]}", expected "threads" or "asyncio"')
+        return 1
+
+    from orchidarium.publishers.influxdb import InfluxDBPublisher
+    from orchidarium.runtime import Runtime
+    from orchidarium import api
+
+    _ret_code = 0
+
     # Start the healthcheck and other APIs in a separate thread off our main process as a daemon thread.
     _main_process_daemon_threads: List[Thread] = [
-        Thread(
-            target=partial(
-                app.run,
-                port=int(env['HEALTHCHECK_PORT']),
-                debug=bool(env['DEBUG']),
-                use_reloader=False
-            ),
-            # Do not block upon start().
-            daemon=True,
-            name='healthcheck'
-        ),
+        api.start(),
     ]
 
     for _dthread in _main_process_daemon_threads:
-        _dthread.start()
         log.debug(f'Started thread "{_dthread.name}": {_dthread.is_alive()}')
 
     try:
-        while True:
-            # Start as many threads as there are sensors.
-            with ThreadPoolExecutor(max_workers=sensor_count(), thread_name_prefix='sensor') as pool, InfluxDBPublisher() as publisher:
-                log.debug(f'Started {sensor_count()} threads and opened a connection to a publisher')
-
-                # Build a list of thread futures.
-                threads: List[Future] = []
-
-                for sensor in sensor_generator():
-                    threads.append(
-                        pool.submit(
-                            partial(
-                                sensor(),
-                                publisher
-                            )
-                        )
-                    )
-
-                for thread in as_completed(threads):
-                    try:
-                        thread.result()
-                    except Exception:
-                        log.error(f'Thread {thread} failed. Full traceback: {traceback.format_exc()}')
-
-                        for _thread in threads:
-                            if _thread is not thread:
-                                log.debug(f'Terminating thread "{_thread}"')
-                                _thread.cancel()
-                                log.debug(f'Thread "{_thread}" terminated successfully')
-
-                        _ret_code = 1
-                        break
-                else:
-                    _ret_code = 0
-
-            sleep(int(env['INTERVAL']))
+        # Sensors, the worker pool and the publisher connection live for as long as the daemon does.
+        with Runtime(publisher=InfluxDBPublisher) as runtime:
+            for _signal in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(_signal, lambda *_: runtime.stop())
+
+            # Every sensor is sampled on its own period until we receive a signal to stop.
+            runtime.run()
     except Exception as e:
         _ret_code = 1
         log.error(e)
@@ -113,11 +81,183 @@ def daemon() -> int:
     return _ret_code
 
 
-def cli() -> None:
+def _daemon_asyncio() -> int:
+    """
+    Daemon loop on a single asyncio event loop, which also serves the healthcheck API.
+
+    Returns:
+        int: 0 if successful, 1 otherwise.
+    """
+    import asyncio
+    from orchidarium.aio import daemon as _daemon
+
+    try:
+        asyncio.run(_daemon())
+    except Exception as e:
+        log.error(e)
+        return 1
+
+    return 0
+
+
+def read(once: bool = False, as_json: bool = False, sensors: Optional[Sequence[str]] = None, interval: Optional[float] = None) -> int:
+    """
+    Sample sensors and print their readings, without starting the API or connecting to a publisher.
+
+    Args:
+        once (bool): take a single reading and exit, rather than reading until interrupted. (default: False)
+        as_json (bool): print one JSON document per reading instead of text. (default: False)
+        sensors (Optional[Sequence[str]]): names of the sensors to read; every enabled sensor if omitted. (default: None)
+        interval (Optional[float]): seconds between readings when not reading once; defaults to INTERVAL. (default: None)
+
+    Returns:
+        int: 0 if every sensor returned a reading (on the last round), 1 otherwise.
+    """
+    from orchidarium.lib.health import registry
+    from orchidarium.runtime import Runtime
+    from orchidarium.sensors import sensor_specs
+
+    # A one-off read must not overwrite the healthcheck files of a daemon running alongside it.
+    registry.persist_path = None
+
+    _stop = Event()
+    _ok = False
+
+    try:
+        with Runtime(publisher=None, sensors=sensor_specs(enabled=sensors or None)) as runtime:
+            for _signal in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(_signal, lambda *_: _stop.set())
+
+            while True:
+                readings = runtime.collect()
+                _ok = bool(readings) and all(fields is not None for fields in readings.values())
+                _print(readings, as_json)
+
+                if once or _stop.wait(interval if interval is not None else float(env['INTERVAL'])):
+                    break
+    except Exception as e:
+        log.error(e)
+        return 1
+
+    return 0 if _ok else 1
+
+
+def simulate(as_json: bool = False, **options: Any) -> int:
+    """
+    Load-test the pipeline with synthetic sensors and print a report.
+
+    Args:
+        as_json (bool): print the report as JSON instead of text. (default: False)
+        **options (Any): arguments to `orchidarium.simulate.simulate`.
+
+    Returns:
+        int: 0 if the simulation ran, 1 otherwise.
+    """
+    from orchidarium.simulate import simulate as _simulate
+
+    try:
+        report = _simulate(**options)
+    except Exception as e:
+        log.error(e)
+        return 1
+
+    if as_json:
+        print(json.dumps(report), flush=True)
+    else:
+        for key, value in report.items():
+            print(f'{key:28} {value:,.2f}' if isinstance(value, float) else f'{key:28} {value}', flush=True)
+
+    return 0
+
+
+def _print(readings: Dict[str, Optional[Dict[str, float]]], as_json: bool) -> None:
+    _time = datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+    if as_json:
+        print(
+            json.dumps({
+                'time': _time,
+                'sensors': {
+                    name: {'ok': fields is not None, 'fields': fields or {}} for name, fields in readings.items()
+                }
+            }),
+            flush=True
+        )
+        return
+
+    for name, fields in readings.items():
+        if fields is None:
+            print(f'{_time} {name}: no reading', flush=True)
+        else:
+            print(f'{_time} {name}: {" ".join(f"{k}={v:g}" for k, v in fields.items())}', flush=True)
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='orchidarium', description=__doc__.strip())
+    commands = parser.add_subparsers(dest='command', metavar='command')
+
+    commands.add_parser('daemon', help='sample every sensor on its period and publish to InfluxDB (default)')
+
+    _read = commands.add_parser('read', help='sample sensors and print their readings without publishing them')
+    _read.add_argument('--once', action='store_true', help='take a single reading and exit')
+    _read.add_argument('--json', action='store_true', dest='as_json', help='print readings as JSON, one document per line')
+    _read.add_argument('--sensor', action='append', dest='sensors', metavar='NAME', help='only read this sensor (repeatable)')
+    _read.add_argument('--interval', type=float, help='seconds between readings (default: INTERVAL)')
+
+    _simulate = commands.add_parser('simulate', help='load-test the scheduler, health registry and publisher with synthetic sensors')
+    _simulate.add_argument('--sensors', type=int, default=100, dest='count', help='number of synthetic sensors (default: 100)')
+    _simulate.add_argument('--rate', type=float, default=1.0, help='samples per second per sensor (default: 1)')
+    _simulate.add_argument('--duration', type=float, default=30.0, help='seconds to run for (default: 30)')
+    _simulate.add_argument('--distribution', choices=('gauss', 'uniform', 'walk', 'constant'), default='gauss', help='how values are drawn (default: gauss)')
+    _simulate.add_argument('--mean', type=float, default=50.0, help='mean of the values (default: 50)')
+    _simulate.add_argument('--spread', type=float, default=10.0, help='standard deviation, half-width or step size of the values (default: 10)')
+    _simulate.add_argument('--failure', type=float, default=0.0, help='probability that a collection fails (default: 0)')
+    _simulate.add_argument('--error', type=float, default=0.0, help='probability that a collection raises (default: 0)')
+    _simulate.add_argument('--stall', type=float, default=0.0, help='probability that a collection stalls (default: 0)')
+    _simulate.add_argument('--stall-seconds', type=float, default=1.0, help='how long a stalled collection takes (default: 1)')
+    _simulate.add_argument('--runtime', choices=('threads', 'asyncio'), default=env['RUNTIME'], help='runtime to load-test (default: RUNTIME)')
+    _simulate.add_argument('--influxdb', action='store_false', dest='local', help='write to INFLUXDB_HOST instead of a local stand-in')
+    _simulate.add_argument('--json', action='store_true', dest='as_json', help='print the report as JSON')
+
+    return parser
+
+
+def cli(argv: Optional[Sequence[str]] = None) -> None:
+    args = _parser().parse_args(argv)
+
+    if args.command == 'simulate':
+        logging.basicConfig(
+            stream=sys.stderr,
+            level=logging.DEBUG if env['DEBUG'] != '' else logging.WARNING,
+            format=_LOG_FORMAT
+        )
+        if env['DEBUG'] == '':
+            # Late ticks are expected under load and are counted in the report rather than logged one by one.
+            logging.getLogger('orchidarium.lib.scheduler').setLevel(logging.ERROR)
+        sys.exit(
+            simulate(**{k: v for k, v in vars(args).items() if k != 'command'})
+        )
+
+    if args.command == 'read':
+        # Keep stdout for the readings; only warnings and errors go to stderr unless debugging.
+        logging.basicConfig(
+            stream=sys.stderr,
+            level=logging.DEBUG if env['DEBUG'] != '' else logging.WARNING,
+            format=_LOG_FORMAT
+        )
+        sys.exit(
+            read(once=args.once, as_json=args.as_json, sensors=args.sensors, interval=args.interval)
+        )
+
+    logging.basicConfig(
+        stream=sys.stdout,
+        level=logging.DEBUG if env['DEBUG'] != '' else logging.INFO,
+        format=_LOG_FORMAT
+    )
     sys.exit(
         daemon()
     )
 
 
 if __name__ == '__main__':
-    cli()
\ No newline at end of file
+    cli()
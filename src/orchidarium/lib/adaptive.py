@@ -0,0 +1,124 @@
+"""
+Adaptive sampling: shorten a sensor's period while its readings are changing quickly, and lengthen it while they are
+flat.
+"""
+
+
+from __future__ import annotations
+
+import logging
+
+from time import monotonic
+from orchidarium import env
+from orchidarium.lib.deadband import thresholds
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Callable, Dict, Mapping, Optional
+
+
+__all__ = [
+    'AdaptivePeriod',
+    'adaptive'
+]
+
+log = logging.getLogger(__name__)
+
+
+class AdaptivePeriod:
+    """
+    Choose a sampling period between `minimum` and `maximum` from how fast a sensor's readings are changing.
+
+    Each field's rate of change is smoothed with an exponentially weighted moving average (EWMA), and the period is
+    chosen so that a field is expected to move by about its resolution between two samples. A sudden change shortens
+    the period on the very next sample; once readings settle, the period at most doubles per sample back up to
+    `maximum`.
+
+    Args:
+        resolutions (Mapping[str, float]): change, per field, worth one sample; fields without one are ignored.
+        minimum (float): shortest period in seconds.
+        maximum (float): longest period in seconds, and the period to start from.
+        alpha (float): EWMA weight of the newest rate of change, between 0 and 1. (default: 0.3)
+        clock (Callable[[], float]): monotonic clock, in seconds. (default: time.monotonic)
+
+    Raises:
+        ValueError: if the bounds or alpha are out of range.
+    """
+
+    def __init__(self,
+                 resolutions: Mapping[str, float],
+                 minimum: float,
+                 maximum: float,
+                 alpha: float = 0.3,
+                 clock: Callable[[], float] = monotonic) -> None:
+        if not 0 < minimum <= maximum:
+            raise ValueError(f'Adaptive sampling needs 0 < minimum <= maximum, received {minimum} and {maximum}')
+        if not 0 < alpha <= 1:
+            raise ValueError(f'Adaptive sampling needs 0 < alpha <= 1, received {alpha}')
+
+        self.resolutions = {name: resolution for name, resolution in resolutions.items() if resolution > 0}
+        self.minimum = minimum
+        self.maximum = maximum
+        self.alpha = alpha
+        self.period = maximum
+        self._clock = clock
+        self._last: Dict[str, float] = {}
+        self._last_time: Optional[float] = None
+        self._rates: Dict[str, float] = {}
+
+    def update(self, fields: Mapping[str, float]) -> float:
+        """
+        Fold a new reading into the rates of change and pick the period until the next sample.
+
+        Args:
+            fields (Mapping[str, float]): the reading, keyed by field name.
+
+        Returns:
+            float: the new period in seconds.
+        """
+        now = self._clock()
+        target = self.maximum
+
+        if self._last_time is not None and (elapsed := now - self._last_time) > 0:
+            for name, resolution in self.resolutions.items():
+                if (value := fields.get(name)) is None or (last := self._last.get(name)) is None:
+                    continue
+
+                rate = abs(value - last) / elapsed
+                _ewma = self._rates.get(name)
+                ewma = self._rates[name] = rate if _ewma is None else self.alpha * rate + (1 - self.alpha) * _ewma
+
+                # The raw rate reacts to a transient straight away; the EWMA only slows the way back down.
+                if (_rate := max(rate, ewma)) > 0:
+                    target = min(target, resolution / _rate)
+
+        self._last = {name: fields[name] for name in self.resolutions if name in fields}
+        self._last_time = now
+        self.period = max(self.minimum, min(target, self.period * 2, self.maximum))
+
+        return self.period
+
+
+def adaptive(kind: str, period: float) -> Optional[AdaptivePeriod]:
+    """
+    Create the adaptive sampling policy configured for a sensor, if ADAPTIVE is set.
+
+    Args:
+        kind (str): the sensor's kind, to select its resolutions.
+        period (float): the sensor's configured period, used as the longest period unless ADAPTIVE_MAX_PERIOD is set.
+
+    Returns:
+        Optional[AdaptivePeriod]: the policy, or None if adaptive sampling is disabled or no field of `kind` has a
+        resolution.
+    """
+    if not env['ADAPTIVE'] or not (resolutions := thresholds(env['ADAPTIVE'], kind)):
+        return None
+
+    maximum = float(env['ADAPTIVE_MAX_PERIOD']) if env['ADAPTIVE_MAX_PERIOD'] else period
+
+    return AdaptivePeriod(
+        resolutions,
+        minimum=min(float(env['ADAPTIVE_MIN_PERIOD']), maximum),
+        maximum=maximum,
+        alpha=float(env['ADAPTIVE_ALPHA'])
+    )
@@ -5,66 +5,166 @@ API for interacting with a USB device.
 
 from __future__ import annotations
 
+import errno
 import logging
+import re
+import socket
 
 from contextlib import AbstractContextManager
 from functools import partial
-from time import sleep
-from usb.core import USBTimeoutError, USBError
-from usb.util import claim_interface, release_interface
-from typing import TYPE_CHECKING
+from array import array
+from threading import Event, Lock, Thread
+from time import monotonic, sleep
+from orchidarium import env
+from orchidarium.lib.metrics import counter, histogram
+from orchidarium.lib.retry import CircuitBreaker, RetryPolicy
+from orchidarium.lib.ring import RingBuffer
+from usb.core import USBTimeoutError, USBError, find
+from usb.util import claim_interface, release_interface, dispose_resources
+from typing import TYPE_CHECKING, Generic, TypeVar
 
 if TYPE_CHECKING:
-    from array import array
     from typing import (
         Callable,
-        Any
+        Any,
+        Dict,
+        Iterable,
+        List,
+        Optional,
+        Tuple
     )
 
+    # (idVendor, idProduct, identity); the identity is None for "the first matching device".
+    DeviceKey = Tuple[int, int, Optional[str]]
+
 
 log = logging.getLogger(__name__)
 
 __all__ = [
+    'CircuitOpenError',
     'communicate',
+    'DeviceHandle',
+    'DeviceManager',
+    'DeviceReader',
+    'device_identity',
+    'devices',
     'InterfaceClaim',
-    'read'
+    'parse_uevent',
+    'read',
+    'RetryExhaustedError'
 ]
 
+T = TypeVar('T')
+
+# Netlink protocol on which the kernel broadcasts device (hotplug) uevents.
+_NETLINK_KOBJECT_UEVENT = 15
+
+# Identities end up in InfluxDB tags, sensor names and health file names, so keep them to a safe alphabet.
+_UNSAFE_IDENTITY = re.compile(r'[^A-Za-z0-9._-]+')
+
+DEFAULT_POLICY = RetryPolicy(
+    base_delay=float(env['USB_RETRY_BASE_DELAY']),
+    max_delay=float(env['USB_RETRY_MAX_DELAY']),
+    deadline=float(env['USB_RETRY_DEADLINE'])
+)
+
+_retries = counter('usb_retries_total', 'USB calls retried, by the reason the previous attempt failed', labels=('reason',))
+_failures = counter('usb_failures_total', 'USB calls given up on, by reason', labels=('reason',))
+_latency = histogram('usb_call_seconds', 'Duration of USB calls, including retries and backoff')
+_reads = counter('usb_reads_total', 'Packets read from USB devices')
 
-def communicate(f: Callable, delay: int = 1) -> array:
+
+class RetryExhaustedError(USBError):
+    """
+    A USB call kept failing until its retry policy gave up. The last underlying error is chained as `__cause__`.
     """
-    Retry api calls to the USB device until they go through.
+
+
+class CircuitOpenError(USBError):
+    """
+    A USB call was refused without being attempted because the device's circuit breaker is open.
+    """
+
+
+def _reason(e: USBError) -> str:
+    if isinstance(e, USBTimeoutError):
+        return 'timeout'
+    if e.errno == errno.EBUSY or 'Resource busy' in str(e):
+        return 'busy'
+    return 'io'
+
+
+def communicate(f: Callable[[], T], policy: RetryPolicy = DEFAULT_POLICY, breaker: Optional[CircuitBreaker] = None) -> T:
+    """
+    Call the USB device, retrying failures with jittered exponential backoff until the policy gives up.
+
+    A call that ends in failure (after its retries), for whatever reason, counts once against the breaker, if one is
+    given; while the breaker is open calls fail immediately instead of tying up the calling thread.
 
     Args:
-        f (Callable):
-        delay (int):
+        f (Callable[[], T]): the call to make.
+        policy (RetryPolicy): how often and for how long to retry. (default: DEFAULT_POLICY)
+        breaker (Optional[CircuitBreaker]): the circuit breaker of the device being called. (default: None)
+
+    Raises:
+        CircuitOpenError: if the breaker is open.
+        RetryExhaustedError: if the call still failed when the policy gave up.
+        USBError: if the device is gone (ENODEV), which no amount of retrying can fix.
 
     Returns:
-        array:
+        T: the result of the call.
     """
-    while True:
-        try:
-            return f()
-        except USBTimeoutError as e:
-            log.warning(f'Timeout, sleeping for {delay}s before retrying connection: {e}')
-            sleep(delay)
-        except USBError as e:
-            if 'Resource busy' in str(e):
-                log.warning(f'Resource busy, retrying')
-                sleep(delay)
-                continue
+    if breaker is not None and not breaker.allow():
+        _failures.inc('circuit-open')
+        raise CircuitOpenError(f'Circuit breaker {breaker.name!r} is open, not calling the device')
+
+    _start = monotonic()
+    _succeeded = False
+    attempt = 0
+
+    try:
+        while True:
+            attempt += 1
+            try:
+                result = f()
+            except USBError as e:
+                # The device is gone; retrying cannot succeed, so let the caller invalidate its handle.
+                if e.errno == errno.ENODEV:
+                    _failures.inc('no-device')
+                    raise
 
-            log.error(f'{e}')
+                reason = _reason(e)
+
+                if (delay := policy.next_delay(attempt, monotonic() - _start)) is None:
+                    log.error(f'USB call failed after {attempt} attempt(s) in {monotonic() - _start:.1f}s, giving up: {e}')
+                    _failures.inc(reason)
+                    raise RetryExhaustedError(f'Gave up after {attempt} attempt(s): {e}', errno=e.errno) from e
+
+                log.warning(f'USB call failed ({reason}), retrying in {delay:.2f}s: {e}')
+                _retries.inc(reason)
+                sleep(delay)
+            else:
+                _succeeded = True
+                if breaker is not None:
+                    breaker.record_success()
+                return result
+    finally:
+        # Whatever ended the call (including an error that is not a USBError, or an interrupt during backoff) counts
+        # against the breaker, so that a half-open probe always reports back.
+        if not _succeeded and breaker is not None:
+            breaker.record_failure()
+        _latency.observe(monotonic() - _start)
 
 
 class InterfaceClaim(AbstractContextManager):
     """
     Wrap setup and teardown while connecting to a USB interface in a context manager.
     """
-    def __init__(self, device: Any, interface: int = 0, detach: bool = False) -> None:
+    def __init__(self, device: Any, interface: int = 0, detach: bool = False, breaker: Optional[CircuitBreaker] = None) -> None:
         self.device = device
         self.interface = interface
         self.detach = detach
+        self.breaker = breaker
         # Indicate that a detachment of the kernel driver took place.
         self._detached: bool = False
 
@@ -77,7 +177,8 @@ class InterfaceClaim(AbstractContextManager):
                     partial(
                         self.device.detach_kernel_driver,
                         self.interface
-                    )
+                    ),
+                    breaker=self.breaker
                 )
                 self._detached = True
 
@@ -86,7 +187,8 @@ class InterfaceClaim(AbstractContextManager):
                 claim_interface,
                 self.device,
                 self.interface
-            )
+            ),
+            breaker=self.breaker
         )
 
         return self
@@ -111,13 +213,14 @@ class InterfaceClaim(AbstractContextManager):
             )
 
 
-def read(endpoint: Any, device: Any) -> bytes:
+def read(endpoint: Any, device: Any, breaker: Optional[CircuitBreaker] = None) -> bytes:
     """
     Read data from a device.
 
     Args:
         endpoint (Any): _description_
         device (Any): _description_
+        breaker (Optional[CircuitBreaker]): the device's circuit breaker. (default: None)
 
     Returns:
         bytes: _description_
@@ -127,9 +230,456 @@ def read(endpoint: Any, device: Any) -> bytes:
             device.read,
             endpoint.bEndpointAddress,
             endpoint.wMaxPacketSize,
-        )
+        ),
+        breaker=breaker
     ).tobytes()
+    _reads.inc()
 
     log.debug(f'Message read from bus: "{msg.decode()}"')
 
-    return msg
\ No newline at end of file
+    return msg
+
+
+class DeviceHandle:
+    """
+    An opened USB device with its interface claimed and its IN endpoint descriptor cached, kept open across reads.
+    """
+
+    def __init__(self, device: Any, interface: int = 0, detach: bool = False, breaker: Optional[CircuitBreaker] = None) -> None:
+        self.device = device
+        self.interface = interface
+        self.breaker = breaker
+        self._claim = InterfaceClaim(device, interface=interface, detach=detach, breaker=breaker)
+        # Look the endpoint up once; walking the descriptor tree on every read is wasted work.
+        self.endpoint = device[0][(interface, 0)][0]
+        self.valid: bool = False
+
+    def open(self) -> DeviceHandle:
+        try:
+            self._claim.__enter__()
+        except BaseException:
+            # The kernel driver may already have been detached, so hand the device back before giving up on it.
+            self._release()
+            raise
+        self.valid = True
+        return self
+
+    def read(self) -> bytes:
+        """
+        Read one packet from the cached IN endpoint.
+
+        Returns:
+            bytes: the raw packet.
+        """
+        return read(self.endpoint, self.device, breaker=self.breaker)
+
+    def close(self) -> None:
+        """
+        Release the interface and any resources pyusb holds for the device. Errors are logged, since the device may
+        already be gone.
+        """
+        if not self.valid:
+            return
+
+        self.valid = False
+        self._release()
+
+    def _release(self) -> None:
+        try:
+            self._claim.__exit__(None, None, None)
+        except USBError as e:
+            log.debug(f'Could not release interface {self.interface} cleanly: {e}')
+
+        try:
+            dispose_resources(self.device)
+        except USBError as e:
+            log.debug(f'Could not dispose of device resources cleanly: {e}')
+
+
+class DeviceManager:
+    """
+    Open and claim each USB device once and hand out the cached handle until it is invalidated by an I/O error or a
+    hotplug event.
+
+    Each device also gets a circuit breaker that outlives its handles, so a device that keeps failing is left alone for
+    a while instead of being re-enumerated and re-claimed on every sample.
+
+    Several identical devices (same idVendor and idProduct) are told apart by a stable identity; see
+    `device_identity()`. Methods that take an `identity` address the first matching device when it is None.
+
+    Args:
+        finder (Callable[..., Any]): device lookup with the signature of `usb.core.find`; replace it to use a fake backend. (default: usb.core.find)
+    """
+
+    def __init__(self, finder: Callable[..., Any] = find) -> None:
+        self._find = finder
+        self._lock = Lock()
+        self._handles: Dict[DeviceKey, DeviceHandle] = {}
+        # One lock per device, held while it is enumerated and claimed, which can take as long as the retry deadline.
+        self._opening: Dict[DeviceKey, Lock] = {}
+        self._breakers: Dict[DeviceKey, CircuitBreaker] = {}
+        self._monitor: Optional[Thread] = None
+
+    def enumerate(self, id_vendor: int, id_product: int) -> Dict[str, Any]:
+        """
+        Find every connected device with the given IDs.
+
+        Args:
+            id_vendor (int): USB vendor ID.
+            id_product (int): USB product ID.
+
+        Returns:
+            Dict[str, Any]: the devices by identity, in bus order.
+        """
+        found = list(self._find(find_all=True, idVendor=id_vendor, idProduct=id_product))
+        identities = [device_identity(device) for device in found]
+
+        # Cheap probes often share one serial number (or a blank one); only the port path tells those apart.
+        duplicates = {identity for identity in identities if identities.count(identity) > 1}
+        if duplicates:
+            log.debug(f'USB devices {id_vendor:04x}:{id_product:04x} share serial number(s) {", ".join(sorted(duplicates))}, identifying them by port')
+
+        return {
+            device_identity(device, by_serial=False) if identity in duplicates else identity: device
+            for identity, device in zip(identities, found)
+        }
+
+    def get(self,
+            id_vendor: int,
+            id_product: int,
+            identity: Optional[str] = None,
+            interface: int = 0,
+            detach: bool = True) -> Optional[DeviceHandle]:
+        """
+        Return an open handle for a device, enumerating the bus only if no valid handle is cached.
+
+        Args:
+            id_vendor (int): USB vendor ID.
+            id_product (int): USB product ID.
+            identity (Optional[str]): which of several identical devices to open; the first one found if None. (default: None)
+            interface (int): interface to claim. (default: 0)
+            detach (bool): detach the kernel driver before claiming the interface. (default: True)
+
+        Returns:
+            Optional[DeviceHandle]: the open handle, or None if the device is not connected or its breaker refuses calls.
+        """
+        key = (id_vendor, id_product, identity)
+        breaker = self.breaker(id_vendor, id_product, identity)
+        label = _label(key)
+
+        with self._lock:
+            if (handle := self._handles.get(key)) is not None and handle.valid:
+                return handle
+            opening = self._opening.setdefault(key, Lock())
+
+        # Only callers of this same device wait while it is opened; every other device's handle stays available.
+        with opening:
+            with self._lock:
+                if (handle := self._handles.get(key)) is not None and handle.valid:
+                    return handle
+
+            # Opening the device is itself a call through the breaker, so leave it closed while another caller's probe
+            # is still in flight, not only while the breaker is open.
+            if not breaker.available:
+                log.debug(f'Not opening USB device {label} while its circuit breaker is {breaker.state}')
+                return None
+
+            if identity is None:
+                device = self._find(idVendor=id_vendor, idProduct=id_product)
+            else:
+                device = self.enumerate(id_vendor, id_product).get(identity)
+            if device is None:
+                return None
+
+            log.info(f'Opening USB device {label}')
+            handle = DeviceHandle(device, interface=interface, detach=detach, breaker=breaker)
+
+            try:
+                handle.open()
+            except USBError as e:
+                log.error(f'Could not claim USB device {label}: {e}')
+                return None
+
+            with self._lock:
+                self._handles[key] = handle
+
+            return handle
+
+    def breaker(self, id_vendor: int, id_product: int, identity: Optional[str] = None) -> CircuitBreaker:
+        """
+        Return the circuit breaker guarding a device, creating it on first use.
+
+        Args:
+            id_vendor (int): USB vendor ID.
+            id_product (int): USB product ID.
+            identity (Optional[str]): the device's identity, if there are several identical ones. (default: None)
+
+        Returns:
+            CircuitBreaker: the device's breaker.
+        """
+        key = (id_vendor, id_product, identity)
+
+        with self._lock:
+            if (breaker := self._breakers.get(key)) is None:
+                breaker = self._breakers[key] = CircuitBreaker(
+                    failure_threshold=int(env['USB_BREAKER_THRESHOLD']),
+                    reset_timeout=float(env['USB_BREAKER_RESET']),
+                    name=f'usb-{_label(key)}'
+                )
+            return breaker
+
+    def invalidate(self, id_vendor: int, id_product: int, identity: Optional[str] = None, reason: str = '') -> None:
+        """
+        Close and forget cached handles, so the next `get()` re-enumerates the device.
+
+        Args:
+            id_vendor (int): USB vendor ID.
+            id_product (int): USB product ID.
+            identity (Optional[str]): the device to invalidate; every device with these IDs if None. (default: None)
+            reason (str): why the handle is being dropped, for the logs. (default: '')
+        """
+        with self._lock:
+            keys = [
+                key for key in self._handles
+                if key[:2] == (id_vendor, id_product) and (identity is None or key[2] == identity)
+            ]
+            handles = [(key, self._handles.pop(key)) for key in keys]
+
+        for key, handle in handles:
+            log.warning(f'Invalidating handle for USB device {_label(key)}{": " + reason if reason else ""}')
+            handle.close()
+
+    def close(self) -> None:
+        """
+        Release every cached handle.
+        """
+        with self._lock:
+            handles, self._handles = list(self._handles.values()), {}
+
+        for handle in handles:
+            handle.close()
+
+    def watch(self) -> bool:
+        """
+        Start invalidating handles on kernel hotplug (uevent) notifications, where netlink is available.
+
+        Returns:
+            bool: True if the monitor is running, False if hotplug events are unavailable.
+        """
+        if self._monitor is not None:
+            return True
+
+        try:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, _NETLINK_KOBJECT_UEVENT)
+            sock.bind((0, 1))
+        except (AttributeError, OSError) as e:
+            log.warning(f'USB hotplug events are unavailable, relying on I/O errors to detect unplugged devices: {e}')
+            return False
+
+        self._monitor = Thread(target=self._watch, args=(sock,), daemon=True, name='usb-hotplug')
+        self._monitor.start()
+
+        return True
+
+    def _watch(self, sock: socket.socket) -> None:
+        while True:
+            try:
+                event = parse_uevent(sock.recv(8192))
+            except OSError as e:
+                log.error(f'USB hotplug monitor stopped: {e}')
+                return
+
+            if event.get('SUBSYSTEM') != 'usb' or event.get('DEVTYPE') != 'usb_device':
+                continue
+
+            try:
+                # PRODUCT is "<vendor>/<product>/<bcdDevice>" in hex, without leading zeros.
+                id_vendor, id_product = (int(i, 16) for i in event['PRODUCT'].split('/')[:2])
+            except (KeyError, ValueError):
+                continue
+
+            log.debug(f'USB hotplug event "{event.get("ACTION")}" for {id_vendor:04x}:{id_product:04x}')
+
+            if event.get('ACTION') in ('remove', 'unbind', 'change'):
+                self.invalidate(id_vendor, id_product, reason=f'hotplug {event["ACTION"]}')
+            elif event.get('ACTION') == 'add':
+                # A freshly plugged device deserves a chance, whatever its predecessor did.
+                with self._lock:
+                    breakers = [breaker for key, breaker in self._breakers.items() if key[:2] == (id_vendor, id_product)]
+                for breaker in breakers:
+                    breaker.reset()
+
+
+def device_identity(device: Any, by_serial: bool = True) -> str:
+    """
+    Derive a stable identity for a device that tells it apart from identical devices on the same host.
+
+    The serial number follows the device from port to port, so it is preferred where the device reports one. Otherwise
+    the identity is the port path from the root hub in sysfs notation (e.g. "1-1.4"), which is stable for as long as
+    the device stays plugged into the same port.
+
+    Args:
+        device (Any): a pyusb device.
+        by_serial (bool): use the serial number if the device has one. (default: True)
+
+    Returns:
+        str: the identity, restricted to letters, digits, '.', '_' and '-'.
+    """
+    if by_serial:
+        try:
+            if serial := (device.serial_number or '').strip():
+                return _UNSAFE_IDENTITY.sub('_', serial)
+        except (USBError, ValueError, NotImplementedError) as e:
+            # The serial is a string descriptor read from the device, which needs access to it (and can fail).
+            log.debug(f'Could not read serial number of USB device on bus {device.bus}: {e}')
+
+    if ports := getattr(device, 'port_numbers', None):
+        return f'{device.bus}-{".".join(str(port) for port in ports)}'
+
+    return f'{device.bus}-a{device.address}'
+
+
+def _label(key: DeviceKey) -> str:
+    id_vendor, id_product, identity = key
+    return f'{id_vendor:04x}:{id_product:04x}' + (f'@{identity}' if identity else '')
+
+
+def parse_uevent(message: bytes) -> Dict[str, str]:
+    """
+    Parse a kernel uevent message into its key-value pairs.
+
+    Args:
+        message (bytes): "<action>@<devpath>" followed by NUL-separated KEY=VALUE pairs.
+
+    Returns:
+        Dict[str, str]: the parsed environment of the event.
+    """
+    event: Dict[str, str] = {}
+    for field in message.split(b'\0')[1:]:
+        key, sep, value = field.partition(b'=')
+        if sep:
+            event[key.decode('utf-8', errors='replace')] = value.decode('utf-8', errors='replace')
+    return event
+
+
+class DeviceReader(Generic[T]):
+    """
+    Continuously read a device on a dedicated thread and keep the newest parsed frames in a ring buffer.
+
+    Packets are read into one preallocated buffer and parsed straight from a view of it, so no bytes object is created
+    per packet. Readers get the freshest frame immediately instead of waiting for the device to produce one.
+
+    Args:
+        manager (DeviceManager): source of the (cached) device handle.
+        id_vendor (int): USB vendor ID.
+        id_product (int): USB product ID.
+        parse (Callable[[memoryview], Iterable[T]]): turns the bytes of one packet into the frames it completes, if any.
+        identity (Optional[str]): which of several identical devices to read; the first one found if None. (default: None)
+        capacity (int): number of frames kept in the ring buffer. (default: 64)
+        timeout (int): read timeout in milliseconds. (default: 1000)
+    """
+
+    def __init__(self,
+                 manager: DeviceManager,
+                 id_vendor: int,
+                 id_product: int,
+                 parse: Callable[[memoryview], Iterable[T]],
+                 identity: Optional[str] = None,
+                 capacity: int = 64,
+                 timeout: int = 1000) -> None:
+        self._manager = manager
+        self.id_vendor = id_vendor
+        self.id_product = id_product
+        self.identity = identity
+        self._parse = parse
+        self._timeout = timeout
+        # Frames are stored alongside the monotonic time they were read.
+        self.frames: RingBuffer[Tuple[float, T]] = RingBuffer(capacity)
+        self._stop = Event()
+        self._thread: Optional[Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+
+        self._stop.clear()
+        self._thread = Thread(target=self._run, daemon=True, name=f'usb-reader-{_label((self.id_vendor, self.id_product, self.identity))}')
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def latest(self, max_age: Optional[float] = None) -> Optional[T]:
+        """
+        Return the newest frame.
+
+        Args:
+            max_age (Optional[float]): ignore the frame if it was read more than this many seconds ago. (default: None)
+
+        Returns:
+            Optional[T]: the newest frame, or None if there is none (fresh enough).
+        """
+        if (entry := self.frames.latest()) is None:
+            return None
+
+        read_at, frame = entry
+
+        if max_age is not None and monotonic() - read_at > max_age:
+            return None
+
+        return frame
+
+    def _run(self) -> None:
+        buffer: Optional[array] = None
+        view: Optional[memoryview] = None
+        _backoff = 1.0
+        _failed = False
+
+        while not self._stop.is_set():
+            if (handle := self._manager.get(self.id_vendor, self.id_product, self.identity)) is None:
+                log.warning(f'USB device {_label((self.id_vendor, self.id_product, self.identity))} not found, retrying in {_backoff:.0f}s')
+                self._stop.wait(_backoff)
+                _backoff = min(_backoff * 2, 60.0)
+                continue
+
+            size = handle.endpoint.wMaxPacketSize
+            if buffer is None or len(buffer) != size:
+                buffer = array('B', bytes(size))
+                view = memoryview(buffer)
+
+            try:
+                n = handle.device.read(handle.endpoint.bEndpointAddress, buffer, self._timeout)
+            except USBTimeoutError:
+                continue
+            except USBError as e:
+                if 'Resource busy' in str(e):
+                    self._stop.wait(0.1)
+                    continue
+                if handle.breaker is not None:
+                    handle.breaker.record_failure()
+                _failed = True
+                self._manager.invalidate(self.id_vendor, self.id_product, self.identity, reason=str(e))
+                self._stop.wait(_backoff)
+                _backoff = min(_backoff * 2, 60.0)
+                continue
+
+            _backoff = 1.0
+            if _failed:
+                if handle.breaker is not None:
+                    handle.breaker.record_success()
+                _failed = False
+
+            _now = monotonic()
+            for frame in self._parse(view[:n]):  # type: ignore[index]
+                self.frames.push((_now, frame))
+
+
+# Shared by all sensors so that each physical device is opened and claimed exactly once per process.
+devices = DeviceManager()
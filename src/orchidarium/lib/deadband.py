@@ -0,0 +1,158 @@
+"""
+Change-based publishing: suppress readings that have not moved since the last one written, with a periodic heartbeat.
+"""
+
+
+from __future__ import annotations
+
+import logging
+
+from time import monotonic
+from orchidarium import env
+from orchidarium.lib.metrics import counter
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Callable, Dict, Mapping, Optional
+
+
+__all__ = [
+    'Deadband',
+    'deadband',
+    'thresholds'
+]
+
+log = logging.getLogger(__name__)
+
+_points = counter('deadband_points_total', 'Points offered to the deadband filter, by sensor and outcome', labels=('sensor', 'outcome'))
+
+
+class Deadband:
+    """
+    Decide whether a reading is worth publishing. A reading is published if any of its fields moved by at least that
+    field's threshold from the value last published, or if `heartbeat` seconds have passed since the last publication,
+    so that dashboards never show gaps; otherwise it is suppressed. Fields without a threshold always publish on change.
+
+    Args:
+        thresholds (Mapping[str, float]): minimum absolute change, per field, for a reading to be published.
+        heartbeat (float): seconds after which a reading is published regardless of change.
+        name (str): name of the sensor this filter belongs to, to label its counters. (default: '')
+        clock (Callable[[], float]): monotonic clock, in seconds. (default: time.monotonic)
+    """
+
+    def __init__(self,
+                 thresholds: Mapping[str, float],
+                 heartbeat: float,
+                 name: str = '',
+                 clock: Callable[[], float] = monotonic) -> None:
+        self.thresholds = dict(thresholds)
+        self.heartbeat = heartbeat
+        self.name = name
+        self._clock = clock
+        self._last: Dict[str, float] = {}
+        self._last_published: Optional[float] = None
+        # Statistics.
+        self.published: int = 0
+        self.suppressed: int = 0
+
+    @property
+    def ratio(self) -> float:
+        """
+        Fraction of the readings offered so far that were suppressed.
+        """
+        _total = self.published + self.suppressed
+        return self.suppressed / _total if _total else 0.0
+
+    def admit(self, fields: Mapping[str, float]) -> bool:
+        """
+        Check a reading against the last published one. Call `commit()` once it has actually been published.
+
+        Args:
+            fields (Mapping[str, float]): the reading, keyed by field name.
+
+        Returns:
+            bool: True if the reading should be published, False if it should be suppressed.
+        """
+        if self._last_published is None or self._clock() - self._last_published >= self.heartbeat:
+            _admit = True
+        else:
+            _admit = any(self._moved(name, value) for name, value in fields.items())
+
+        if _admit:
+            self.published += 1
+            _points.inc(self.name, 'published')
+        else:
+            self.suppressed += 1
+            _points.inc(self.name, 'suppressed')
+
+        return _admit
+
+    def _moved(self, name: str, value: float) -> bool:
+        if (last := self._last.get(name)) is None:
+            return True
+        return value != last and abs(value - last) >= self.thresholds.get(name, 0.0)
+
+    def commit(self, fields: Mapping[str, float]) -> None:
+        """
+        Record a reading as published, making it the reference for later ones and restarting the heartbeat.
+
+        Args:
+            fields (Mapping[str, float]): the published reading, keyed by field name.
+        """
+        self._last = dict(fields)
+        self._last_published = self._clock()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            'published': self.published,
+            'suppressed': self.suppressed,
+            'ratio': self.ratio
+        }
+
+
+def thresholds(value: str, kind: str) -> Dict[str, float]:
+    """
+    Parse per-field thresholds of the form "temperature=0.2,humidity=0.5,soil.moisture=1" for one kind of sensor. A
+    threshold qualified with a sensor kind ("soil.moisture") applies only to that kind and takes precedence.
+
+    Args:
+        value (str): the thresholds, as in DEADBAND or ADAPTIVE.
+        kind (str): the sensor kind to select thresholds for.
+
+    Raises:
+        ValueError: if an item is not of the form "<field>=<threshold>".
+
+    Returns:
+        Dict[str, float]: the thresholds that apply to `kind`, keyed by field name.
+    """
+    _generic: Dict[str, float] = {}
+    _specific: Dict[str, float] = {}
+    for item in value.split(','):
+        if not item.strip():
+            continue
+        key, sep, threshold = item.partition('=')
+        if not sep:
+            raise ValueError(f'Invalid threshold "{item}", expected "<field>=<threshold>"')
+        _kind, _, field = key.strip().rpartition('.')
+        if not _kind:
+            _generic[field] = float(threshold)
+        elif _kind.lower() == kind:
+            _specific[field] = float(threshold)
+    return {**_generic, **_specific}
+
+
+def deadband(kind: str, name: str) -> Optional[Deadband]:
+    """
+    Create the deadband filter configured for a sensor, if DEADBAND is set.
+
+    Args:
+        kind (str): the sensor's kind, to select its thresholds.
+        name (str): the sensor's name, to label its counters.
+
+    Returns:
+        Optional[Deadband]: the filter, or None if change-based publishing is disabled.
+    """
+    if not env['DEADBAND']:
+        return None
+
+    return Deadband(thresholds(env['DEADBAND'], kind), float(env['DEADBAND_HEARTBEAT']), name=name)
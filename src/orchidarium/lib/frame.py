@@ -0,0 +1,133 @@
+"""
+Incremental parser for the `KEY: value, KEY: value` text frames that our bus sensors emit.
+"""
+
+
+from __future__ import annotations
+
+import logging
+import re
+
+from collections import Counter
+from orchidarium.lib.metrics import counter
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import List, Sequence, Tuple
+
+
+__all__ = [
+    'FrameParser'
+]
+
+log = logging.getLogger(__name__)
+
+_errors = counter('frame_errors_total', 'Frames that could not be parsed, by reason', labels=('reason',))
+
+
+class FrameParser:
+    """
+    Reassemble and parse line-terminated frames such as `T: 72.5, RH: 61.2\\r\\n` from a stream of packets.
+
+    Bytes are appended to one reusable buffer and split on line feeds, so a frame split across packets is parsed once
+    its remainder arrives. NUL padding is ignored. Some firmware pads a packet's last frame with NULs instead of
+    terminating it, so a packet that ends in a complete frame (every field with a decimal value, as the probes print
+    them) is taken as a frame boundary too, rather than waiting for a line feed that never comes. Frames that do not
+    match the expected fields are counted in `errors` by reason rather than logged, since a noisy device can produce a
+    lot of them.
+
+    Args:
+        fields (Sequence[bytes]): the keys every frame must contain, in order (e.g. (b'T', b'RH')).
+        max_frame (int): discard a partial frame that grows beyond this many bytes without a terminator. (default: 256)
+    """
+
+    def __init__(self, fields: Sequence[bytes], max_frame: int = 256) -> None:
+        self.fields = tuple(fields)
+        self.max_frame = max_frame
+        self._buffer = bytearray()
+        # A value cut off mid-packet ('RH: 6', 'RH: 61.') does not match, so split frames still wait for their remainder.
+        self._complete = re.compile(rb'\s*,\s*'.join(re.escape(field) + rb'\s*:\s*[-+]?[0-9]+\.[0-9]+' for field in self.fields))
+        # Statistics.
+        self.frames: int = 0
+        self.errors: Counter = Counter()
+
+    def reset(self) -> None:
+        """
+        Forget any partial frame, e.g. before reading from a stream that was paused.
+        """
+        del self._buffer[:]
+
+    def feed(self, data: bytes | bytearray | memoryview) -> List[Tuple[float, ...]]:
+        """
+        Consume the bytes of one packet and return every frame it completes.
+
+        Args:
+            data (bytes | bytearray | memoryview): the packet.
+
+        Returns:
+            List[Tuple[float, ...]]: the values of each completed frame, in field order.
+        """
+        buffer = self._buffer
+        buffer += data
+
+        # Drop padding; most packets are a short frame followed by NULs.
+        if (nul := buffer.find(0)) != -1:
+            if buffer.count(0, nul) == len(buffer) - nul:
+                del buffer[nul:]
+            else:
+                buffer[:] = buffer.replace(b'\0', b'')
+
+        frames = []
+        if (end := buffer.rfind(b'\n')) != -1:
+            for line in buffer[:end].split(b'\n'):
+                if (frame := self._parse(line)) is not None:
+                    frames.append(frame)
+            del buffer[:end + 1]
+
+        if buffer and self._complete.fullmatch(buffer.strip()) is not None:
+            if (frame := self._parse(buffer)) is not None:
+                frames.append(frame)
+            del buffer[:]
+        elif len(buffer) > self.max_frame:
+            self._error('overflow')
+            del buffer[:]
+
+        return frames
+
+    def _error(self, reason: str) -> None:
+        self.errors[reason] += 1
+        _errors.inc(reason)
+
+    def _parse(self, line: bytearray) -> Tuple[float, ...] | None:
+        """
+        Parse one complete frame.
+
+        Args:
+            line (bytearray): the frame, without its line feed.
+
+        Returns:
+            Tuple[float, ...] | None: the values in field order, or None if the frame is malformed.
+        """
+        parts = line.split(b',')
+
+        if len(parts) != len(self.fields):
+            # Blank lines between CR and LF are not errors.
+            if line.strip():
+                self._error('malformed')
+            return None
+
+        values = []
+        for field, part in zip(self.fields, parts):
+            key, sep, value = part.partition(b':')
+            if not sep or key.strip() != field:
+                self._error('malformed')
+                return None
+            try:
+                values.append(float(value))
+            except ValueError:
+                self._error('value')
+                return None
+
+        self.frames += 1
+
+        return tuple(values)
@@ -0,0 +1,236 @@
+"""
+Thread-safe, in-memory registry of sensor health that the healthcheck endpoints answer from.
+"""
+
+
+from __future__ import annotations
+
+import logging
+import os
+
+from pathlib import Path
+from threading import Event, Lock, Thread
+from time import monotonic, sleep, time
+from orchidarium.lib.json import write_json
+from orchidarium.lib.time import timed
+from orchidarium import env
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Dict, Optional, Set
+
+
+__all__ = [
+    'HealthRegistry',
+    'SensorHealth',
+    'registry'
+]
+
+log = logging.getLogger(__name__)
+
+
+class SensorHealth:
+    """
+    The most recent collection and publication state of a single sensor.
+    """
+
+    __slots__ = ('name', 'period', 'readout', 'publish', 'last_readout', 'last_publish', '_last_readout_monotonic')
+
+    def __init__(self, name: str, period: float) -> None:
+        self.name = name
+        self.period = period
+        self.readout: bool = False
+        self.publish: bool = False
+        # Wall-clock times of the last successful collection and publication, for humans.
+        self.last_readout: Optional[float] = None
+        self.last_publish: Optional[float] = None
+        # Monotonic time of the last successful collection, for staleness checks.
+        self._last_readout_monotonic: Optional[float] = None
+
+    def stale_after(self, factor: float) -> float:
+        """
+        Monotonic time after which this sensor's last successful readout is considered stale.
+
+        Args:
+            factor (float): number of sampling periods a readout stays fresh for.
+
+        Returns:
+            float: a monotonic timestamp; -inf if the sensor has never read successfully.
+        """
+        if self._last_readout_monotonic is None:
+            return float('-inf')
+        return self._last_readout_monotonic + factor * self.period
+
+    def to_dict(self) -> Dict:
+        return {
+            'healthcheck': {
+                'publish': self.publish,
+                'readout': self.readout,
+                'last_publish': self.last_publish,
+                'last_readout': self.last_readout,
+                'period': self.period
+            }
+        }
+
+
+class HealthRegistry:
+    """
+    Collect per-sensor health in memory and answer health and readiness in constant time.
+
+    Aggregates are recomputed whenever a sensor reports in (on the sensor's thread), so the probe endpoints only compare
+    a couple of cached values against the clock. A sensor whose last successful readout is older than
+    `staleness_factor` sampling periods is reported unhealthy even if that readout succeeded.
+
+    Args:
+        staleness_factor (float): sampling periods after which a readout is considered stale. (default: 3.0)
+        persist_path (Optional[Path]): directory to mirror sensor health to as JSON files; disabled if None. (default: None)
+        persist_interval (float): minimum seconds between writes to disk; updates in between are coalesced. (default: 5.0)
+    """
+
+    def __init__(self, staleness_factor: float = 3.0, persist_path: Optional[Path] = None, persist_interval: float = 5.0) -> None:
+        self.staleness_factor = staleness_factor
+        self.persist_path = persist_path
+        self.persist_interval = persist_interval
+        self._lock = Lock()
+        self._sensors: Dict[str, SensorHealth] = {}
+        self._dirty: Set[str] = set()
+        self._wakeup = Event()
+        self._persister: Optional[Thread] = None
+
+        # Cached aggregates.
+        self._unhealthy: int = 0
+        self._unready: int = 0
+        self._stale_after: float = float('-inf')
+
+    def register(self, name: str, period: float) -> SensorHealth:
+        """
+        Start tracking a sensor. Registering the same name again resets its state.
+
+        Args:
+            name (str): unique sensor name.
+            period (float): the sensor's sampling period in seconds.
+
+        Returns:
+            SensorHealth: the sensor's health record.
+        """
+        with self._lock:
+            self._sensors[name] = health = SensorHealth(name, period)
+            self._recompute()
+            self._mark(name)
+        return health
+
+    def unregister(self, name: str) -> None:
+        with self._lock:
+            self._sensors.pop(name, None)
+            self._recompute()
+
+    def update(self, name: str, readout: Optional[bool] = None, publish: Optional[bool] = None, period: Optional[float] = None) -> None:
+        """
+        Record the outcome of a sensor's latest collection and/or publication.
+
+        Args:
+            name (str): the registered sensor name.
+            readout (Optional[bool]): whether the latest collection succeeded. (default: None)
+            publish (Optional[bool]): whether the latest publication succeeded. (default: None)
+            period (Optional[float]): the sensor's current sampling period, if it has changed. (default: None)
+        """
+        with self._lock:
+            if (health := self._sensors.get(name)) is None:
+                log.warning(f'Received a health update for unregistered sensor "{name}"')
+                return
+
+            if readout is not None:
+                health.readout = readout
+                if readout:
+                    health.last_readout = time()
+                    health._last_readout_monotonic = monotonic()
+            if publish is not None:
+                health.publish = publish
+                if publish:
+                    health.last_publish = time()
+            if period is not None:
+                health.period = period
+
+            self._recompute()
+            self._mark(name)
+
+    def healthy(self) -> bool:
+        """
+        Whether every registered sensor's latest readout succeeded and is fresh.
+
+        Returns:
+            bool: True if healthy, False otherwise (including when no sensors are registered).
+        """
+        return bool(self._sensors) and self._unhealthy == 0 and monotonic() < self._stale_after
+
+    def ready(self) -> bool:
+        """
+        Whether every registered sensor has either collected or published successfully.
+
+        Returns:
+            bool: True if ready, False otherwise (including when no sensors are registered).
+        """
+        return bool(self._sensors) and self._unready == 0
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """
+        Return a copy of every sensor's health.
+
+        Returns:
+            Dict[str, Dict]: a mapping of sensor names to their health.
+        """
+        with self._lock:
+            return {name: health.to_dict() for name, health in self._sensors.items()}
+
+    def _recompute(self) -> None:
+        self._unhealthy = sum(not health.readout for health in self._sensors.values())
+        self._unready = sum(not (health.readout or health.publish) for health in self._sensors.values())
+        self._stale_after = min(
+            (health.stale_after(self.staleness_factor) for health in self._sensors.values()),
+            default=float('-inf')
+        )
+
+    def _mark(self, name: str) -> None:
+        if self.persist_path is None:
+            return
+
+        self._dirty.add(name)
+        self._wakeup.set()
+
+        if self._persister is None:
+            self._persister = Thread(target=self._persist_loop, daemon=True, name='health-persister')
+            self._persister.start()
+
+    def _persist_loop(self) -> None:
+        while True:
+            self._wakeup.wait()
+            # Let further updates accumulate so a burst of state changes results in one write per sensor.
+            self._wakeup.clear()
+            sleep(self.persist_interval)
+            self.persist()
+
+    @timed('health_persist_seconds', 'Time spent writing changed healthcheck files')
+    def persist(self) -> None:
+        """
+        Atomically write the health of every sensor that changed since the last call to disk.
+        """
+        if self.persist_path is None:
+            return
+
+        with self._lock:
+            records = {name: self._sensors[name].to_dict() for name in self._dirty if name in self._sensors}
+            self._dirty.clear()
+
+        for name, record in records.items():
+            write_json(
+                data=record,
+                path=Path(os.path.join(self.persist_path, f'{name}_healthcheck.json')),
+                atomic=True
+            )
+
+
+registry = HealthRegistry(
+    staleness_factor=float(env['HEALTHCHECK_STALENESS_FACTOR']),
+    persist_path=Path(env['HEALTHCHECK_CACHE_PATH']) if env['HEALTHCHECK_CACHE_PATH'] else None,
+    persist_interval=float(env['HEALTHCHECK_PERSIST_INTERVAL'])
+)
@@ -0,0 +1,194 @@
+"""
+Minimal asyncio HTTP/1.1 client with a persistent connection, for publishers running on the event loop.
+"""
+
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import ssl
+
+from http import HTTPStatus
+from urllib.parse import urlsplit
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Dict, Mapping, Optional, Tuple
+
+
+__all__ = [
+    'AsyncHTTPConnection',
+    'HTTPResponse'
+]
+
+log = logging.getLogger(__name__)
+
+# Guard against servers that send an unbounded number of headers.
+_MAX_HEADERS = 100
+
+
+class HTTPResponse:
+    """
+    A fully read response.
+    """
+
+    __slots__ = ('status', 'reason', 'headers', 'body')
+
+    def __init__(self, status: int, reason: str, headers: Dict[str, str], body: bytes) -> None:
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+
+class AsyncHTTPConnection:
+    """
+    Send requests one at a time over a single keep-alive connection to one origin, reconnecting when the server closes
+    it. Requests from several tasks are serialized.
+
+    Args:
+        url (str): origin to connect to, e.g. 'http://influxdb:8086'. A bare 'host:port' is taken as http.
+        timeout (float): seconds to wait for the connection, and for each response. (default: 10.0)
+    """
+
+    def __init__(self, url: str, timeout: float = 10.0) -> None:
+        parts = urlsplit(url if '://' in url else f'http://{url}')
+        self.host = parts.hostname or 'localhost'
+        self.tls = parts.scheme == 'https'
+        self.port = parts.port or (443 if self.tls else 80)
+        self.timeout = timeout
+        self._lock = asyncio.Lock()
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    @property
+    def origin(self) -> str:
+        return f'{"https" if self.tls else "http"}://{self.host}:{self.port}'
+
+    async def request(self,
+                      method: str,
+                      target: str,
+                      body: bytes = b'',
+                      headers: Optional[Mapping[str, str]] = None) -> HTTPResponse:
+        """
+        Send one request and read its response. A request on a connection the server had already closed is retried
+        once on a fresh connection.
+
+        Args:
+            method (str): e.g. 'GET' or 'POST'.
+            target (str): path and query string.
+            body (bytes): request body. (default: b'')
+            headers (Optional[Mapping[str, str]]): additional request headers. (default: None)
+
+        Raises:
+            OSError: if the request could not be sent or its response could not be read.
+            ConnectionResetError: if the server closed the connection mid-response.
+            ConnectionError: if the response was malformed.
+            asyncio.TimeoutError: if the server did not respond in time.
+
+        Returns:
+            HTTPResponse: the response.
+        """
+        head = (
+            f'{method} {target} HTTP/1.1\r\n'
+            f'Host: {self.host}:{self.port}\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            + ''.join(f'{name}: {value}\r\n' for name, value in (headers or {}).items())
+            + '\r\n'
+        ).encode('latin-1')
+
+        async with self._lock:
+            # Only a request on a reused connection is retried, and only once.
+            _retry = self._writer is not None
+            while True:
+                try:
+                    reader, writer = await self._connect()
+                    writer.write(head + body)
+                    await writer.drain()
+                    response = await asyncio.wait_for(self._read(reader, head_only=method == 'HEAD'), self.timeout)
+                except OSError:
+                    await self.close()
+                    if _retry:
+                        # The server closed an idle keep-alive connection; that is not a failure of this request.
+                        _retry = False
+                        continue
+                    raise
+                except asyncio.IncompleteReadError as e:
+                    await self.close()
+                    if _retry:
+                        _retry = False
+                        continue
+                    raise ConnectionResetError(f'Connection to {self.origin} closed mid-response') from e
+                except asyncio.TimeoutError:
+                    await self.close()
+                    raise
+                except (ValueError, asyncio.LimitOverrunError) as e:
+                    # A bad status line, length or chunk size, or a line too long to buffer; the rest of the stream
+                    # cannot be trusted, so drop the connection.
+                    await self.close()
+                    raise ConnectionError(f'Malformed response from {self.origin}: {e}') from e
+
+                if response.headers.get('connection', '').lower() == 'close':
+                    await self.close()
+                return response
+
+    async def _connect(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        reader, writer = self._reader, self._writer
+        if reader is not None and writer is not None and not writer.is_closing():
+            return reader, writer
+
+        connection = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=ssl.create_default_context() if self.tls else None),
+            self.timeout
+        )
+        self._reader, self._writer = connection
+        return connection
+
+    @staticmethod
+    async def _read(reader: asyncio.StreamReader, head_only: bool = False) -> HTTPResponse:
+        _, _, status_line = (await reader.readuntil(b'\r\n')).decode('latin-1').rstrip('\r\n').partition(' ')
+        status, _, reason = status_line.partition(' ')
+        headers: Dict[str, str] = {}
+        for _ in range(_MAX_HEADERS):
+            line = await reader.readuntil(b'\r\n')
+            if line == b'\r\n':
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        _status = int(status)
+        if head_only or _status in (HTTPStatus.NO_CONTENT, HTTPStatus.NOT_MODIFIED) or 100 <= _status < 200:
+            body = b''
+        elif headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while (size := int((await reader.readuntil(b'\r\n')).split(b';', 1)[0], 16)) > 0:
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            # Skip trailers.
+            while await reader.readuntil(b'\r\n') != b'\r\n':
+                pass
+            body = b''.join(chunks)
+        elif 'content-length' in headers:
+            body = await reader.readexactly(int(headers['content-length']))
+        else:
+            body = await reader.read()
+            headers['connection'] = 'close'
+
+        return HTTPResponse(_status, reason, headers, body)
+
+    async def close(self) -> None:
+        """
+        Close the connection, if it is open. The next request opens a new one.
+        """
+        writer, self._reader, self._writer = self._writer, None, None
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import json
 import logging
+import os
 
 from pathlib import Path
 from typing import TYPE_CHECKING
@@ -19,22 +20,27 @@ __all__ = [
 log = logging.getLogger(__name__)
 
 
-def write_json(data: dict, path: Path | str) -> bool:
+def write_json(data: dict, path: Path | str, atomic: bool = False) -> bool:
     """
     Write a dictionary to a JSON file.
 
     Args:
         data (dict): the dictionary to write.
         path (Path | str): the path to write the file to.
+        atomic (bool): write to a temporary file and rename it over the target, so readers never see a partial file. (default: False)
 
     Returns:
         bool: True if successful, False otherwise.
     """
     try:
-        with open(path, 'w', encoding='utf-8') as f:
+        _target = Path(path)
+        _path = _target.with_name(f'.{_target.name}.tmp') if atomic else _target
+        with open(_path, 'w', encoding='utf-8') as f:
             log.debug(f'Writing JSON to file: {path}')
             json.dump(data, f)
-            return True
+        if atomic:
+            os.replace(_path, _target)
+        return True
     except (FileNotFoundError, PermissionError) as msg:
         log.error(f'Failed to write JSON file, received: {msg}')
     except OSError as msg:
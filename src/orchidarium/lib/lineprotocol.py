@@ -0,0 +1,130 @@
+"""
+Schema-bound InfluxDB line-protocol encoder for points whose measurement, tags and field names never change.
+
+Escaping the measurement and tags and formatting the field keys is done once per schema, so that encoding a point only
+formats its values and timestamp. The output matches what `influxdb_client.Point.to_line_protocol()` produces for the
+same point, apart from field order, which follows the schema.
+"""
+
+
+from __future__ import annotations
+
+import math
+
+from time import time_ns
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Mapping, Optional, Sequence, Tuple
+
+
+__all__ = [
+    'Schema'
+]
+
+# The same escapes as the InfluxDB client's.
+_ESCAPE_MEASUREMENT = str.maketrans({
+    ',': r'\,',
+    ' ': r'\ ',
+    '\n': r'\n',
+    '\t': r'\t',
+    '\r': r'\r'
+})
+
+_ESCAPE_KEY = str.maketrans({
+    ',': r'\,',
+    '=': r'\=',
+    ' ': r'\ ',
+    '\n': r'\n',
+    '\t': r'\t',
+    '\r': r'\r'
+})
+
+
+def _escape_tag_value(value: str) -> str:
+    escaped = value.translate(_ESCAPE_KEY)
+    # A trailing backslash would escape the separator that follows it.
+    return escaped + ' ' if escaped.endswith('\\') else escaped
+
+
+def _value(value: float | int) -> str:
+    """
+    Format a field value: integers with the 'i' suffix, floats without a redundant trailing '.0'.
+
+    Args:
+        value (float | int): the field value.
+
+    Returns:
+        str: the value as it appears in line protocol.
+
+    Raises:
+        ValueError: if the value is neither an int nor a float.
+    """
+    if type(value) is float:
+        s = repr(value)
+        return s[:-2] if s.endswith('.0') else s
+    if isinstance(value, bool):
+        raise ValueError(f'Unsupported field value type "bool"')
+    if isinstance(value, int):
+        return f'{int(value)}i'
+    if isinstance(value, float):
+        # Subclasses such as numpy.float64 do not repr as a plain number.
+        return _value(float(value))
+    raise ValueError(f'Unsupported field value type "{type(value).__name__}"')
+
+
+class Schema:
+    """
+    The precompiled layout of one measurement with fixed tags and a fixed sequence of numeric fields.
+
+    Args:
+        measurement (str): the measurement name.
+        tags (Mapping[str, str]): tag keys and values; empty keys or values are left out, like the client does.
+        fields (Sequence[str]): field names, in the order their values are passed to `encode()`.
+
+    Raises:
+        ValueError: if there are no fields.
+    """
+
+    __slots__ = ('measurement', 'tags', 'fields', '_prefix', '_keys')
+
+    def __init__(self, measurement: str, tags: Mapping[str, str], fields: Sequence[str]) -> None:
+        if not fields:
+            raise ValueError(f'Schema for measurement "{measurement}" needs at least one field')
+
+        self.measurement = measurement
+        self.tags = dict(tags)
+        self.fields: Tuple[str, ...] = tuple(fields)
+        self._prefix = measurement.translate(_ESCAPE_MEASUREMENT) + ''.join(
+            f',{key.translate(_ESCAPE_KEY)}={_escape_tag_value(value)}'
+            for key, value in sorted(self.tags.items())
+            if key and value
+        ) + ' '
+        self._keys: Tuple[str, ...] = tuple(f'{field.translate(_ESCAPE_KEY)}=' for field in self.fields)
+
+    def encode(self, values: Sequence[float | int], timestamp: Optional[int] = None) -> bytes:
+        """
+        Encode one point.
+
+        Args:
+            values (Sequence[float | int]): one value per field, in the schema's field order. Non-finite floats are left
+                out, like the client does.
+            timestamp (Optional[int]): nanoseconds since the epoch; now if omitted. (default: None)
+
+        Raises:
+            ValueError: if the number of values does not match the schema, or no value is finite.
+
+        Returns:
+            bytes: the line-protocol record, without a trailing newline.
+        """
+        if len(values) != len(self._keys):
+            raise ValueError(f'Schema for measurement "{self.measurement}" has {len(self._keys)} field(s), received {len(values)} value(s)')
+
+        fields = ','.join([
+            key + _value(value) for key, value in zip(self._keys, values)
+            if not isinstance(value, float) or math.isfinite(value)
+        ])
+        if not fields:
+            raise ValueError(f'Point of measurement "{self.measurement}" has no finite field values')
+
+        return f'{self._prefix}{fields} {time_ns() if timestamp is None else timestamp}'.encode('utf-8')
@@ -0,0 +1,551 @@
+"""
+Lightweight in-process metrics for timing the daemon's hot paths, exposed in the Prometheus text format.
+
+Counters and histograms accumulate per thread without locking and are merged when read, so they are cheap enough to
+leave on in production.
+"""
+
+
+from __future__ import annotations
+
+import logging
+
+import re
+
+from bisect import bisect_left
+from contextlib import contextmanager
+from math import inf, isnan
+from threading import Lock, local
+from time import perf_counter
+from weakref import finalize
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple, Type, TypeVar, Union
+
+    Metric = Union['Summary', 'Counter', 'Gauge', 'Histogram']
+    M = TypeVar('M', 'Summary', 'Counter', 'Gauge', 'Histogram')
+
+
+__all__ = [
+    'CONTENT_TYPE',
+    'Counter',
+    'Gauge',
+    'Histogram',
+    'Summary',
+    'counter',
+    'exposition',
+    'gauge',
+    'histogram',
+    'summary',
+    'snapshot'
+]
+
+# Default histogram buckets, in seconds, spanning sub-millisecond USB calls to multi-second network writes.
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Buckets for counts of things per operation, such as records per batch or reads per sample.
+COUNT_BUCKETS: Tuple[float, ...] = (1, 2, 3, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Content type of the Prometheus text exposition format produced by `exposition()`.
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_TYPES = {
+    'Summary': 'summary',
+    'Counter': 'counter',
+    'Gauge': 'gauge',
+    'Histogram': 'histogram'
+}
+
+# Sensor names and device identities end up in metric names and labels (e.g. "humidity@1-1.2").
+_UNSAFE_NAME = re.compile(r'[^a-zA-Z0-9_:]')
+
+log = logging.getLogger(__name__)
+
+
+def _metric_name(name: str) -> str:
+    name = _UNSAFE_NAME.sub('_', name)
+    return f'_{name}' if name[:1].isdigit() else name
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _help(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('\n', '\\n')
+
+
+def _number(value: float) -> str:
+    if value == inf:
+        return '+Inf'
+    if value == -inf:
+        return '-Inf'
+    if isnan(value):
+        return 'NaN'
+    return repr(float(value)) if not isinstance(value, int) else str(value)
+
+
+def _label_set(names: Tuple[str, ...], values: Tuple[str, ...], **extra: str) -> str:
+    pairs = [*zip(names, values), *extra.items()]
+    return '{' + ','.join(f'{name}="{_escape(str(value))}"' for name, value in pairs) + '}' if pairs else ''
+
+
+class Summary:
+    """
+    Track the count, sum, minimum, maximum and last value of a series of observations.
+    """
+
+    def __init__(self, name: str, description: str = '') -> None:
+        self.name = name
+        self.description = description
+        self._lock = Lock()
+        self._count: int = 0
+        self._sum: float = 0.0
+        self._min: float = float('inf')
+        self._max: float = float('-inf')
+        self._last: float = 0.0
+
+    def observe(self, value: float) -> None:
+        """
+        Record a single observation.
+
+        Args:
+            value (float): the observed value (e.g. a duration in seconds).
+        """
+        with self._lock:
+            self._count += 1
+            self._sum += value
+            self._last = value
+            if value < self._min:
+                self._min = value
+            if value > self._max:
+                self._max = value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """
+        Observe the wall-clock duration of the wrapped block in seconds.
+
+        Yields:
+            None: nothing; the duration is recorded on exit.
+        """
+        _start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(perf_counter() - _start)
+
+    def snapshot(self) -> Dict[str, float]:
+        """
+        Return a consistent copy of this summary's current state.
+
+        Returns:
+            Dict[str, float]: count, sum, mean, min, max and last observed values.
+        """
+        with self._lock:
+            return {
+                'count': self._count,
+                'sum': self._sum,
+                'mean': self._sum / self._count if self._count else 0.0,
+                'min': self._min if self._count else 0.0,
+                'max': self._max if self._count else 0.0,
+                'last': self._last
+            }
+
+    def expose(self) -> List[str]:
+        _snapshot = self.snapshot()
+        name = _metric_name(self.name)
+        return [
+            f'{name}_sum {_number(_snapshot["sum"])}',
+            f'{name}_count {_snapshot["count"]}'
+        ]
+
+
+class _Owner:
+    """
+    Kept in a thread's local storage next to its shard, so that its finalizer runs when the thread exits.
+    """
+
+    __slots__ = ('__weakref__',)
+
+
+class _Sharded:
+    """
+    Base for metrics updated from many threads: each thread accumulates into its own shard without taking a lock, and
+    the shards are only merged when the metric is read (i.e. at scrape time). When a thread exits its shard is folded
+    into a base shard, so that short-lived threads (e.g. recycled pool workers) do not leave a shard behind each.
+    """
+
+    def __init__(self) -> None:
+        self._local = local()
+        self._shards_lock = Lock()
+        self._base: Dict[Tuple[str, ...], Any] = {}
+        # Live threads' shards, by id(); each is kept alive here until it is folded.
+        self._shards: Dict[int, Dict[Tuple[str, ...], Any]] = {}
+
+    def _shard(self) -> Dict[Tuple[str, ...], Any]:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            # Thread-local storage is cleared when its thread exits, which collects the owner and fires the finalizer.
+            self._local.owner = _Owner()
+            _finalizer = finalize(self._local.owner, self._fold, shard)
+            # Nothing needs folding at interpreter exit. `atexit` is a documented property missing from the stubs' slots.
+            setattr(_finalizer, 'atexit', False)
+            with self._shards_lock:
+                self._shards[id(shard)] = shard
+            return shard
+
+    def _fold(self, shard: Dict[Tuple[str, ...], Any]) -> None:
+        # Its thread is gone, so nothing writes to the shard any more.
+        with self._shards_lock:
+            self._merge(self._base, shard)
+            del self._shards[id(shard)]
+
+    def _merge(self, into: Dict[Tuple[str, ...], Any], shard: Dict[Tuple[str, ...], Any]) -> None:
+        raise NotImplementedError
+
+    def _copies(self) -> List[Dict[Tuple[str, ...], Any]]:
+        # Copying a dict (or list) of numbers is atomic under the GIL, so the owning thread never has to wait for us.
+        with self._shards_lock:
+            return [self._base.copy(), *(shard.copy() for shard in self._shards.values())]
+
+    def _merged(self) -> Dict[Tuple[str, ...], Any]:
+        merged: Dict[Tuple[str, ...], Any] = {}
+        for shard in self._copies():
+            self._merge(merged, shard)
+        return merged
+
+
+class Counter(_Sharded):
+    """
+    A monotonically increasing count, optionally broken down by the values of a fixed set of labels.
+    """
+
+    def __init__(self, name: str, description: str = '', labels: Sequence[str] = ()) -> None:
+        super().__init__()
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+
+    def inc(self, *values: str, amount: float = 1.0) -> None:
+        """
+        Increment the count for a combination of label values.
+
+        Args:
+            *values (str): one value per label, in the order the labels were declared.
+            amount (float): how much to increment by. (default: 1.0)
+        """
+        shard = self._shard()
+        shard[values] = shard.get(values, 0.0) + amount
+
+    def value(self, *values: str) -> float:
+        """
+        Return the count for a combination of label values.
+        """
+        return sum(shard.get(values, 0.0) for shard in self._copies())
+
+    def series(self) -> Dict[Tuple[str, ...], float]:
+        """
+        Return every count, merged across threads and keyed by its label values.
+        """
+        return self._merged()
+
+    def _merge(self, into: Dict[Tuple[str, ...], float], shard: Dict[Tuple[str, ...], float]) -> None:
+        for key, value in shard.items():
+            into[key] = into.get(key, 0.0) + value
+
+    def snapshot(self) -> Dict[str, float]:
+        """
+        Return a copy of every count, keyed by its comma-joined label values ('total' for an unlabelled counter).
+
+        Returns:
+            Dict[str, float]: label values -> count.
+        """
+        return {','.join(key) or 'total': value for key, value in self.series().items()}
+
+    def expose(self) -> List[str]:
+        return [
+            f'{_metric_name(self.name)}{_label_set(self.labels, key)} {_number(value)}'
+            for key, value in sorted(self.series().items())
+        ]
+
+
+class Gauge:
+    """
+    A value that goes up and down, either set directly or read from a callback when the metric is collected.
+    """
+
+    def __init__(self, name: str, description: str = '', labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], Union[float, Callable[[], float]]] = {}
+
+    def set(self, value: float, *values: str) -> None:
+        """
+        Set the value for a combination of label values.
+
+        Args:
+            value (float): the new value.
+            *values (str): one value per label, in the order the labels were declared.
+        """
+        self._values[values] = value
+
+    def set_function(self, function: Callable[[], float], *values: str) -> None:
+        """
+        Read the value for a combination of label values from a callback whenever the gauge is collected, e.g. a queue's
+        length, so that nothing needs to be updated on the hot path.
+
+        Args:
+            function (Callable[[], float]): returns the current value.
+            *values (str): one value per label, in the order the labels were declared.
+        """
+        self._values[values] = function
+
+    def remove(self, *values: str) -> None:
+        """
+        Stop reporting a combination of label values.
+        """
+        self._values.pop(values, None)
+
+    def series(self) -> Dict[Tuple[str, ...], float]:
+        """
+        Return every value, keyed by its label values. A callback that raises is left out.
+        """
+        result: Dict[Tuple[str, ...], float] = {}
+        for key, value in list(self._values.items()):
+            try:
+                result[key] = float(value() if callable(value) else value)
+            except Exception as e:
+                log.debug(f'Gauge "{self.name}" callback failed: {e}')
+        return result
+
+    def snapshot(self) -> Dict[str, float]:
+        """
+        Return every value, keyed by its comma-joined label values ('total' for an unlabelled gauge).
+
+        Returns:
+            Dict[str, float]: label values -> value.
+        """
+        return {','.join(key) or 'total': value for key, value in self.series().items()}
+
+    def expose(self) -> List[str]:
+        return [
+            f'{_metric_name(self.name)}{_label_set(self.labels, key)} {_number(value)}'
+            for key, value in sorted(self.series().items())
+        ]
+
+
+class Histogram(_Sharded):
+    """
+    Count observations into cumulative buckets, for latency distributions, optionally broken down by the values of a
+    fixed set of labels.
+    """
+
+    def __init__(self,
+                 name: str,
+                 description: str = '',
+                 buckets: Sequence[float] = DEFAULT_BUCKETS,
+                 labels: Sequence[str] = ()) -> None:
+        super().__init__()
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self.labels = tuple(labels)
+
+    def observe(self, value: float, *values: str) -> None:
+        """
+        Record a single observation.
+
+        Args:
+            value (float): the observed value (e.g. a duration in seconds).
+            *values (str): one value per label, in the order the labels were declared.
+        """
+        shard = self._shard()
+        if (row := shard.get(values)) is None:
+            # One count per bucket, one for observations above the largest bucket, then the sum.
+            row = shard[values] = [0] * (len(self.buckets) + 1) + [0.0]
+        row[bisect_left(self.buckets, value)] += 1
+        row[-1] += value
+
+    @contextmanager
+    def time(self, *values: str) -> Iterator[None]:
+        """
+        Observe the wall-clock duration of the wrapped block in seconds.
+
+        Args:
+            *values (str): one value per label, in the order the labels were declared.
+
+        Yields:
+            None: nothing; the duration is recorded on exit.
+        """
+        _start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(perf_counter() - _start, *values)
+
+    def series(self) -> Dict[Tuple[str, ...], Dict[str, Any]]:
+        """
+        Return the cumulative bucket counts, count and sum of every combination of label values, merged across threads.
+        """
+        result = {}
+        for key, row in self._merged().items():
+            cumulative, running = {}, 0
+            for bound, count in zip((*self.buckets, inf), row):
+                running += count
+                cumulative[bound] = running
+            result[key] = {
+                'buckets': cumulative,
+                'count': running,
+                'sum': row[-1]
+            }
+        return result
+
+    def _merge(self, into: Dict[Tuple[str, ...], List[float]], shard: Dict[Tuple[str, ...], List[float]]) -> None:
+        for key, row in shard.items():
+            if (total := into.get(key)) is None:
+                into[key] = list(row)
+            else:
+                for i, value in enumerate(row):
+                    total[i] += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Return cumulative bucket counts, the total count and the sum of all observations. A labelled histogram returns
+        one such mapping per combination of label values, keyed by the comma-joined values.
+
+        Returns:
+            Dict[str, Any]: 'buckets' (upper bound -> cumulative count), 'count' and 'sum'.
+        """
+        series = self.series()
+
+        if not self.labels:
+            return series.get((), {'buckets': {bound: 0 for bound in (*self.buckets, inf)}, 'count': 0, 'sum': 0.0})
+
+        return {','.join(key): value for key, value in series.items()}
+
+    def expose(self) -> List[str]:
+        name = _metric_name(self.name)
+        lines = []
+        for key, value in sorted(self.series().items()):
+            for bound, count in value['buckets'].items():
+                lines.append(f'{name}_bucket{_label_set(self.labels, key, le=_number(bound))} {count}')
+            lines.append(f'{name}_sum{_label_set(self.labels, key)} {_number(value["sum"])}')
+            lines.append(f'{name}_count{_label_set(self.labels, key)} {value["count"]}')
+        return lines
+
+
+_registry: Dict[str, Metric] = {}
+_registry_lock = Lock()
+
+
+def _get_or_create(kind: Type[M], name: str, *args: Any) -> M:
+    with _registry_lock:
+        if name not in _registry:
+            _registry[name] = kind(name, *args)
+        metric = _registry[name]
+
+    if not isinstance(metric, kind):
+        raise TypeError(f'Metric "{name}" is already registered as a {metric.__class__.__name__}')
+
+    return metric
+
+
+def summary(name: str, description: str = '') -> Summary:
+    """
+    Get or create a process-wide Summary by name.
+
+    Args:
+        name (str): unique metric name.
+        description (str): human-readable description of the metric. (default: '')
+
+    Returns:
+        Summary: the registered Summary.
+    """
+    return _get_or_create(Summary, name, description)
+
+
+def counter(name: str, description: str = '', labels: Sequence[str] = ()) -> Counter:
+    """
+    Get or create a process-wide Counter by name.
+
+    Args:
+        name (str): unique metric name.
+        description (str): human-readable description of the metric. (default: '')
+        labels (Sequence[str]): names of the labels the count is broken down by. (default: ())
+
+    Returns:
+        Counter: the registered Counter.
+    """
+    return _get_or_create(Counter, name, description, labels)
+
+
+def gauge(name: str, description: str = '', labels: Sequence[str] = ()) -> Gauge:
+    """
+    Get or create a process-wide Gauge by name.
+
+    Args:
+        name (str): unique metric name.
+        description (str): human-readable description of the metric. (default: '')
+        labels (Sequence[str]): names of the labels the value is broken down by. (default: ())
+
+    Returns:
+        Gauge: the registered Gauge.
+    """
+    return _get_or_create(Gauge, name, description, labels)
+
+
+def histogram(name: str,
+              description: str = '',
+              buckets: Sequence[float] = DEFAULT_BUCKETS,
+              labels: Sequence[str] = ()) -> Histogram:
+    """
+    Get or create a process-wide Histogram by name.
+
+    Args:
+        name (str): unique metric name.
+        description (str): human-readable description of the metric. (default: '')
+        buckets (Sequence[float]): bucket upper bounds. (default: DEFAULT_BUCKETS)
+        labels (Sequence[str]): names of the labels the observations are broken down by. (default: ())
+
+    Returns:
+        Histogram: the registered Histogram.
+    """
+    return _get_or_create(Histogram, name, description, buckets, labels)
+
+
+def snapshot() -> Dict[str, Dict[str, Any]]:
+    """
+    Return a snapshot of every registered metric.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: a mapping of metric names to their current state.
+    """
+    with _registry_lock:
+        metrics = list(_registry.values())
+    return {m.name: m.snapshot() for m in metrics}
+
+
+def exposition() -> str:
+    """
+    Render every registered metric in the Prometheus text exposition format (see CONTENT_TYPE).
+
+    Returns:
+        str: one HELP and TYPE comment per metric, followed by its samples.
+    """
+    with _registry_lock:
+        metrics = sorted(_registry.values(), key=lambda m: m.name)
+
+    lines = []
+    for metric in metrics:
+        name = _metric_name(metric.name)
+        if metric.description:
+            lines.append(f'# HELP {name} {_help(metric.description)}')
+        lines.append(f'# TYPE {name} {_TYPES[metric.__class__.__name__]}')
+        lines.extend(metric.expose())
+
+    return '\n'.join(lines) + '\n'
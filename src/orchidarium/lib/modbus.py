@@ -0,0 +1,366 @@
+"""
+Minimal Modbus RTU client for sensors on a serial (RS-485) line, such as our soil probe behind its CH340 adapter.
+
+Only what our probes need is implemented: reading a block of holding or input registers in a single transaction, with
+the response frame's CRC, unit address, function code and length checked before any value is trusted. The wire is
+abstracted behind a small `Transport` interface, so that the client can be exercised against a fake device (see
+`FakeModbusTransport` in the tests).
+"""
+
+
+from __future__ import annotations
+
+import logging
+import os
+import select
+import struct
+
+from time import monotonic, sleep
+from orchidarium.lib.metrics import counter, histogram
+from orchidarium.lib.retry import RetryPolicy
+from typing import TYPE_CHECKING, Protocol
+
+if TYPE_CHECKING:
+    from typing import Optional, Tuple
+
+
+__all__ = [
+    'crc16',
+    'FrameError',
+    'ModbusClient',
+    'ModbusError',
+    'ModbusExceptionError',
+    'ModbusTimeoutError',
+    'READ_HOLDING_REGISTERS',
+    'READ_INPUT_REGISTERS',
+    'SerialTransport',
+    'Transport'
+]
+
+log = logging.getLogger(__name__)
+
+READ_HOLDING_REGISTERS = 0x03
+READ_INPUT_REGISTERS = 0x04
+
+# A read request may ask for at most this many registers, so that the response fits in one 256-byte RTU frame.
+MAX_REGISTERS = 125
+
+# Probes answer in tens of milliseconds; a frame that failed its checks is retried straight away, a couple of times.
+DEFAULT_POLICY = RetryPolicy(base_delay=0.05, max_delay=0.5, deadline=5.0, max_attempts=3)
+
+_transactions = counter('modbus_transactions_total', 'Modbus transactions, by outcome', labels=('outcome',))
+_retries = counter('modbus_retries_total', 'Modbus transactions retried, by the reason the previous attempt failed', labels=('reason',))
+_latency = histogram('modbus_transaction_seconds', 'Duration of Modbus transactions, including retries')
+
+
+def _crc_table() -> Tuple[int, ...]:
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+        table.append(crc)
+    return tuple(table)
+
+
+_CRC_TABLE = _crc_table()
+
+
+def crc16(data: bytes | bytearray | memoryview) -> int:
+    """
+    Compute the Modbus CRC-16 (polynomial 0xA001, initial value 0xFFFF) of a frame. On the wire it follows the frame,
+    low byte first.
+
+    Args:
+        data (bytes | bytearray | memoryview): the frame, without its CRC.
+
+    Returns:
+        int: the CRC.
+    """
+    crc = 0xFFFF
+    table = _CRC_TABLE
+    for byte in data:
+        crc = (crc >> 8) ^ table[(crc ^ byte) & 0xFF]
+    return crc
+
+
+class ModbusError(OSError):
+    """
+    A Modbus transaction failed. `reason` labels the failure in metrics.
+    """
+
+    reason: str = 'error'
+
+
+class ModbusTimeoutError(ModbusError):
+    """
+    The device did not send a complete response in time.
+    """
+
+    reason = 'timeout'
+
+
+class FrameError(ModbusError):
+    """
+    The response was garbled: a bad CRC, or an unexpected unit address, function code or length.
+    """
+
+    reason = 'frame'
+
+
+class ModbusExceptionError(ModbusError):
+    """
+    The device understood the request and answered with a Modbus exception (e.g. 0x02, illegal data address).
+    """
+
+    reason = 'exception'
+
+    def __init__(self, function: int, code: int) -> None:
+        super().__init__(f'Device answered function {function:#04x} with exception code {code:#04x}')
+        self.function = function
+        self.code = code
+
+
+class Transport(Protocol):
+    """
+    The byte pipe a `ModbusClient` talks over.
+    """
+
+    def write(self, data: bytes) -> None:
+        """
+        Send a request frame.
+        """
+
+    def read(self, size: int, timeout: float) -> bytes:
+        """
+        Read up to `size` bytes, waiting at most `timeout` seconds; fewer (or none) on timeout.
+        """
+
+    def flush(self) -> None:
+        """
+        Discard anything received but not read, e.g. the tail of a garbled response.
+        """
+
+    def close(self) -> None:
+        """
+        Release the underlying device, if any.
+        """
+
+
+class SerialTransport:
+    """
+    A raw 8N1 serial port, configured with termios, that is opened on first use and reopened after `close()`.
+
+    Args:
+        path (str): the serial device, e.g. /dev/ttyUSB0.
+        baudrate (int): line speed in bits per second. (default: 4800)
+
+    Raises:
+        ValueError: if termios does not support the baud rate.
+    """
+
+    def __init__(self, path: str, baudrate: int = 4800) -> None:
+        import termios
+
+        if (speed := getattr(termios, f'B{baudrate}', None)) is None:
+            raise ValueError(f'Unsupported baud rate {baudrate}')
+
+        self.path = path
+        self.baudrate = baudrate
+        self._speed: int = speed
+        self._fd: Optional[int] = None
+        # RTU frames are delimited by at least 3.5 character times (of 10 bits each) of silence on the line.
+        self._gap = 35.0 / baudrate
+        self._quiet: float = 0.0
+
+    def open(self) -> None:
+        """
+        Open and configure the port, if it is not open already.
+
+        An error opening or configuring the port (an OSError or termios.error) propagates, and leaves the port closed.
+        """
+        import termios
+
+        if self._fd is not None:
+            return
+
+        fd = os.open(self.path, os.O_RDWR | os.O_NOCTTY | os.O_NONBLOCK)
+        _configured = False
+        try:
+            _, _, _, _, _, _, cc = termios.tcgetattr(fd)
+            # Raw mode: no line discipline, no echo, no flow control; reads return whatever has arrived.
+            cc[termios.VMIN] = 0
+            cc[termios.VTIME] = 0
+            termios.tcsetattr(
+                fd,
+                termios.TCSANOW,
+                [0, 0, termios.CS8 | termios.CREAD | termios.CLOCAL, 0, self._speed, self._speed, cc]
+            )
+            termios.tcflush(fd, termios.TCIOFLUSH)
+            _configured = True
+        finally:
+            if not _configured:
+                os.close(fd)
+
+        log.debug(f'Opened serial port {self.path} at {self.baudrate} baud')
+        self._fd = fd
+
+    def write(self, data: bytes) -> None:
+        import termios
+
+        self.open()
+
+        if (_wait := self._quiet - monotonic()) > 0:
+            sleep(_wait)
+
+        view = memoryview(data)
+        while view:
+            if not select.select([], [self._fd], [], 1.0)[1]:
+                raise ModbusTimeoutError(f'Timed out writing to {self.path}')
+            view = view[os.write(self._fd, view):]  # type: ignore[arg-type]
+
+        termios.tcdrain(self._fd)  # type: ignore[arg-type]
+
+    def read(self, size: int, timeout: float) -> bytes:
+        self.open()
+
+        buffer = bytearray()
+        deadline = monotonic() + timeout
+
+        while len(buffer) < size and (_remaining := deadline - monotonic()) > 0:
+            if select.select([self._fd], [], [], _remaining)[0]:
+                buffer += os.read(self._fd, size - len(buffer))  # type: ignore[arg-type]
+
+        self._quiet = monotonic() + self._gap
+        return bytes(buffer)
+
+    def flush(self) -> None:
+        import termios
+
+        if self._fd is not None:
+            termios.tcflush(self._fd, termios.TCIFLUSH)
+
+    def close(self) -> None:
+        if self._fd is not None:
+            try:
+                os.close(self._fd)
+            finally:
+                self._fd = None
+
+
+class ModbusClient:
+    """
+    Read registers from one unit on a Modbus RTU line.
+
+    Args:
+        transport (Transport): the line the unit is on.
+        unit (int): the unit's address, 1-247. (default: 1)
+        timeout (float): seconds to wait for a complete response. (default: 1.0)
+        policy (RetryPolicy): how often to retry a transaction that timed out or returned a garbled frame; a Modbus
+            exception is never retried. (default: DEFAULT_POLICY)
+
+    Raises:
+        ValueError: if the unit address is out of range.
+    """
+
+    def __init__(self, transport: Transport, unit: int = 1, timeout: float = 1.0, policy: RetryPolicy = DEFAULT_POLICY) -> None:
+        if not 1 <= unit <= 247:
+            raise ValueError(f'Modbus unit address must be between 1 and 247, received {unit}')
+
+        self.transport = transport
+        self.unit = unit
+        self.timeout = timeout
+        self.policy = policy
+
+    def read_registers(self, address: int, count: int, function: int = READ_HOLDING_REGISTERS) -> Tuple[int, ...]:
+        """
+        Read `count` consecutive registers starting at `address`, in one transaction.
+
+        Errors of the transport itself, such as an OSError because the device was unplugged, are not retried and
+        propagate.
+
+        Args:
+            address (int): the first register.
+            count (int): the number of registers, 1-125.
+            function (int): READ_HOLDING_REGISTERS or READ_INPUT_REGISTERS. (default: READ_HOLDING_REGISTERS)
+
+        Raises:
+            ValueError: if the request is out of range.
+            ModbusExceptionError: if the device answered with a Modbus exception.
+            ModbusError: if the transaction still failed when the policy gave up.
+
+        Returns:
+            Tuple[int, ...]: the registers' unsigned 16-bit values.
+        """
+        if not 1 <= count <= MAX_REGISTERS or not 0 <= address <= 0xFFFF - count + 1:
+            raise ValueError(f'Cannot read {count} register(s) from address {address:#06x}')
+        if function not in (READ_HOLDING_REGISTERS, READ_INPUT_REGISTERS):
+            raise ValueError(f'Unsupported read function {function:#04x}')
+
+        request = struct.pack('>BBHH', self.unit, function, address, count)
+        request += crc16(request).to_bytes(2, 'little')
+
+        _start = monotonic()
+        attempt = 0
+
+        try:
+            while True:
+                attempt += 1
+                try:
+                    registers = self._transact(request, function, count)
+                except ModbusExceptionError:
+                    _transactions.inc('exception')
+                    raise
+                except ModbusError as e:
+                    _transactions.inc(e.reason)
+
+                    if (delay := self.policy.next_delay(attempt, monotonic() - _start)) is None:
+                        raise
+
+                    log.debug(f'Modbus transaction with unit {self.unit} failed ({e.reason}), retrying in {delay:.2f}s: {e}')
+                    _retries.inc(e.reason)
+                    # Whatever is left of a garbled response would otherwise be read as the start of the next one.
+                    self.transport.flush()
+                    sleep(delay)
+                else:
+                    _transactions.inc('ok')
+                    return registers
+        finally:
+            _latency.observe(monotonic() - _start)
+
+    def _read(self, size: int, deadline: float) -> bytes:
+        data = self.transport.read(size, max(0.0, deadline - monotonic()))
+        if len(data) < size:
+            raise ModbusTimeoutError(f'Unit {self.unit} sent {len(data)} of {size} expected byte(s) before timing out')
+        return data
+
+    def _transact(self, request: bytes, function: int, count: int) -> Tuple[int, ...]:
+        """
+        Send one request and parse its response.
+        """
+        deadline = monotonic() + self.timeout
+        self.transport.write(request)
+
+        # Unit, function and byte count (or exception code), from which the length of the rest of the frame follows.
+        header = self._read(3, deadline)
+        unit, _function, length = header
+
+        if unit != self.unit:
+            raise FrameError(f'Response from unit {unit}, expected {self.unit}')
+
+        if _function == function | 0x80:
+            frame = header + self._read(2, deadline)
+            if crc16(frame[:-2]) != int.from_bytes(frame[-2:], 'little'):
+                raise FrameError(f'CRC mismatch in exception response from unit {unit}')
+            raise ModbusExceptionError(function, length)
+
+        if _function != function:
+            raise FrameError(f'Response to function {_function:#04x}, expected {function:#04x}')
+        if length != 2 * count:
+            raise FrameError(f'Response carries {length} byte(s), expected {2 * count}')
+
+        frame = header + self._read(length + 2, deadline)
+        if crc16(frame[:-2]) != int.from_bytes(frame[-2:], 'little'):
+            raise FrameError(f'CRC mismatch in response from unit {unit}')
+
+        return struct.unpack_from(f'>{count}H', frame, 3)
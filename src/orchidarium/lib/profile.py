@@ -0,0 +1,221 @@
+"""
+On-demand CPU and memory introspection of the running daemon, for the `/debug` endpoints.
+
+Nothing here costs anything until it is asked for: the sampling profiler only runs for the duration of a request, and
+tracemalloc is only started for the duration of a memory diff (unless it was already tracing, e.g. with
+PYTHONTRACEMALLOC).
+"""
+
+
+from __future__ import annotations
+
+import logging
+import os
+import sys
+import threading
+import tracemalloc
+
+from collections import Counter
+from threading import Lock, get_ident
+from time import monotonic, sleep
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from types import FrameType
+    from typing import Any, Dict, List, Optional
+
+
+__all__ = [
+    'MAX_SECONDS',
+    'ProfilerBusyError',
+    'collapsed',
+    'memory',
+    'profile',
+    'top'
+]
+
+log = logging.getLogger(__name__)
+
+# Longest profile or memory diff a single request may ask for.
+MAX_SECONDS = 60.0
+
+# Only one profile or memory diff runs at a time; they would only distort each other.
+_busy = Lock()
+
+_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>')
+)
+
+
+class ProfilerBusyError(RuntimeError):
+    """
+    Raised when a profile or memory diff is requested while another one is still running.
+    """
+
+
+def _location(frame: FrameType) -> str:
+    code = frame.f_code
+    # The last two path components are enough to tell modules apart without leaking the install prefix.
+    path = os.path.join(*code.co_filename.split(os.sep)[-2:]) if os.sep in code.co_filename else code.co_filename
+    return f'{code.co_name} ({path}:{code.co_firstlineno})'
+
+
+def profile(seconds: float, interval: float = 0.01) -> Dict[str, int]:
+    """
+    Sample the Python stack of every thread every `interval` seconds for `seconds` seconds.
+
+    This is a wall-clock profiler: threads blocked on I/O or a lock are sampled where they wait, which is what shows
+    where time goes in a daemon that mostly waits.
+
+    Args:
+        seconds (float): how long to profile for, at most MAX_SECONDS.
+        interval (float): seconds between samples. (default: 0.01)
+
+    Raises:
+        ProfilerBusyError: if another profile or memory diff is running.
+
+    Returns:
+        Dict[str, int]: stacks as "thread;outermost;...;innermost" frames, with the number of times each was sampled.
+    """
+    if not _busy.acquire(blocking=False):
+        raise ProfilerBusyError('A profile is already running')
+
+    seconds = min(seconds, MAX_SECONDS)
+    try:
+        log.info(f'Profiling all threads for {seconds}s')
+        _me = get_ident()
+        _names: Dict[int, str] = {}
+        stacks: Counter[str] = Counter()
+
+        _deadline = monotonic() + seconds
+        while monotonic() < _deadline:
+            for ident, frame in sys._current_frames().items():
+                if ident == _me:
+                    continue
+
+                if ident not in _names:
+                    _names.update((t.ident, t.name) for t in threading.enumerate() if t.ident is not None)
+
+                _stack: List[str] = []
+                _frame: Optional[FrameType] = frame
+                while _frame is not None:
+                    _stack.append(_location(_frame))
+                    _frame = _frame.f_back
+
+                stacks[';'.join((_names.get(ident, str(ident)), *reversed(_stack)))] += 1
+
+            sleep(interval)
+
+        return dict(stacks)
+    finally:
+        _busy.release()
+
+
+def collapsed(stacks: Dict[str, int]) -> str:
+    """
+    Render stacks in the collapsed format read by flamegraph.pl, speedscope and similar tools.
+
+    Args:
+        stacks (Dict[str, int]): as returned by `profile()`.
+
+    Returns:
+        str: one "stack count" line per stack, most sampled first.
+    """
+    return ''.join(f'{stack} {count}\n' for stack, count in sorted(stacks.items(), key=lambda item: -item[1]))
+
+
+def top(stacks: Dict[str, int], limit: int = 50) -> str:
+    """
+    Render stacks as a table of functions, like pstats: how often each was the innermost frame (self) and how often it
+    was anywhere on the stack (cumulative).
+
+    Args:
+        stacks (Dict[str, int]): as returned by `profile()`.
+        limit (int): number of functions to list. (default: 50)
+
+    Returns:
+        str: the table, sorted by self samples, then cumulative samples.
+    """
+    _self: Counter[str] = Counter()
+    _cumulative: Counter[str] = Counter()
+    total = sum(stacks.values())
+
+    for stack, count in stacks.items():
+        frames = stack.split(';')[1:]
+        if frames:
+            _self[frames[-1]] += count
+        for frame in set(frames):
+            _cumulative[frame] += count
+
+    rows = sorted(_cumulative, key=lambda frame: (-_self[frame], -_cumulative[frame]))[:limit]
+    lines = [f'{total} samples', f'{"self":>8} {"self%":>6} {"cum":>8} {"cum%":>6}  function']
+    for frame in rows:
+        lines.append(
+            f'{_self[frame]:>8} {_self[frame] / total:>6.1%} {_cumulative[frame]:>8} {_cumulative[frame] / total:>6.1%}  {frame}'
+        )
+    return '\n'.join(lines) + '\n'
+
+
+def _rss_bytes() -> Optional[int]:
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def memory(seconds: float, limit: int = 25, group_by: str = 'lineno') -> Dict[str, Any]:
+    """
+    Report which lines allocated the most memory over `seconds` seconds, from two tracemalloc snapshots.
+
+    Args:
+        seconds (float): time between the two snapshots, at most MAX_SECONDS.
+        limit (int): number of allocation sites to report. (default: 25)
+        group_by (str): 'lineno', 'filename' or 'traceback'. (default: 'lineno')
+
+    Raises:
+        ProfilerBusyError: if another profile or memory diff is running.
+
+    Returns:
+        Dict[str, Any]: traced and resident memory, and the allocation sites that grew the most.
+    """
+    if not _busy.acquire(blocking=False):
+        raise ProfilerBusyError('A profile is already running')
+
+    seconds = min(seconds, MAX_SECONDS)
+    _started = not tracemalloc.is_tracing()
+    try:
+        if _started:
+            tracemalloc.start()
+
+        log.info(f'Tracing memory allocations for {seconds}s')
+        before = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+        sleep(seconds)
+        after = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+        traced, peak = tracemalloc.get_traced_memory()
+    finally:
+        if _started:
+            tracemalloc.stop()
+        _busy.release()
+
+    diff = after.compare_to(before, group_by)
+
+    return {
+        'seconds': seconds,
+        'traced_bytes': traced,
+        'traced_peak_bytes': peak,
+        'rss_bytes': _rss_bytes(),
+        'top': [
+            {
+                'location': str(stat.traceback[0]) if group_by != 'traceback' else [str(frame) for frame in stat.traceback],
+                'size_diff': stat.size_diff,
+                'size': stat.size,
+                'count_diff': stat.count_diff,
+                'count': stat.count
+            }
+            for stat in diff[:limit]
+        ]
+    }
@@ -0,0 +1,210 @@
+"""
+Backoff and circuit-breaking primitives for calls to flaky hardware.
+"""
+
+
+from __future__ import annotations
+
+import logging
+
+from random import random
+from threading import Lock
+from time import monotonic
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Callable, Optional
+
+
+__all__ = [
+    'CircuitBreaker',
+    'RetryPolicy'
+]
+
+log = logging.getLogger(__name__)
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with jitter, bounded by a per-call deadline and optionally a number of attempts.
+
+    Args:
+        base_delay (float): delay in seconds before the first retry. (default: 0.1)
+        max_delay (float): upper bound on any single delay in seconds. (default: 5.0)
+        multiplier (float): growth factor of the delay between consecutive retries. (default: 2.0)
+        jitter (float): fraction of each delay that is randomised, so callers that failed together do not retry in lockstep. (default: 0.5)
+        deadline (float): give up once this many seconds have passed since the first attempt. (default: 10.0)
+        max_attempts (Optional[int]): give up after this many attempts, regardless of the deadline. (default: None)
+
+    Raises:
+        ValueError: if `jitter` is not between 0 and 1.
+    """
+
+    def __init__(self,
+                 base_delay: float = 0.1,
+                 max_delay: float = 5.0,
+                 multiplier: float = 2.0,
+                 jitter: float = 0.5,
+                 deadline: float = 10.0,
+                 max_attempts: Optional[int] = None) -> None:
+        if not 0.0 <= jitter <= 1.0:
+            raise ValueError(f'Jitter must be between 0 and 1, received {jitter}')
+
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.deadline = deadline
+        self.max_attempts = max_attempts
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Return how long to wait after a failed attempt.
+
+        Args:
+            attempt (int): number of attempts made so far, starting at 1.
+
+        Returns:
+            float: the delay in seconds.
+        """
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** (attempt - 1))
+        return delay * (1.0 - self.jitter * random())
+
+    def next_delay(self, attempt: int, elapsed: float) -> Optional[float]:
+        """
+        Decide whether to retry after a failed attempt, and after how long.
+
+        Args:
+            attempt (int): number of attempts made so far, starting at 1.
+            elapsed (float): seconds since the first attempt started.
+
+        Returns:
+            Optional[float]: the delay before the next attempt, or None if the call should give up.
+        """
+        if self.max_attempts is not None and attempt >= self.max_attempts:
+            return None
+
+        if (remaining := self.deadline - elapsed) <= 0:
+            return None
+
+        # Never sleep past the deadline only to give up on waking.
+        return min(self.backoff(attempt), remaining)
+
+
+class CircuitBreaker:
+    """
+    Stop calling a resource after repeated failures, then let a single probe through once a cool-down has passed.
+
+    The breaker is closed while calls succeed. After `failure_threshold` consecutive failures it opens and `allow()`
+    refuses every call for `reset_timeout` seconds. It then goes half-open: the next call is let through, and its outcome
+    closes the breaker again or re-opens it for another cool-down. A probe that has not reported back after
+    `probe_timeout` seconds is given up on, and the next caller is let through as a new probe.
+
+    Args:
+        failure_threshold (int): consecutive failures that open the breaker. (default: 5)
+        reset_timeout (float): seconds the breaker stays open before letting a probe through. (default: 30.0)
+        probe_timeout (Optional[float]): seconds to wait for a probe's outcome before letting another through; the
+            same as `reset_timeout` if None. (default: None)
+        name (str): name of the guarded resource, for the logs. (default: '')
+        clock (Callable[[], float]): time source. (default: time.monotonic)
+
+    Attributes:
+        CLOSED (str): state in which calls are let through.
+        OPEN (str): state in which calls are refused.
+        HALF_OPEN (str): state in which a single probe is let through.
+    """
+
+    CLOSED: str = 'closed'
+    OPEN: str = 'open'
+    HALF_OPEN: str = 'half-open'
+
+    def __init__(self,
+                 failure_threshold: int = 5,
+                 reset_timeout: float = 30.0,
+                 probe_timeout: Optional[float] = None,
+                 name: str = '',
+                 clock: Callable[[], float] = monotonic) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.probe_timeout = reset_timeout if probe_timeout is None else probe_timeout
+        self.name = name
+        self._clock = clock
+        self._lock = Lock()
+        self._state: str = self.CLOSED
+        self._failures: int = 0
+        self._opened_at: float = 0.0
+        self._probe_at: float = 0.0
+        # Statistics.
+        self.trips: int = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    @property
+    def available(self) -> bool:
+        """
+        Whether `allow()` would let a call through now, without claiming the probe if the breaker is half-open.
+        """
+        with self._lock:
+            return self._ready(self._clock())
+
+    def allow(self) -> bool:
+        """
+        Check whether a call may go ahead. In the half-open state only the first caller gets through, until its outcome is
+        recorded or `probe_timeout` passes without one.
+
+        Returns:
+            bool: True if the call may proceed.
+        """
+        with self._lock:
+            _now = self._clock()
+
+            if not self._ready(_now):
+                return False
+
+            if self._state == self.OPEN:
+                log.info(f'Circuit breaker {self.name!r} half-open, letting a probe through')
+            elif self._state == self.HALF_OPEN:
+                log.warning(f'Circuit breaker {self.name!r} probe did not report back within {self.probe_timeout}s, letting another through')
+
+            if self._state != self.CLOSED:
+                self._state = self.HALF_OPEN
+                self._probe_at = _now
+
+            return True
+
+    def _ready(self, now: float) -> bool:
+        if self._state == self.OPEN:
+            return now - self._opened_at >= self.reset_timeout
+        if self._state == self.HALF_OPEN:
+            return now - self._probe_at >= self.probe_timeout
+        return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != self.CLOSED:
+                log.info(f'Circuit breaker {self.name!r} closed')
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+
+            if self._state == self.HALF_OPEN or (self._state == self.CLOSED and self._failures >= self.failure_threshold):
+                log.warning(f'Circuit breaker {self.name!r} open for {self.reset_timeout}s after {self._failures} consecutive failure(s)')
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+                self.trips += 1
+
+    def reset(self) -> None:
+        """
+        Close the breaker and forget past failures, e.g. when the resource has been replaced.
+        """
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
@@ -0,0 +1,82 @@
+"""
+Fixed-capacity ring buffer for handing the newest readings from a single producer thread to any number of readers.
+"""
+
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Generic, TypeVar
+
+if TYPE_CHECKING:
+    from typing import List, Optional, Tuple
+
+
+__all__ = [
+    'RingBuffer'
+]
+
+T = TypeVar('T')
+
+
+class RingBuffer(Generic[T]):
+    """
+    A preallocated ring of slots written by exactly one thread and read without locks.
+
+    The writer stores an item in its slot before publishing it by bumping the sequence number, and both steps are single
+    atomic operations under the GIL, so a reader that observes sequence `n` can always read item `n - 1`. Readers that
+    fall more than `capacity` items behind lose the overwritten items; `since()` reports how many.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        if capacity < 1:
+            raise ValueError(f'RingBuffer capacity must be positive, received {capacity}')
+
+        self.capacity = capacity
+        self._slots: List[Optional[T]] = [None] * capacity
+        # Total number of items ever pushed; the next item goes in slot `_seq % capacity`.
+        self._seq: int = 0
+
+    @property
+    def sequence(self) -> int:
+        return self._seq
+
+    def push(self, item: T) -> None:
+        """
+        Store an item, overwriting the oldest one if the ring is full. Must only be called from one thread.
+
+        Args:
+            item (T): the item to store.
+        """
+        seq = self._seq
+        self._slots[seq % self.capacity] = item
+        self._seq = seq + 1
+
+    def latest(self) -> Optional[T]:
+        """
+        Return the most recently pushed item.
+
+        Returns:
+            Optional[T]: the newest item, or None if nothing has been pushed yet.
+        """
+        seq = self._seq
+        return self._slots[(seq - 1) % self.capacity] if seq else None
+
+    def since(self, seq: int) -> Tuple[List[T], int, int]:
+        """
+        Return every item pushed after a given sequence number that is still in the ring.
+
+        Args:
+            seq (int): the sequence number returned by a previous call (or 0 for everything available).
+
+        Returns:
+            Tuple[List[T], int, int]: the items oldest-first, the sequence number to pass next time, and how many items
+            were overwritten before they could be read.
+        """
+        end = self._seq
+        start = max(seq, end - self.capacity)
+        items = [self._slots[i % self.capacity] for i in range(start, end)]
+        # The writer may have lapped us while copying; drop anything it overwrote.
+        if (overrun := self._seq - self.capacity - start) > 0:
+            items = items[overrun:]
+            start += overrun
+        return items, end, start - seq  # type: ignore[return-value]
@@ -0,0 +1,264 @@
+"""
+Deadline scheduler that fires each task on its own fixed-rate, drift-free period.
+"""
+
+
+from __future__ import annotations
+
+import heapq
+import logging
+
+from itertools import count
+from threading import Event, Lock
+from time import monotonic
+from orchidarium.lib.metrics import counter, histogram
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+    from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+__all__ = [
+    'Scheduler',
+    'Task'
+]
+
+log = logging.getLogger(__name__)
+
+_lateness_seconds = histogram('scheduler_lateness_seconds', 'How far past its deadline each tick was dispatched')
+_ticks = counter('scheduler_ticks_total', 'Ticks dispatched, late or skipped, by task', labels=('task', 'outcome'))
+
+
+class Task:
+    """
+    A periodic job tracked by the Scheduler.
+
+    Deadlines are computed as `origin + n * period` rather than by adding the period to the time the last tick ran,
+    so that the schedule does not drift no matter how late individual ticks are dispatched.
+    """
+
+    def __init__(self, name: str, period: float, callback: Callable[[], Any], origin: float) -> None:
+        if period <= 0:
+            raise ValueError(f'Task "{name}" must have a positive period, received {period}')
+
+        self.name = name
+        self.period = period
+        self.callback = callback
+        self.origin = origin
+        self._tick: int = 0
+        self._inflight: Optional[Future] = None
+        # Statistics.
+        self.fired: int = 0
+        self.late: int = 0
+        self.skipped: int = 0
+
+    @property
+    def deadline(self) -> float:
+        return self.origin + self._tick * self.period
+
+    @property
+    def busy(self) -> bool:
+        return self._inflight is not None and not self._inflight.done()
+
+    def advance(self, now: float) -> int:
+        """
+        Move this task's deadline to the next tick that lies in the future.
+
+        Args:
+            now (float): the current monotonic time.
+
+        Returns:
+            int: the number of ticks that were missed entirely and are being skipped.
+        """
+        self._tick += 1
+        missed = 0
+        if self.deadline <= now:
+            missed = int((now - self.deadline) // self.period) + 1
+            self._tick += missed
+        return missed
+
+    def retime(self, period: float) -> None:
+        """
+        Change the period, so that the next tick is due one new period after the tick that last came due.
+
+        Args:
+            period (float): the new period in seconds.
+
+        Raises:
+            ValueError: if the period is not positive.
+        """
+        if period <= 0:
+            raise ValueError(f'Task "{self.name}" must have a positive period, received {period}')
+
+        self.origin, self._tick, self.period = self.deadline - self.period, 1, period
+
+    def dispatch(self, now: float, late_tolerance: float) -> None:
+        """
+        Record that the tick that is due was dispatched, counting it as late if it started more than `late_tolerance`
+        periods past its deadline.
+
+        Args:
+            now (float): the current monotonic time.
+            late_tolerance (float): fraction of a period a tick may be dispatched past its deadline.
+        """
+        lateness = now - self.deadline
+        _lateness_seconds.observe(lateness)
+
+        if lateness > self.period * late_tolerance:
+            self.late += 1
+            _ticks.inc(self.name, 'late')
+            log.warning(f'Task "{self.name}" dispatched {lateness:.3f}s late')
+        self.fired += 1
+        _ticks.inc(self.name, 'fired')
+
+    def skip(self, ticks: int = 1) -> None:
+        """
+        Record ticks that were skipped rather than dispatched.
+
+        Args:
+            ticks (int): number of ticks skipped. (default: 1)
+        """
+        self.skipped += ticks
+        _ticks.inc(self.name, 'skipped', amount=ticks)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'fired': self.fired,
+            'late': self.late,
+            'skipped': self.skipped
+        }
+
+
+class Scheduler:
+    """
+    Dispatch periodic tasks from a min-heap of deadlines.
+
+    Callbacks are handed to `submit` (e.g. `ThreadPoolExecutor.submit`), so a slow task only delays its own ticks. If a
+    task is still running when its next deadline arrives, that tick is skipped rather than queued behind it.
+
+    Args:
+        submit (Callable[[Callable[[], Any]], Future]): executes a task callback and returns a future for it.
+        late_tolerance (float): fraction of a period a tick may be dispatched past its deadline before it is counted as late. (default: 0.1)
+        clock (Callable[[], float]): monotonic time source. (default: time.monotonic)
+    """
+
+    def __init__(self, submit: Callable[[Callable[[], Any]], Future], late_tolerance: float = 0.1, clock: Callable[[], float] = monotonic) -> None:
+        self._submit = submit
+        self._late_tolerance = late_tolerance
+        self._clock = clock
+        self._heap: List[Tuple[float, int, Task]] = []
+        self._seq = count()
+        self._lock = Lock()
+        self._wakeup = Event()
+        self._stopped = Event()
+        self.tasks: Dict[str, Task] = {}
+
+    def add(self, name: str, period: float, callback: Callable[[], Any], delay: float = 0.0) -> Task:
+        """
+        Schedule a callback to fire every `period` seconds.
+
+        Args:
+            name (str): unique name of the task.
+            period (float): sampling period in seconds.
+            callback (Callable[[], Any]): the work to run on every tick.
+            delay (float): seconds to wait before the first tick. (default: 0.0)
+
+        Raises:
+            ValueError: if a task of that name is already scheduled.
+
+        Returns:
+            Task: the scheduled task.
+        """
+        if name in self.tasks:
+            raise ValueError(f'A task named "{name}" is already scheduled')
+
+        task = Task(name, period, callback, origin=self._clock() + delay)
+        with self._lock:
+            self.tasks[name] = task
+            heapq.heappush(self._heap, (task.deadline, next(self._seq), task))
+        self._wakeup.set()
+
+        log.debug(f'Scheduled task "{name}" every {period}s')
+
+        return task
+
+    def run(self) -> None:
+        """
+        Dispatch tasks as their deadlines come due until `stop()` is called.
+        """
+        while not self._stopped.is_set():
+            with self._lock:
+                _timeout: Optional[float] = self._heap[0][0] - self._clock() if self._heap else None
+
+            if _timeout is None or _timeout > 0:
+                # Sleep until the next deadline; add() and stop() cut this short.
+                self._wakeup.wait(_timeout)
+                self._wakeup.clear()
+                continue
+
+            # Held while firing, so that a callback that reschedules its own task waits until the task is back on the heap.
+            with self._lock:
+                _, _, task = heapq.heappop(self._heap)
+                self._fire(task)
+                heapq.heappush(self._heap, (task.deadline, next(self._seq), task))
+
+    def reschedule(self, name: str, period: float) -> None:
+        """
+        Change the period of a scheduled task. The next tick is due one new period after the tick that last came due,
+        so a shorter period takes effect straight away rather than after the current, longer one.
+
+        Args:
+            name (str): the task's name.
+            period (float): the new period in seconds.
+
+        Raises:
+            KeyError: if no task of that name is scheduled.
+        """
+        with self._lock:
+            if (task := self.tasks.get(name)) is None:
+                raise KeyError(f'No task named "{name}" is scheduled')
+            if period == task.period:
+                return
+
+            task.retime(period)
+            for i, (_, seq, _task) in enumerate(self._heap):
+                if _task is task:
+                    self._heap[i] = (task.deadline, seq, task)
+                    heapq.heapify(self._heap)
+                    break
+        self._wakeup.set()
+
+        log.debug(f'Rescheduled task "{name}" every {period:.3g}s')
+
+    def stop(self) -> None:
+        """
+        Ask a running scheduler to return.
+        """
+        self._stopped.set()
+        self._wakeup.set()
+
+    def _fire(self, task: Task) -> None:
+        now = self._clock()
+
+        if task.busy:
+            _lateness_seconds.observe(now - task.deadline)
+            task.skip()
+            log.warning(f'Task "{task.name}" is still running from a previous tick, skipping tick due at {task.deadline:.3f}')
+        else:
+            task.dispatch(now, self._late_tolerance)
+            task._inflight = self._submit(task.callback)
+
+        if (missed := task.advance(self._clock())) > 0:
+            task.skip(missed)
+            log.warning(f'Task "{task.name}" missed {missed} tick(s)')
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Report fired, late and skipped tick counts per task.
+
+        Returns:
+            Dict[str, Dict[str, int]]: a mapping of task names to their tick statistics.
+        """
+        with self._lock:
+            return {name: task.stats() for name, task in self.tasks.items()}
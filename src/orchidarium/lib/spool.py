@@ -0,0 +1,231 @@
+"""
+Append-only, CRC-checked on-disk spool that holds records a publisher could not deliver until they can be replayed.
+"""
+
+
+from __future__ import annotations
+
+import logging
+import os
+import struct
+import zlib
+
+from pathlib import Path
+from threading import Lock
+from orchidarium.lib.time import timed
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import BinaryIO, Callable, Iterator, List, Optional
+
+
+__all__ = [
+    'Spool'
+]
+
+log = logging.getLogger(__name__)
+
+# Every record is prefixed with its payload length and the CRC32 of its payload.
+_HEADER = struct.Struct('<II')
+
+
+class Spool:
+    """
+    Store batches of encoded records in size-capped segment files under a directory.
+
+    Records are appended to the newest segment; once it exceeds `segment_bytes`, a new one is started. When the spool
+    exceeds `max_bytes`, the oldest segments are discarded. Replay reads whole segments oldest-first, skips anything
+    that fails its CRC check, and deletes each segment once every chunk in it has been delivered.
+
+    Args:
+        path (Path): directory to keep segment files in; created if missing.
+        max_bytes (int): upper bound on the total size of all segments. (default: 256 MiB)
+        segment_bytes (int): size at which the active segment is sealed and a new one started. (default: 8 MiB)
+        sync (bool): fsync after every append rather than only when a segment is sealed. (default: False)
+    """
+
+    def __init__(self, path: Path, max_bytes: int = 256 * 2**20, segment_bytes: int = 8 * 2**20, sync: bool = False) -> None:
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.segment_bytes = segment_bytes
+        self.sync = sync
+        self._lock = Lock()
+        self._active: Optional[BinaryIO] = None
+        self._active_path: Optional[Path] = None
+
+        # Statistics.
+        self.discarded_segments: int = 0
+        self.corrupt_records: int = 0
+
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def _segments(self) -> List[Path]:
+        return sorted(self.path.glob('*.seg'))
+
+    @property
+    def size(self) -> int:
+        """
+        Total bytes currently held on disk.
+        """
+        return sum(segment.stat().st_size for segment in self._segments())
+
+    @property
+    def pending(self) -> bool:
+        """
+        Whether there is anything waiting to be replayed.
+        """
+        with self._lock:
+            return any(segment.stat().st_size > 0 for segment in self._segments())
+
+    @timed('spool_append_seconds', 'Time spent durably appending one batch to the spool')
+    def append(self, records: List[bytes]) -> bool:
+        """
+        Durably store a batch of records as a single spool record.
+
+        Args:
+            records (List[bytes]): encoded records, e.g. line protocol with explicit timestamps.
+
+        Returns:
+            bool: True if the batch was written, False otherwise.
+        """
+        if not records:
+            return True
+
+        payload = b'\n'.join(records)
+
+        with self._lock:
+            try:
+                f = self._open_active()
+                f.write(_HEADER.pack(len(payload), zlib.crc32(payload)))
+                f.write(payload)
+                f.flush()
+                if self.sync:
+                    os.fsync(f.fileno())
+
+                if f.tell() >= self.segment_bytes:
+                    self._seal()
+
+                self._enforce_limit()
+            except OSError as e:
+                log.error(f'Could not write {len(records)} record(s) to spool "{self.path}": {e}')
+                return False
+
+        log.debug(f'Spooled {len(records)} record(s) ({len(payload)} bytes) to "{self.path}"')
+
+        return True
+
+    @timed('spool_replay_seconds', 'Time spent replaying the spool')
+    def replay(self, send: Callable[[bytes], None], chunk_bytes: int = 4 * 2**20, max_segments: Optional[int] = None) -> int:
+        """
+        Deliver spooled records oldest-first in large chunks, deleting each segment once it has been sent.
+
+        With `max_segments`, only that many of the oldest segments are replayed, so that a large backlog can be drained
+        a little at a time; the segment still being appended to is only sealed and replayed once it is among them.
+
+        Records carry their own timestamps, so a segment that is only partially delivered before a failure can safely
+        be sent again from the start on the next replay: InfluxDB overwrites points with identical series and time.
+
+        Args:
+            send (Callable[[bytes], None]): delivers one newline-delimited chunk; raises to abort the replay.
+            chunk_bytes (int): approximate upper bound on the size of each chunk. (default: 4 MiB)
+            max_segments (Optional[int]): replay at most this many segments; all of them if None. (default: None)
+
+        Returns:
+            int: the number of bytes delivered.
+        """
+        delivered = 0
+
+        with self._lock:
+            segments = [segment for segment in self._segments() if segment != self._active_path]
+            if max_segments is None or len(segments) < max_segments:
+                self._seal()
+                segments = self._segments()
+            segments = segments[:max_segments]
+
+        for segment in segments:
+            chunk: List[bytes] = []
+            chunk_size = 0
+
+            for payload in self._read(segment):
+                chunk.append(payload)
+                chunk_size += len(payload)
+                if chunk_size >= chunk_bytes:
+                    send(b'\n'.join(chunk))
+                    delivered += chunk_size
+                    chunk, chunk_size = [], 0
+
+            if chunk:
+                send(b'\n'.join(chunk))
+                delivered += chunk_size
+
+            with self._lock:
+                segment.unlink(missing_ok=True)
+
+            log.debug(f'Replayed and removed spool segment "{segment.name}"')
+
+        if delivered:
+            log.info(f'Replayed {delivered} bytes from spool "{self.path}"')
+
+        return delivered
+
+    def close(self) -> None:
+        with self._lock:
+            self._seal()
+
+    def _read(self, segment: Path) -> Iterator[bytes]:
+        """
+        Yield every intact payload in a segment, stopping at the first corrupt or truncated record.
+
+        Args:
+            segment (Path): segment file to read.
+
+        Yields:
+            bytes: record payloads.
+        """
+        try:
+            data = memoryview(segment.read_bytes())
+        except OSError as e:
+            log.error(f'Could not read spool segment "{segment}": {e}')
+            return
+
+        offset, end = 0, len(data)
+
+        while offset + _HEADER.size <= end:
+            length, crc = _HEADER.unpack_from(data, offset)
+            offset += _HEADER.size
+            payload = data[offset:offset + length]
+            if len(payload) != length or zlib.crc32(payload) != crc:
+                # A torn write (e.g. power loss mid-append) leaves a bad tail; everything after it is unreadable.
+                self.corrupt_records += 1
+                log.warning(f'Spool segment "{segment.name}" has a corrupt record at offset {offset - _HEADER.size}, skipping the rest of the segment')
+                return
+            offset += length
+            yield payload.tobytes()
+
+    def _open_active(self) -> BinaryIO:
+        if self._active is None:
+            existing = self._segments()
+            seq = int(existing[-1].stem) + 1 if existing else 0
+            self._active_path = self.path / f'{seq:012d}.seg'
+            self._active = open(self._active_path, 'ab')
+        return self._active
+
+    def _seal(self) -> None:
+        if self._active is not None:
+            self._active.flush()
+            os.fsync(self._active.fileno())
+            self._active.close()
+            self._active = None
+            self._active_path = None
+
+    def _enforce_limit(self) -> None:
+        segments = self._segments()
+        total = sum(segment.stat().st_size for segment in segments)
+
+        for segment in segments:
+            if total <= self.max_bytes or segment == self._active_path:
+                break
+            total -= segment.stat().st_size
+            segment.unlink(missing_ok=True)
+            self.discarded_segments += 1
+            log.warning(f'Spool "{self.path}" exceeded {self.max_bytes} bytes, discarded oldest segment "{segment.name}"')
@@ -1,5 +1,9 @@
+from __future__ import annotations
+
 from functools import wraps
 from datetime import datetime
+from time import perf_counter
+from orchidarium.lib.metrics import histogram
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -20,4 +24,30 @@ def now(f: Callable[..., T]) -> Callable[..., Tuple[T, datetime]]:
     @wraps(f)
     def _f(*args, **kwargs) -> Tuple[T, datetime]:
         return f(*args, **kwargs), datetime.now()
-    return _f
\ No newline at end of file
+    return _f
+
+
+def timed(name: str, description: str = '') -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """
+    Record the duration of every call to a function, measured on the monotonic clock, in a histogram of the metrics
+    system (and so on `/metrics`). Calls that raise are recorded too.
+
+    Args:
+        name (str): name of the histogram, e.g. 'health_persist_seconds'.
+        description (str): human-readable description of the histogram. (default: '')
+
+    Returns:
+        Callable[[Callable[..., T]], Callable[..., T]]: a decorator that times the encapsulated function.
+    """
+    _seconds = histogram(name, description)
+
+    def _decorator(f: Callable[..., T]) -> Callable[..., T]:
+        @wraps(f)
+        def _f(*args, **kwargs) -> T:
+            _start = perf_counter()
+            try:
+                return f(*args, **kwargs)
+            finally:
+                _seconds.observe(perf_counter() - _start)
+        return _f
+    return _decorator
@@ -0,0 +1,315 @@
+"""
+Compact in-memory store of recent readings, so that "what is the humidity right now" (or over the last day) can be
+answered locally without a round trip to InfluxDB.
+
+Every (sensor, field) series keeps its raw samples in a fixed-capacity ring, plus 1-minute and 1-hour downsampled tiers
+(count, sum, min and max per bucket) that are maintained as samples arrive. Rings are stored column-wise in typed
+arrays, so recording a sample allocates nothing per sample.
+"""
+
+
+from __future__ import annotations
+
+import logging
+
+from array import array
+from threading import Lock
+from time import time_ns
+from orchidarium import env
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Dict, Iterator, List, Mapping, Optional, Tuple
+
+
+__all__ = [
+    'ReadingStore',
+    'Series',
+    'TIERS',
+    'readings'
+]
+
+log = logging.getLogger(__name__)
+
+_NS = 1_000_000_000
+
+# Downsampled tiers as (bucket width in seconds, buckets kept): a day of minutes and a month of hours.
+TIERS: Tuple[Tuple[int, int], ...] = (
+    (60, 1440),
+    (3600, 720)
+)
+
+
+class _Columns:
+    """
+    A preallocated ring of rows stored column-wise, one typed array per column. Once full, each append overwrites the
+    oldest row.
+    """
+
+    __slots__ = ('capacity', 'columns', '_seq')
+
+    def __init__(self, capacity: int, typecodes: str) -> None:
+        self.capacity = capacity
+        self.columns: Tuple[array, ...] = tuple(array(code, [0]) * capacity for code in typecodes)
+        # Total number of rows ever appended; the next row goes in slot `_seq % capacity`.
+        self._seq: int = 0
+
+    def __len__(self) -> int:
+        return min(self._seq, self.capacity)
+
+    def append(self, *row: float) -> None:
+        i = self._seq % self.capacity
+        for column, value in zip(self.columns, row):
+            column[i] = value
+        self._seq += 1
+
+    def indices(self) -> Iterator[int]:
+        """
+        Slots of the rows in the ring, oldest first.
+        """
+        capacity = self.capacity
+        return (i % capacity for i in range(max(0, self._seq - capacity), self._seq))
+
+    def last(self) -> Optional[int]:
+        return (self._seq - 1) % self.capacity if self._seq else None
+
+
+class _Tier:
+    """
+    Downsamples a series into fixed-width buckets of count, sum, min and max. The bucket being filled is kept apart
+    and only enters the ring once a sample for a later bucket arrives.
+    """
+
+    __slots__ = ('width', 'closed', '_start', '_count', '_sum', '_min', '_max')
+
+    def __init__(self, width: int, capacity: int) -> None:
+        self.width = width * _NS
+        # Columns: bucket start (ns), count, sum, min, max.
+        self.closed = _Columns(capacity, 'qqddd')
+        self._start: int = -1
+        self._count: int = 0
+        self._sum: float = 0.0
+        self._min: float = 0.0
+        self._max: float = 0.0
+
+    def add(self, timestamp: int, value: float) -> None:
+        start = timestamp - timestamp % self.width
+        if start != self._start:
+            if self._count:
+                self.closed.append(self._start, self._count, self._sum, self._min, self._max)
+            self._start, self._count, self._sum, self._min, self._max = start, 0, 0.0, value, value
+
+        self._count += 1
+        self._sum += value
+        if value < self._min:
+            self._min = value
+        elif value > self._max:
+            self._max = value
+
+    def rows(self, since: int) -> Iterator[Tuple[int, int, float, float, float]]:
+        """
+        Buckets that end after `since`, oldest first, including the one being filled.
+        """
+        starts, counts, sums, mins, maxs = self.closed.columns
+        for i in self.closed.indices():
+            if starts[i] + self.width > since:
+                yield starts[i], counts[i], sums[i], mins[i], maxs[i]
+        if self._count and self._start + self.width > since:
+            yield self._start, self._count, self._sum, self._min, self._max
+
+
+class Series:
+    """
+    Raw samples and downsampled tiers of one field of one sensor.
+
+    Args:
+        capacity (int): number of raw samples to keep.
+    """
+
+    __slots__ = ('_lock', '_raw', '_tiers')
+
+    def __init__(self, capacity: int) -> None:
+        self._lock = Lock()
+        # Columns: timestamp (ns), value.
+        self._raw = _Columns(capacity, 'qd')
+        self._tiers = tuple(_Tier(width, buckets) for width, buckets in TIERS)
+
+    def __len__(self) -> int:
+        return len(self._raw)
+
+    def add(self, timestamp: int, value: float) -> None:
+        """
+        Record a sample.
+
+        Args:
+            timestamp (int): nanoseconds since the epoch.
+            value (float): the sample.
+        """
+        with self._lock:
+            self._raw.append(timestamp, value)
+            for tier in self._tiers:
+                tier.add(timestamp, value)
+
+    def latest(self) -> Optional[Tuple[int, float]]:
+        """
+        The newest sample in the series.
+
+        Returns:
+            Optional[Tuple[int, float]]: the timestamp (ns) and value of the newest sample, or None if there is none.
+        """
+        with self._lock:
+            if (i := self._raw.last()) is None:
+                return None
+            times, values = self._raw.columns
+            return times[i], values[i]
+
+    def raw(self, since: int) -> Tuple[List[int], List[float]]:
+        """
+        Raw samples taken at or after `since`.
+
+        Args:
+            since (int): nanoseconds since the epoch.
+
+        Returns:
+            Tuple[List[int], List[float]]: timestamps (ns) and values, oldest first.
+        """
+        with self._lock:
+            times, values = self._raw.columns
+            indices = [i for i in self._raw.indices() if times[i] >= since]
+            return [times[i] for i in indices], [values[i] for i in indices]
+
+    def downsample(self, since: int, step: int) -> Tuple[List[int], List[float], List[float], List[float], List[int]]:
+        """
+        Aggregate samples since `since` into buckets of `step` seconds.
+
+        The source is the coarsest tier whose bucket width divides `step`, or the raw samples if there is none. Raw
+        samples only reach back as far as their ring's capacity; the tiers reach back further.
+
+        Args:
+            since (int): nanoseconds since the epoch.
+            step (int): bucket width in seconds.
+
+        Returns:
+            Tuple[List[int], List[float], List[float], List[float], List[int]]: bucket starts (ns), and the mean, min,
+            max and number of samples in each bucket, oldest first.
+        """
+        width = step * _NS
+        times: List[int] = []
+        means: List[float] = []
+        mins: List[float] = []
+        maxs: List[float] = []
+        counts: List[int] = []
+        _sum = 0.0
+
+        with self._lock:
+            for tier in reversed(self._tiers):
+                if width % tier.width == 0:
+                    rows: Iterator[Tuple[int, int, float, float, float]] = tier.rows(since)
+                    break
+            else:
+                _times, _values = self._raw.columns
+                rows = (
+                    (_times[i], 1, _values[i], _values[i], _values[i]) for i in self._raw.indices() if _times[i] >= since
+                )
+
+            for start, count, total, low, high in rows:
+                bucket = start - start % width
+                if not times or times[-1] != bucket:
+                    if times:
+                        means.append(_sum / counts[-1])
+                    times.append(bucket)
+                    mins.append(low)
+                    maxs.append(high)
+                    counts.append(0)
+                    _sum = 0.0
+                else:
+                    mins[-1] = min(mins[-1], low)
+                    maxs[-1] = max(maxs[-1], high)
+                counts[-1] += count
+                _sum += total
+
+        if times:
+            means.append(_sum / counts[-1])
+
+        return times, means, mins, maxs, counts
+
+
+class ReadingStore:
+    """
+    Series of every field of every sensor, created as sensors report them.
+
+    Args:
+        capacity (int): number of raw samples to keep per series; 0 disables the store.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self._series: Dict[str, Dict[str, Series]] = {}
+        self._lock = Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0
+
+    def record(self, sensor: str, fields: Mapping[str, float], timestamp: Optional[int] = None) -> None:
+        """
+        Record one reading of a sensor.
+
+        Args:
+            sensor (str): the sensor's name.
+            fields (Mapping[str, float]): the reading's values, keyed by field name.
+            timestamp (Optional[int]): nanoseconds since the epoch; now if omitted. (default: None)
+        """
+        if not self.capacity or not fields:
+            return
+
+        if timestamp is None:
+            timestamp = time_ns()
+
+        if (series := self._series.get(sensor)) is None or not fields.keys() <= series.keys():
+            series = self._create(sensor, fields)
+
+        for field, value in fields.items():
+            series[field].add(timestamp, float(value))
+
+    def _create(self, sensor: str, fields: Mapping[str, float]) -> Dict[str, Series]:
+        with self._lock:
+            series = dict(self._series.get(sensor, {}))
+            for field in fields:
+                if field not in series:
+                    series[field] = Series(self.capacity)
+            # Replaced rather than mutated, so that readers iterating the old mapping are unaffected.
+            self._series[sensor] = series
+            return series
+
+    def latest(self) -> Dict[str, Dict[str, Tuple[int, float]]]:
+        """
+        The newest sample of every field of every sensor.
+
+        Returns:
+            Dict[str, Dict[str, Tuple[int, float]]]: the timestamp (ns) and value of the newest sample of every field,
+            by sensor.
+        """
+        latest: Dict[str, Dict[str, Tuple[int, float]]] = {}
+        for sensor, series in list(self._series.items()):
+            for field, _series in series.items():
+                if (sample := _series.latest()) is not None:
+                    latest.setdefault(sensor, {})[field] = sample
+        return latest
+
+    def series(self, field: str, sensor: Optional[str] = None) -> Dict[str, Series]:
+        """
+        Args:
+            field (str): the field's name.
+            sensor (Optional[str]): only this sensor's series. (default: None)
+
+        Returns:
+            Dict[str, Series]: the series of the field, by sensor.
+        """
+        return {
+            name: series[field] for name, series in list(self._series.items())
+            if field in series and (sensor is None or name == sensor)
+        }
+
+
+readings = ReadingStore(int(env['READINGS_CAPACITY']))
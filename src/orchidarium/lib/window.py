@@ -0,0 +1,96 @@
+"""
+Streaming aggregates over a window of multi-field samples, for oversampling sensors.
+"""
+
+
+from __future__ import annotations
+
+from array import array
+from math import inf, sqrt
+from threading import Lock
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Dict, Sequence
+
+
+__all__ = [
+    'Window'
+]
+
+
+class Window:
+    """
+    Accumulate count, mean, min, max and standard deviation of several fields in O(1) time and memory per sample.
+
+    Means and variances are updated with Welford's algorithm, which stays numerically stable over long windows, and
+    all per-field state lives in flat `array('d')` buffers that are reused from one window to the next.
+
+    Args:
+        fields (Sequence[str]): field names, in the order their values are passed to `add()`.
+    """
+
+    def __init__(self, fields: Sequence[str]) -> None:
+        self.fields = tuple(fields)
+        self._lock = Lock()
+        self._count: int = 0
+        self._mean = array('d', bytes(8 * len(self.fields)))
+        self._m2 = array('d', bytes(8 * len(self.fields)))
+        self._min = array('d', [inf] * len(self.fields))
+        self._max = array('d', [-inf] * len(self.fields))
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def add(self, values: Sequence[float]) -> None:
+        """
+        Add one sample.
+
+        Args:
+            values (Sequence[float]): one value per field, in field order.
+        """
+        mean, m2, low, high = self._mean, self._m2, self._min, self._max
+
+        with self._lock:
+            self._count = k = self._count + 1
+            for i, x in enumerate(values):
+                delta = x - mean[i]
+                mean[i] += delta / k
+                m2[i] += delta * (x - mean[i])
+                if x < low[i]:
+                    low[i] = x
+                if x > high[i]:
+                    high[i] = x
+
+    def drain(self) -> Dict[str, Dict[str, float]]:
+        """
+        Return the aggregates of the current window and start a new one.
+
+        Returns:
+            Dict[str, Dict[str, float]]: for each field, its 'count', 'mean', 'min', 'max' and (sample) 'stddev'; empty
+            if no samples were added.
+        """
+        with self._lock:
+            k = self._count
+
+            if not k:
+                return {}
+
+            result = {
+                field: {
+                    'count': k,
+                    'mean': self._mean[i],
+                    'min': self._min[i],
+                    'max': self._max[i],
+                    'stddev': sqrt(self._m2[i] / (k - 1)) if k > 1 else 0.0
+                }
+                for i, field in enumerate(self.fields)
+            }
+
+            self._count = 0
+            for i in range(len(self.fields)):
+                self._mean[i] = self._m2[i] = 0.0
+                self._min[i], self._max[i] = inf, -inf
+
+        return result
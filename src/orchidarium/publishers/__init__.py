@@ -1 +1 @@
-from ._base import Publisher
\ No newline at end of file
+from ._base import AsyncPublisher, Publisher
@@ -5,6 +5,8 @@ ABC that defines the API for publishing metrics.
 
 from __future__ import annotations
 
+import logging
+
 from abc import abstractmethod, ABC
 from typing import TYPE_CHECKING
 
@@ -12,12 +14,59 @@ if TYPE_CHECKING:
     from typing import Any
 
 
+log = logging.getLogger(__name__)
+
+
 class Publisher(ABC):
 
+    @property
+    @abstractmethod
+    def connected(self) -> bool:
+        raise NotImplementedError
+
     @abstractmethod
     def connect(self) -> bool:
         raise NotImplementedError
 
+    @abstractmethod
+    def close(self) -> None:
+        raise NotImplementedError
+
     @abstractmethod
     def submit(self, datum: Any) -> bool:
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
+
+    def reconnect(self) -> bool:
+        """
+        Tear down any existing connection and open a fresh one.
+
+        Returns:
+            bool: True if the new connection was opened successfully, False otherwise.
+        """
+        log.info(f'Reconnecting publisher "{self.__class__.__name__}"')
+        self.close()
+        return self.connect()
+
+
+class AsyncPublisher(ABC):
+    """
+    A publisher whose connection lives on an asyncio event loop. `submit()` stays synchronous, non-blocking and
+    thread-safe, so that sensors running in executor threads can publish to it exactly as they would to a Publisher.
+    """
+
+    @property
+    @abstractmethod
+    def connected(self) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def connect(self) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def close(self) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def submit(self, datum: Any) -> bool:
+        raise NotImplementedError
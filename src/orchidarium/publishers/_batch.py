@@ -0,0 +1,376 @@
+"""
+Bounded in-process queue with a background flusher that hands records to a writer in batches.
+"""
+
+
+from __future__ import annotations
+
+import logging
+
+from collections import deque
+from pathlib import Path
+from threading import Condition, Thread
+from time import monotonic, perf_counter
+from orchidarium import env
+from orchidarium.lib.metrics import COUNT_BUCKETS, counter, gauge, histogram
+from orchidarium.lib.spool import Spool
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Callable, Deque, List, Literal, Optional
+
+    Backpressure = Literal['block', 'drop-oldest', 'spill']
+
+
+__all__ = [
+    'BatchMetrics',
+    'BatchWriter',
+    'open_spool',
+    'WriteError'
+]
+
+log = logging.getLogger(__name__)
+
+_batch_points = histogram('publisher_batch_points', 'Number of records sent per batch', buckets=COUNT_BUCKETS)
+_write_seconds = histogram('publisher_write_seconds', 'Time spent sending one batch')
+_write_errors = counter('publisher_write_errors_total', 'Batches that failed to send, by what was done with them', labels=('action',))
+_dropped = counter('publisher_dropped_total', 'Records dropped without being delivered or spilled')
+_queue_depth = gauge('publisher_queue_depth', 'Records waiting to be sent, by writer', labels=('writer',))
+
+
+class WriteError(Exception):
+    """
+    Raised by a writer to signal that a batch could not be delivered.
+
+    Args:
+        message (str): description of the failure.
+        retry (bool): whether the batch should be retried (True) or discarded (False). (default: True)
+    """
+    def __init__(self, message: str, retry: bool = True) -> None:
+        super().__init__(message)
+        self.retry = retry
+
+
+class BatchMetrics:
+    """
+    Report a writer's queue and batches in the shared publisher metrics, so that every publisher, threaded or asyncio,
+    feeds the same series.
+
+    Args:
+        writer (str): name of the writer, used as the queue depth's label.
+        depth (Callable[[], int]): returns the number of queued records; read at scrape time.
+    """
+
+    def __init__(self, writer: str, depth: Callable[[], int]) -> None:
+        _queue_depth.set_function(depth, writer)
+
+    @staticmethod
+    def record_sent(records: int, seconds: float) -> None:
+        """
+        Record a batch that was delivered.
+
+        Args:
+            records (int): number of records in the batch.
+            seconds (float): time spent sending it.
+        """
+        _write_seconds.observe(seconds)
+        _batch_points.observe(records)
+
+    @staticmethod
+    def record_failure(action: str) -> None:
+        """
+        Record a batch that failed to send.
+
+        Args:
+            action (str): what was done with it: 'discard', 'spill', 'drop' or 'retry'.
+        """
+        _write_errors.inc(action)
+
+    @staticmethod
+    def record_dropped(count: int = 1) -> None:
+        """
+        Record records that were dropped without being delivered or spilled.
+
+        Args:
+            count (int): number of records. (default: 1)
+        """
+        _dropped.inc(amount=count)
+
+
+def open_spool() -> Optional[Spool]:
+    """
+    Open the on-disk spool that holds points that could not be delivered, if one is configured.
+
+    Returns:
+        Optional[Spool]: the spool, or None if spooling is disabled or its directory is unusable.
+    """
+    if not env['SPOOL_PATH']:
+        log.warning(f'SPOOL_PATH is unset, points that cannot be delivered will be lost')
+        return None
+
+    try:
+        return Spool(
+            path=Path(env['SPOOL_PATH']),
+            max_bytes=int(env['SPOOL_MAX_BYTES']),
+            segment_bytes=int(env['SPOOL_SEGMENT_BYTES'])
+        )
+    except OSError as e:
+        log.error(f'Could not open spool at "{env["SPOOL_PATH"]}", points that cannot be delivered will be lost: {e}')
+        return None
+
+
+class BatchWriter:
+    """
+    Take records off the sampling path and deliver them in batches from a background thread.
+
+    A batch is flushed once it reaches `batch_size` records or its oldest record is `flush_interval` seconds old. When
+    the queue is full, `backpressure` decides whether `put()` blocks, evicts the oldest record, or spills the new record
+    to disk. If a `spill` target is configured, batches that fail to send are handed to it instead of being retried, so
+    an outage never stalls the queue.
+
+    Args:
+        write (Callable[[List[bytes]], None]): delivers a batch, raising WriteError on failure.
+        batch_size (int): flush once this many records are queued. (default: 500)
+        flush_interval (float): flush once the oldest queued record is this many seconds old. (default: 10.0)
+        max_queue (int): maximum number of queued records. (default: 10_000)
+        backpressure (Backpressure): policy applied when the queue is full. (default: 'block')
+        spill (Optional[Callable[[List[bytes]], bool]]): durable store for records that cannot be delivered. (default: None)
+        name (str): name of the flusher thread. (default: 'publisher')
+
+    Raises:
+        ValueError: if the backpressure policy is unknown, or is 'spill' without a spill target.
+    """
+
+    def __init__(self,
+                 write: Callable[[List[bytes]], None],
+                 batch_size: int = 500,
+                 flush_interval: float = 10.0,
+                 max_queue: int = 10_000,
+                 backpressure: Backpressure = 'block',
+                 spill: Optional[Callable[[List[bytes]], bool]] = None,
+                 name: str = 'publisher') -> None:
+        if backpressure not in ('block', 'drop-oldest', 'spill'):
+            raise ValueError(f'Unknown backpressure policy "{backpressure}"')
+        if backpressure == 'spill' and spill is None:
+            raise ValueError(f'The "spill" backpressure policy requires a spill target')
+
+        self._write = write
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.backpressure = backpressure
+        self._spill_to = spill
+        self._name = name
+
+        self._queue: Deque[bytes] = deque()
+        self._oldest: float = 0.0
+        self._cond = Condition()
+        self._closing: bool = False
+        self._thread: Optional[Thread] = None
+
+        # Statistics.
+        self.dropped: int = 0
+        self.spilled: int = 0
+        self.failed_batches: int = 0
+
+        # The queue depth is read at scrape time rather than updated on every put().
+        self._metrics = BatchMetrics(name, lambda: len(self._queue))
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """
+        Start the background flusher if it is not already running.
+        """
+        if self.running:
+            return
+
+        self._closing = False
+        self._thread = Thread(target=self._run, daemon=True, name=f'{self._name}-flusher')
+        self._thread.start()
+
+    def put(self, record: bytes) -> bool:
+        """
+        Enqueue a record for delivery, applying the backpressure policy if the queue is full.
+
+        Args:
+            record (bytes): a single encoded record.
+
+        Returns:
+            bool: True if the record was queued or spilled, False if it was dropped.
+        """
+        _full = False
+        with self._cond:
+            if self._closing:
+                log.error(f'Writer "{self._name}" is closed, dropping record')
+                self._drop()
+                return False
+
+            if len(self._queue) >= self.max_queue:
+                if self.backpressure == 'block':
+                    while len(self._queue) >= self.max_queue and not self._closing:
+                        self._cond.wait()
+                    if self._closing:
+                        self._drop()
+                        return False
+                elif self.backpressure == 'drop-oldest':
+                    self._queue.popleft()
+                    self._drop()
+                    if self.dropped % self.max_queue == 1:
+                        log.warning(f'Writer "{self._name}" queue is full, dropped {self.dropped} record(s) so far')
+                else:
+                    _full = True
+
+            if not _full:
+                self._queue.append(record)
+
+                # Wake the flusher when the queue starts filling (to arm its age timer) or a batch is full.
+                if len(self._queue) == 1:
+                    self._oldest = monotonic()
+                    self._cond.notify_all()
+                elif len(self._queue) >= self.batch_size:
+                    self._cond.notify_all()
+
+        # Spill outside the lock, so that the disk write does not stall the flusher or other producers.
+        return self._spill([record]) if _full else True
+
+    def flush(self) -> None:
+        """
+        Ask the flusher to send whatever is queued now instead of waiting for the batch to fill.
+        """
+        with self._cond:
+            self._oldest = 0.0
+            self._cond.notify_all()
+
+    def close(self, timeout: float = 30.0) -> None:
+        """
+        Stop accepting records, flush everything that is queued and stop the flusher.
+
+        Args:
+            timeout (float): seconds to wait for the final flush. (default: 30.0)
+        """
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            if self._thread.is_alive():
+                log.error(f'Writer "{self._name}" did not finish flushing within {timeout}s, {self.depth} record(s) left in queue')
+            self._thread = None
+
+        if self._queue and self._spill_to is not None:
+            with self._cond:
+                _remaining = list(self._queue)
+                self._queue.clear()
+            self._spill(_remaining)
+
+    def _take(self) -> List[bytes]:
+        """
+        Block until a batch is due, then remove and return it.
+
+        Returns:
+            List[bytes]: up to `batch_size` records; empty once the writer is closed and drained.
+        """
+        with self._cond:
+            while True:
+                if len(self._queue) >= self.batch_size or (self._closing and self._queue):
+                    break
+                if self._queue and monotonic() - self._oldest >= self.flush_interval:
+                    break
+                if self._closing:
+                    return []
+
+                _wait = self.flush_interval - (monotonic() - self._oldest) if self._queue else None
+                self._cond.wait(_wait)
+
+            batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+            self._oldest = monotonic()
+            # Wake any producers blocked on a full queue.
+            self._cond.notify_all()
+
+            return batch
+
+    def _drop(self, count: int = 1) -> None:
+        self.dropped += count
+        self._metrics.record_dropped(count)
+
+    def _run(self) -> None:
+        _pending: List[bytes] = []
+
+        while True:
+            if not _pending:
+                _pending = self._take()
+                if not _pending:
+                    return
+
+            try:
+                _start = perf_counter()
+                self._deliver(_pending)
+                self._metrics.record_sent(len(_pending), perf_counter() - _start)
+                _pending = []
+            except WriteError as e:
+                self.failed_batches += 1
+                if not e.retry:
+                    self._metrics.record_failure('discard')
+                    log.error(f'Writer "{self._name}" discarding batch of {len(_pending)} record(s): {e}')
+                    self._drop(len(_pending))
+                    _pending = []
+                elif self._spill_to is not None:
+                    self._metrics.record_failure('spill')
+                    log.warning(f'Writer "{self._name}" failed to send batch of {len(_pending)} record(s), spilling it: {e}')
+                    self._spill(_pending)
+                    _pending = []
+                elif self._closing:
+                    self._metrics.record_failure('drop')
+                    log.error(f'Writer "{self._name}" failed to flush {len(_pending)} record(s) on shutdown: {e}')
+                    self._drop(len(_pending))
+                    _pending = []
+                else:
+                    self._metrics.record_failure('retry')
+                    log.warning(f'Writer "{self._name}" failed to send batch of {len(_pending)} record(s), retrying in {self.flush_interval}s: {e}')
+                    with self._cond:
+                        self._cond.wait_for(lambda: self._closing, timeout=self.flush_interval)
+
+    def _deliver(self, batch: List[bytes]) -> None:
+        """
+        Hand a batch to the writer, treating anything it raises as a failed delivery so that the batch is spilled or
+        retried rather than the flusher thread dying with it.
+
+        Args:
+            batch (List[bytes]): records to deliver.
+
+        Raises:
+            WriteError: if the batch could not be delivered.
+        """
+        try:
+            self._write(batch)
+        except WriteError:
+            raise
+        except Exception as e:
+            log.exception(f'Writer "{self._name}" raised an unexpected error')
+            raise WriteError(f'Unexpected error: {e!r}') from e
+
+    def _spill(self, records: List[bytes]) -> bool:
+        """
+        Hand records to the spill target, dropping them if it cannot take them.
+
+        Args:
+            records (List[bytes]): records to spill.
+
+        Returns:
+            bool: True if the records were spilled, False if they were dropped.
+        """
+        if self._spill_to is not None and self._spill_to(records):
+            self.spilled += len(records)
+            return True
+
+        log.error(f'Writer "{self._name}" could not spill {len(records)} record(s)')
+        self._drop(len(records))
+        return False
@@ -7,16 +7,19 @@ from __future__ import annotations
 
 import logging
 
-from time import sleep
+from time import monotonic, sleep, time_ns
+from urllib3.exceptions import HTTPError
 from . import Publisher
-from influxdb_client import InfluxDBClient, Point
+from ._batch import BatchWriter, WriteError, open_spool
+from orchidarium.lib.metrics import counter
+from influxdb_client import InfluxDBClient, Point, WritePrecision
 from influxdb_client.rest import ApiException
 from influxdb_client.client.write_api import SYNCHRONOUS
 from orchidarium import env
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
-    from typing import Any, List
+    from typing import Any, Dict, List
 
 
 __all__ = [
@@ -25,6 +28,8 @@ __all__ = [
 
 log = logging.getLogger(__name__)
 
+_reconnects = counter('publisher_reconnects_total', 'Attempts by the flusher to reopen a lost connection, by outcome', labels=('outcome',))
+
 
 class InfluxDBPublisher(Publisher):
     """
@@ -33,48 +38,256 @@ class InfluxDBPublisher(Publisher):
 
     def __init__(self):
         self._client: Any = None
+        self._write_api: Any = None
+        # Set by the flusher when a write fails for reasons other than bad data, so that it reconnects before the next.
+        self._degraded: bool = False
+        self._retry_at: float = 0.0
+        self._spool = open_spool()
+        self._writer = BatchWriter(
+            write=self._write,
+            batch_size=int(env['INFLUXDB_BATCH_SIZE']),
+            flush_interval=float(env['INFLUXDB_FLUSH_INTERVAL']),
+            max_queue=int(env['INFLUXDB_QUEUE_SIZE']),
+            backpressure=env['INFLUXDB_BACKPRESSURE'],  # type: ignore[arg-type]
+            spill=self._spool.append if self._spool else None,
+            name='influxdb'
+        )
+
+    @property
+    def connected(self) -> bool:
+        return self._client is not None and not self._degraded
 
     def connect(self) -> bool:
+        """
+        Start the background writer and open the connection to InfluxDB. The writer is started even if InfluxDB is
+        unreachable, so that points are spooled (or retried) rather than piling up in the queue, and the flusher
+        reconnects once InfluxDB comes back.
+
+        Returns:
+            bool: True if InfluxDB answered, False otherwise.
+        """
+        self._writer.start()
+
         # Guard against re-opening the connection.
+        if self._client:
+            log.warning(f'Connection to InfluxDB host {env["INFLUXDB_HOST"]} is already open')
+            return True
+
         log.info(f'Opening connection to InfluxDB host at "{env["INFLUXDB_HOST"]}"')
 
-        if not self._client:
-            for i in range(3):
-                try:
-                    self._client = InfluxDBClient(
-                        url=env['INFLUXDB_HOST'],
-                        org=env['INFLUXDB_ORG'],
-                        token=env['INFLUXDB_TOKEN'],
-                        database=env['INFLUXDB_DATABASE']
-                    )
-                    break
-                except ApiException as e:
-                    log.warning(f'Connection attempt {i + 1} / 3 to InfluxDB host "{env["INFLUXDB_HOST"]}" failed: {e}')
-                    sleep(1)
-            else:
-                log.error(f'Could not connect to InfluxDB host "{env["INFLUXDB_HOST"]}" after 3 attempts')
-
-            log.info(f'Successfully opened connection to InfluxDB host "{env["INFLUXDB_HOST"]}"')
+        for i in range(3):
+            if self._open(attempt=f'{i + 1} / 3'):
+                break
+            sleep(1)
         else:
-            log.warning(f'Connection to InfluxDB host {env["INFLUXDB_HOST"]} is already open')
+            log.error(f'Could not connect to InfluxDB host "{env["INFLUXDB_HOST"]}" after 3 attempts, points will be spooled or retried until it is reachable')
+            self._retry_at = monotonic() + self._writer.flush_interval
+            return False
+
+        log.info(f'Successfully opened connection to InfluxDB host "{env["INFLUXDB_HOST"]}"')
+
+        return True
+
+    def _open(self, attempt: str = '1') -> bool:
+        """
+        Make one attempt at opening a client and checking that the host answers.
+
+        Args:
+            attempt (str): which attempt this is, for logging. (default: '1')
 
-        return bool(self._client)
+        Returns:
+            bool: True if the host answered, False otherwise.
+        """
+        try:
+            # The client's connection pool keeps the HTTP connection alive between batches.
+            client = InfluxDBClient(
+                url=env['INFLUXDB_HOST'],
+                org=env['INFLUXDB_ORG'],
+                token=env['INFLUXDB_TOKEN'],
+                database=env['INFLUXDB_DATABASE'],
+                enable_gzip=True
+            )
+
+            # The client is lazy; ping the host so that a dead connection is caught here rather than on first write.
+            if client.ping():
+                self._client = client
+                # Batching is handled by our own writer, so each batch is sent as a single synchronous request.
+                self._write_api = client.write_api(write_options=SYNCHRONOUS)
+                self._degraded = False
+                return True
+
+            client.close()
+            log.warning(f'Connection attempt {attempt} to InfluxDB host "{env["INFLUXDB_HOST"]}" failed: host did not respond to ping')
+        except ApiException as e:
+            log.warning(f'Connection attempt {attempt} to InfluxDB host "{env["INFLUXDB_HOST"]}" failed: {e}')
+
+        return False
+
+    def _recover(self) -> bool:
+        """
+        Reopen a lost (or never opened) connection from the flusher thread, at most once per flush interval, so that an
+        outage costs one ping per interval rather than holding up sampling or every batch.
+
+        Returns:
+            bool: True if the connection is usable, False otherwise.
+        """
+        if self._write_api is not None and not self._degraded:
+            return True
+
+        if (_now := monotonic()) < self._retry_at:
+            return False
+        self._retry_at = _now + self._writer.flush_interval
+
+        log.info(f'Reconnecting to InfluxDB host "{env["INFLUXDB_HOST"]}"')
+        self._close_client()
+        _ok = self._open()
+        _reconnects.inc('ok' if _ok else 'failed')
+
+        return _ok
+
+    def reconnect(self) -> bool:
+        """
+        Replace the client without stopping the writer, so queued points survive the reconnect.
+
+        Returns:
+            bool: True if the new connection was opened successfully, False otherwise.
+        """
+        log.info(f'Reconnecting to InfluxDB host "{env["INFLUXDB_HOST"]}"')
+        self._close_client()
+        return self.connect()
+
+    def close(self) -> None:
+        # Flush everything that's queued before the connection goes away.
+        self._writer.close()
+        self._close_client()
+        if self._spool:
+            self._spool.close()
+
+    def _close_client(self) -> None:
+        if self._client:
+            log.info(f'Closing connection to InfluxDB host "{env["INFLUXDB_HOST"]}"')
+            self._client.close()
+            self._client = None
+            self._write_api = None
+
+    @property
+    def queue_depth(self) -> int:
+        return self._writer.depth
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report the state of the write queue.
+
+        Returns:
+            Dict[str, int]: queued, dropped and spilled record counts, and the number of failed batches.
+        """
+        return {
+            'queued': self._writer.depth,
+            'dropped': self._writer.dropped,
+            'spilled': self._writer.spilled,
+            'failed_batches': self._writer.failed_batches
+        }
 
     def __enter__(self) -> InfluxDBPublisher:
         self.connect()
         return self
 
     def __exit__(self, *args: Any) -> Any:
-        self._client.close()
+        self.close()
 
-    def submit(self, datum: Any) -> bool:
+    def submit(self, datum: Point | str | bytes) -> bool:
         """
+        Queue a datapoint to be written to InfluxDB in the background.
 
+        Points without a timestamp are stamped with the time of submission, so that the time recorded in InfluxDB
+        reflects when the sample was taken rather than when its batch was flushed.
 
         Args:
-            datum (Any): _description_
+            datum (Point | str | bytes): a Point, or a line-protocol record with a nanosecond timestamp (e.g. from a
+                `lib.lineprotocol.Schema`), which is queued as-is.
 
         Returns:
-            bool: _description_
+            bool: True if the datapoint was queued or spilled, False if it was dropped.
+        """
+        record: bytes
+        if isinstance(datum, bytes):
+            record = datum
+        elif isinstance(datum, Point):
+            if datum._time is None:
+                datum.time(time_ns(), WritePrecision.NS)
+            record = datum.to_line_protocol(precision=WritePrecision.NS).encode('utf-8')
+        else:
+            record = datum.encode('utf-8')
+
+        return self._writer.put(record)
+
+    def _write(self, batch: List[bytes]) -> None:
         """
-        return True
\ No newline at end of file
+        Send a batch of line-protocol records in one request, then replay the oldest SPOOL_REPLAY_SEGMENTS segments of
+        the spool if the connection has recovered. The spool is drained a few segments per flush, so that a large
+        backlog does not hold up the queue; a WriteError from the batch itself propagates to the writer.
+
+        Args:
+            batch (List[bytes]): line-protocol records with nanosecond timestamps.
+        """
+        self._send(b'\n'.join(batch))
+
+        if self._spool and self._spool.pending:
+            log.info(f'Connection to InfluxDB host "{env["INFLUXDB_HOST"]}" is healthy, replaying spooled points')
+            try:
+                self._spool.replay(
+                    self._replay_send,
+                    chunk_bytes=int(env['SPOOL_REPLAY_CHUNK_BYTES']),
+                    max_segments=int(env['SPOOL_REPLAY_SEGMENTS'])
+                )
+            except WriteError as e:
+                log.warning(f'Spool replay interrupted, will resume after the next successful write: {e}')
+
+    def _replay_send(self, body: bytes) -> None:
+        """
+        Send a replayed chunk, discarding it (rather than stalling the replay forever) if InfluxDB rejects its contents.
+
+        Args:
+            body (bytes): line-protocol records with nanosecond timestamps.
+
+        Raises:
+            WriteError: if the chunk could not be delivered but may be retried, to stop the replay.
+        """
+        try:
+            self._send(body)
+        except WriteError as e:
+            if e.retry:
+                raise
+            log.error(f'Discarding spooled chunk of {len(body)} bytes: {e}')
+
+    def _send(self, body: bytes) -> None:
+        """
+        Write a newline-delimited body of line-protocol records to InfluxDB.
+
+        Args:
+            body (bytes): line-protocol records with nanosecond timestamps.
+
+        Raises:
+            WriteError: if the body could not be delivered.
+        """
+        # Fail fast while the connection is known to be bad, so batches go straight to the spool instead of waiting on
+        # network timeouts, until a reconnect succeeds.
+        if not self._recover() or (write_api := self._write_api) is None:
+            raise WriteError(f'Not connected to InfluxDB host "{env["INFLUXDB_HOST"]}"')
+
+        try:
+            write_api.write(
+                bucket=env['INFLUXDB_DATABASE'],
+                org=env['INFLUXDB_ORG'],
+                record=body,
+                write_precision=WritePrecision.NS
+            )
+        except ApiException as e:
+            # Client errors mean the data itself was rejected and retrying it would never succeed.
+            if e.status is not None and 400 <= e.status < 500 and e.status != 429:
+                raise WriteError(f'InfluxDB rejected batch: {e.status} {e.reason}', retry=False) from e
+            self._degraded = True
+            raise WriteError(f'InfluxDB write failed: {e.status} {e.reason}') from e
+        except (HTTPError, OSError) as e:
+            self._degraded = True
+            raise WriteError(f'InfluxDB write failed: {e}') from e
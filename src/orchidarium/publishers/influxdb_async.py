@@ -0,0 +1,324 @@
+"""
+Provide an InfluxDB publisher that writes from the asyncio event loop, for the asyncio runtime.
+"""
+
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import logging
+
+from collections import deque
+from time import perf_counter, time_ns
+from urllib.parse import urlencode
+from influxdb_client import Point, WritePrecision
+from . import AsyncPublisher
+from ._batch import BatchMetrics, WriteError, open_spool
+from orchidarium.lib.http import AsyncHTTPConnection
+from orchidarium import env
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Any, Deque, Dict, List, Optional
+    from orchidarium.lib.spool import Spool
+
+
+__all__ = [
+    'AsyncInfluxDBPublisher'
+]
+
+log = logging.getLogger(__name__)
+
+# Bodies smaller than this are sent uncompressed; gzip costs more than it saves on a handful of points.
+_GZIP_MIN_BYTES = 1024
+
+
+class AsyncInfluxDBPublisher(AsyncPublisher):
+    """
+    Queue points in memory and write them to InfluxDB's v2 HTTP API in batches from a task on the event loop.
+
+    The queue is bounded and drops its oldest points when full. Batches that fail to send are spilled to the same
+    on-disk spool as InfluxDBPublisher's (if SPOOL_PATH is set) or retried after INFLUXDB_FLUSH_INTERVAL, and the spool is
+    replayed once writes succeed again.
+    """
+
+    def __init__(self) -> None:
+        self.batch_size = int(env['INFLUXDB_BATCH_SIZE'])
+        self.flush_interval = float(env['INFLUXDB_FLUSH_INTERVAL'])
+        self.max_queue = int(env['INFLUXDB_QUEUE_SIZE'])
+        if env['INFLUXDB_BACKPRESSURE'] != 'drop-oldest':
+            log.warning(f'INFLUXDB_BACKPRESSURE "{env["INFLUXDB_BACKPRESSURE"]}" is not supported by the asyncio runtime, dropping the oldest points instead')
+
+        self._http = AsyncHTTPConnection(env['INFLUXDB_HOST'])
+        self._target = '/api/v2/write?' + urlencode({
+            'org': env['INFLUXDB_ORG'],
+            'bucket': env['INFLUXDB_DATABASE'],
+            'precision': 'ns'
+        })
+        self._headers = {
+            'Authorization': f'Token {env["INFLUXDB_TOKEN"]}',
+            'Content-Type': 'text/plain; charset=utf-8'
+        }
+        self._spool: Optional[Spool] = open_spool()
+
+        # Appending to a deque is atomic, so sensors in executor threads can submit without taking a lock.
+        self._queue: Deque[bytes] = deque(maxlen=self.max_queue)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._closing: bool = False
+        self._connected: bool = False
+
+        # Statistics.
+        self.dropped: int = 0
+        self.spilled: int = 0
+        self.failed_batches: int = 0
+
+        self._metrics = BatchMetrics('influxdb', lambda: len(self._queue))
+
+    @property
+    def connected(self) -> bool:
+        return self._connected
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Report the state of the write queue.
+
+        Returns:
+            Dict[str, int]: queued, dropped and spilled record counts, and the number of failed batches.
+        """
+        return {
+            'queued': len(self._queue),
+            'dropped': self.dropped,
+            'spilled': self.spilled,
+            'failed_batches': self.failed_batches
+        }
+
+    async def connect(self) -> bool:
+        """
+        Ping InfluxDB and start the flusher on the running event loop. The flusher is started even if the ping fails,
+        so that points are spooled (or retried) until InfluxDB comes back.
+
+        Returns:
+            bool: True if InfluxDB answered the ping, False otherwise.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._closing = False
+
+        log.info(f'Opening connection to InfluxDB host at "{self._http.origin}"')
+        self._connected = await self._ping()
+        if not self._connected:
+            log.error(f'Could not connect to InfluxDB host "{self._http.origin}", points will be spooled or retried until it is reachable')
+
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._run(), name='influxdb-flusher')
+
+        return self._connected
+
+    async def close(self) -> None:
+        """
+        Flush everything that is queued (spilling or dropping what cannot be sent) and close the connection.
+        """
+        self._closing = True
+        if self._wakeup is not None:
+            self._wakeup.set()
+        if self._flusher is not None:
+            await self._flusher
+            self._flusher = None
+        await self._http.close()
+        if self._spool:
+            self._spool.close()
+
+    def submit(self, datum: Point | str | bytes) -> bool:
+        """
+        Queue a datapoint to be written to InfluxDB from the event loop. Safe to call from any thread.
+
+        Points without a timestamp are stamped with the time of submission, so that the time recorded in InfluxDB
+        reflects when the sample was taken rather than when its batch was flushed.
+
+        Args:
+            datum (Point | str | bytes): a Point, or a line-protocol record with a nanosecond timestamp (e.g. from a
+                `lib.lineprotocol.Schema`), which is queued as-is.
+
+        Returns:
+            bool: True if the datapoint was queued, False if the publisher is closed.
+        """
+        if self._closing:
+            log.error(f'Publisher is closed, dropping record')
+            self._drop()
+            return False
+
+        record: bytes
+        if isinstance(datum, bytes):
+            record = datum
+        elif isinstance(datum, Point):
+            if datum._time is None:
+                datum.time(time_ns(), WritePrecision.NS)
+            record = datum.to_line_protocol(precision=WritePrecision.NS).encode('utf-8')
+        else:
+            record = datum.encode('utf-8')
+
+        if len(self._queue) == self.max_queue:
+            self._drop()
+            if self.dropped % self.max_queue == 1:
+                log.warning(f'Publisher queue is full, dropped {self.dropped} record(s) so far')
+
+        self._queue.append(record)
+
+        # Wake the flusher once per full batch; it checks for further full batches itself before waiting again.
+        if len(self._queue) == self.batch_size and self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+        return True
+
+    def _drop(self, count: int = 1) -> None:
+        self.dropped += count
+        self._metrics.record_dropped(count)
+
+    def _take(self) -> List[bytes]:
+        queue = self._queue
+        return [queue.popleft() for _ in range(min(self.batch_size, len(queue)))]
+
+    async def _run(self) -> None:
+        assert self._wakeup is not None
+
+        _pending: List[bytes] = []
+
+        while True:
+            if not _pending:
+                if len(self._queue) < self.batch_size and not self._closing:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                    self._wakeup.clear()
+
+                _pending = self._take()
+                if not _pending:
+                    if self._closing:
+                        return
+                    continue
+
+            try:
+                _start = perf_counter()
+                await self._send(b'\n'.join(_pending))
+                self._metrics.record_sent(len(_pending), perf_counter() - _start)
+                _pending = []
+            except WriteError as e:
+                self.failed_batches += 1
+                if not e.retry:
+                    self._metrics.record_failure('discard')
+                    log.error(f'Discarding batch of {len(_pending)} record(s): {e}')
+                    self._drop(len(_pending))
+                    _pending = []
+                elif self._spool is not None:
+                    self._metrics.record_failure('spill')
+                    log.warning(f'Failed to send batch of {len(_pending)} record(s), spilling it: {e}')
+                    await self._spill(_pending)
+                    _pending = []
+                elif self._closing:
+                    self._metrics.record_failure('drop')
+                    log.error(f'Failed to flush {len(_pending)} record(s) on shutdown: {e}')
+                    self._drop(len(_pending))
+                    _pending = []
+                else:
+                    self._metrics.record_failure('retry')
+                    log.warning(f'Failed to send batch of {len(_pending)} record(s), retrying in {self.flush_interval}s: {e}')
+                    await asyncio.sleep(self.flush_interval)
+                continue
+
+            if self._spool is not None and self._spool.pending:
+                await self._replay()
+
+    async def _spill(self, records: List[bytes]) -> None:
+        assert self._spool is not None and self._loop is not None
+
+        # The spool writes (and may fsync) to disk, which must not stall the event loop.
+        if await self._loop.run_in_executor(None, self._spool.append, records):
+            self.spilled += len(records)
+        else:
+            log.error(f'Could not spill {len(records)} record(s)')
+            self._drop(len(records))
+
+    async def _replay(self) -> None:
+        assert self._spool is not None and self._loop is not None
+
+        loop = self._loop
+        log.info(f'Connection to InfluxDB host "{self._http.origin}" is healthy, replaying spooled points')
+
+        def _send(body: bytes) -> None:
+            # Called from the executor thread reading the spool; the request itself is made on the event loop.
+            try:
+                asyncio.run_coroutine_threadsafe(self._send(body), loop).result()
+            except WriteError as e:
+                if e.retry:
+                    raise
+                log.error(f'Discarding spooled chunk of {len(body)} bytes: {e}')
+
+        try:
+            # A few segments per flush, so that a large backlog does not hold up the queue.
+            await loop.run_in_executor(
+                None,
+                self._spool.replay,
+                _send,
+                int(env['SPOOL_REPLAY_CHUNK_BYTES']),
+                int(env['SPOOL_REPLAY_SEGMENTS'])
+            )
+        except WriteError as e:
+            log.warning(f'Spool replay interrupted, will resume after the next successful write: {e}')
+
+    async def _ping(self) -> bool:
+        try:
+            return (await self._http.request('GET', '/ping')).ok
+        except (OSError, asyncio.TimeoutError) as e:
+            log.warning(f'InfluxDB host "{self._http.origin}" did not respond to ping: {e}')
+            return False
+
+    async def _send(self, body: bytes) -> None:
+        """
+        Write a newline-delimited body of line-protocol records to InfluxDB.
+
+        Args:
+            body (bytes): line-protocol records with nanosecond timestamps.
+
+        Raises:
+            WriteError: if the body could not be delivered.
+        """
+        # Fail fast while the connection is known to be bad, so batches go straight to the spool instead of waiting on
+        # network timeouts, until InfluxDB answers a ping again.
+        if not self._connected and not (await self._ping()):
+            raise WriteError(f'Not connected to InfluxDB host "{self._http.origin}"')
+
+        headers = self._headers
+        if len(body) >= _GZIP_MIN_BYTES:
+            body = gzip.compress(body, compresslevel=1)
+            headers = {**headers, 'Content-Encoding': 'gzip'}
+
+        try:
+            response = await self._http.request('POST', self._target, body, headers)
+        except (OSError, asyncio.TimeoutError) as e:
+            self._connected = False
+            raise WriteError(f'InfluxDB write failed: {e!r}') from e
+
+        if response.ok:
+            self._connected = True
+            return
+
+        # Client errors mean the data itself was rejected and retrying it would never succeed.
+        if 400 <= response.status < 500 and response.status != 429:
+            raise WriteError(f'InfluxDB rejected batch: {response.status} {response.reason}', retry=False)
+        self._connected = False
+        raise WriteError(f'InfluxDB write failed: {response.status} {response.reason}')
+
+    async def __aenter__(self) -> AsyncInfluxDBPublisher:
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.close()
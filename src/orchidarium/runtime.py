@@ -0,0 +1,254 @@
+"""
+Long-lived runtime that owns the sensors, worker pool and publisher connection for the life of the daemon.
+"""
+
+
+from __future__ import annotations
+
+import logging
+import traceback
+
+from contextlib import AbstractContextManager
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from orchidarium import env
+from orchidarium.lib.health import registry
+from orchidarium.lib.metrics import histogram, summary
+from orchidarium.lib.scheduler import Scheduler
+from orchidarium.sensors import IsolatedSensor, sensor_specs, SensorSpec
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Type
+    from orchidarium.publishers import Publisher
+    from orchidarium.sensors import Sensor
+
+
+__all__ = [
+    'create_sensors',
+    'Runtime'
+]
+
+log = logging.getLogger(__name__)
+
+_setup_seconds = summary('runtime_setup_seconds', 'Time spent creating sensors, the worker pool and the publisher connection.')
+_sample_seconds = histogram('sensor_sample_seconds', 'Time spent collecting and publishing one sample, by sensor', labels=('sensor',))
+
+
+def create_sensors(specs: Iterable[SensorSpec], isolated: bool = False) -> List[Sensor]:
+    """
+    Instantiate every sensor, once per matching USB device for those that select a USB device.
+
+    Args:
+        specs (Iterable[SensorSpec]): the sensors to instantiate.
+        isolated (bool): run each instance in its own worker process (see IsolatedSensor). (default: False)
+
+    Returns:
+        List[Sensor]: the sensor instances.
+    """
+    return [sensor for spec in specs for sensor in _create(spec, isolated=isolated)]
+
+
+def _create(spec: SensorSpec, isolated: bool = False) -> List[Sensor]:
+    """
+    Instantiate one sensor once per matching USB device, or once if it does not select a USB device.
+
+    Args:
+        spec (SensorSpec): the sensor to instantiate.
+        isolated (bool): run each instance in its own worker process. (default: False)
+
+    Returns:
+        List[Sensor]: the sensor instances.
+    """
+    create: Callable[..., Sensor] = partial(IsolatedSensor, spec) if isolated else spec.create  # type: ignore[assignment]
+
+    if not {'idVendor', 'idProduct'} <= spec.selector.keys():
+        return [create()]
+
+    from orchidarium.lib.bus import devices
+
+    identities = list(devices.enumerate(spec.selector['idVendor'], spec.selector['idProduct']))
+
+    if not identities:
+        # Keep a sensor around so that the device shows up as unhealthy, and is picked up once it is plugged in.
+        log.warning(f'No device found for sensor "{spec.name}", it will keep looking for the first matching device')
+        return [create()]
+
+    log.info(f'Found {len(identities)} device(s) for sensor "{spec.name}": {", ".join(identities)}')
+
+    return [create(device=identity) for identity in identities]
+
+
+class Runtime(AbstractContextManager):
+    """
+    Create sensors, a worker pool and a publisher connection once, and reuse them for every sample.
+
+    Args:
+        publisher (Optional[Callable[[], Publisher]]): factory for the Publisher that the sensors submit data to; None to only collect.
+        sensors (Optional[Iterable[Type[Sensor] | SensorSpec]]): sensors to run; every enabled sensor in the registry if omitted. (default: None)
+    """
+
+    def __init__(self, publisher: Optional[Callable[[], Publisher]], sensors: Optional[Iterable[Type[Sensor] | SensorSpec]] = None) -> None:
+        self._publisher_factory = publisher
+        self._specs: Tuple[SensorSpec, ...] = tuple(
+            s if isinstance(s, SensorSpec) else SensorSpec.of(s) for s in sensors
+        ) if sensors is not None else sensor_specs()
+        self.sensors: List[Sensor] = []
+        self.publisher: Optional[Publisher] = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._scheduler: Optional[Scheduler] = None
+
+    def start(self) -> None:
+        """
+        Instantiate every sensor, start the worker pool and open the publisher connection, if there is a publisher.
+        """
+        with _setup_seconds.time():
+            _isolated = env['SENSOR_ISOLATION'] == 'process'
+            self.sensors = create_sensors(self._specs, isolated=_isolated)
+            # The pool is bounded independently of the number of sensors; with many devices, samples that come due
+            # together queue briefly for a worker rather than each holding a thread of their own.
+            self._pool = ThreadPoolExecutor(
+                max_workers=max(min(len(self.sensors), int(env['SENSOR_WORKERS'])), 1),
+                thread_name_prefix='sensor'
+            )
+            self._scheduler = Scheduler(submit=self._pool.submit)
+            if self._publisher_factory is not None:
+                self.publisher = self._publisher_factory()
+                self.publisher.connect()
+
+        log.info(f'Started runtime with {len(self.sensors)} sensor(s) in {_setup_seconds.snapshot()["last"]:.4f}s')
+
+    def collect(self) -> Dict[str, Optional[Dict[str, float]]]:
+        """
+        Collect from every sensor once, in parallel on the shared pool, without publishing anything.
+
+        Returns:
+            Dict[str, Optional[Dict[str, float]]]: each sensor's fields, or None if its collection failed.
+
+        Raises:
+            RuntimeError: if the runtime has not been started.
+        """
+        if self._pool is None:
+            raise RuntimeError('Runtime must be started before collecting')
+
+        futures = {sensor.name: self._pool.submit(sensor.collect) for sensor in self.sensors}
+        readings: Dict[str, Optional[Dict[str, float]]] = {}
+
+        for sensor in self.sensors:
+            try:
+                readings[sensor.name] = sensor.fields if futures[sensor.name].result() else None
+            except Exception:
+                log.error(f'Sensor "{sensor.name}" failed. Full traceback: {traceback.format_exc()}')
+                readings[sensor.name] = None
+
+        return readings
+
+    def run(self) -> None:
+        """
+        Sample every sensor on its own period until `stop()` is called.
+
+        Each sensor is scheduled independently on the shared pool, so a slow or stuck sensor only delays (and skips) its
+        own ticks rather than holding up the rest.
+        """
+        if self._scheduler is None or (publisher := self.publisher) is None:
+            raise RuntimeError('Runtime must be started before it can run')
+
+        for sensor in self.sensors:
+            if sensor.oversampling:
+                self._scheduler.add(
+                    name=f'{sensor.name}:sample',
+                    period=sensor.sample_period,  # type: ignore[arg-type]
+                    callback=partial(
+                        self._oversample,
+                        sensor
+                    )
+                )
+
+            self._scheduler.add(
+                name=sensor.name,
+                period=sensor.period,
+                callback=partial(
+                    self._sample,
+                    sensor,
+                    publisher
+                )
+            )
+
+        self._scheduler.run()
+
+        log.info(f'Scheduler stopped. Tick statistics: {self._scheduler.stats()}')
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Report how many ticks of each sensor were fired, late or skipped by the scheduler.
+
+        Returns:
+            Dict[str, Dict[str, int]]: a mapping of sensor names to their tick statistics.
+        """
+        return self._scheduler.stats() if self._scheduler is not None else {}
+
+    def stop(self) -> None:
+        """
+        Stop a running scheduler; `run()` returns once the current dispatch completes.
+        """
+        if self._scheduler is not None:
+            self._scheduler.stop()
+
+    def _sample(self, sensor: Sensor, publisher: Publisher) -> None:
+        """
+        Collect and publish a single sample from one sensor, logging (rather than raising) any failure.
+
+        Args:
+            sensor (Sensor): the sensor to sample.
+            publisher (Publisher): the Publisher to submit the sample to.
+        """
+        try:
+            with _sample_seconds.time(sensor.name):
+                sensor(publisher)
+        except Exception:
+            log.error(f'Sensor "{sensor.name}" failed. Full traceback: {traceback.format_exc()}')
+
+        # With adaptive sampling, the sample may have changed the sensor's period.
+        if self._scheduler is not None and (task := self._scheduler.tasks.get(sensor.name)) is not None and sensor.period != task.period:
+            self._scheduler.reschedule(sensor.name, sensor.period)
+
+    def _oversample(self, sensor: Sensor) -> None:
+        """
+        Add one sample to a sensor's oversampling window, logging (rather than raising) any failure.
+
+        Args:
+            sensor (Sensor): the sensor to sample.
+        """
+        try:
+            sensor.sample()
+        except Exception:
+            log.error(f'Sensor "{sensor.name}" failed to sample. Full traceback: {traceback.format_exc()}')
+
+    def close(self) -> None:
+        """
+        Shut down the worker pool and close the publisher connection.
+        """
+        self.stop()
+
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+        for sensor in self.sensors:
+            sensor.close()
+
+        if self.publisher is not None:
+            self.publisher.close()
+            self.publisher = None
+
+        # Make sure the last state of every sensor reaches disk, regardless of the persistence interval.
+        registry.persist()
+
+        log.info(f'Runtime stopped')
+
+    def __enter__(self) -> Runtime:
+        self.start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
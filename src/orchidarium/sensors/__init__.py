@@ -1,10 +1,16 @@
 from ._base import Sensor
+from ._isolated import IsolatedSensor
+from ._registry import register_sensor, sensor_specs, SensorSpec
 from .humidity import HumiditySensor
 from .soil import SoilSensor
 
 
 __all__ = [
+    'IsolatedSensor',
     'Sensor',
+    'SensorSpec',
     'HumiditySensor',
-    'SoilSensor'
+    'SoilSensor',
+    'register_sensor',
+    'sensor_specs'
 ]
\ No newline at end of file
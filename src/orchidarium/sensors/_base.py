@@ -1,31 +1,106 @@
 from __future__ import annotations
 
 import logging
-import os
 
-from pathlib import Path
 from abc import abstractmethod, ABC
+from types import MappingProxyType
 from typing import TYPE_CHECKING
-from orchidarium.lib.json import write_json
+from orchidarium.lib.adaptive import adaptive
+from orchidarium.lib.deadband import deadband
+from orchidarium.lib.lineprotocol import Schema
+from orchidarium.lib.health import registry
+from orchidarium.lib.metrics import counter, gauge, histogram
+from orchidarium.lib.tsdb import readings
+from orchidarium.lib.window import Window
 from orchidarium import env
 
 if TYPE_CHECKING:
+    from orchidarium.lib.adaptive import AdaptivePeriod
+    from orchidarium.lib.deadband import Deadband
     from orchidarium.publishers._base import Publisher
-    from typing import Literal
+    from typing import Any, Callable, Dict, Literal, Mapping, Optional, Sequence, Tuple
 
 
 log = logging.getLogger(__name__)
 
+_collect_seconds = histogram('sensor_collect_seconds', 'Time spent in one collect(), by sensor', labels=('sensor',))
+_collections = counter('sensor_collections_total', 'Collections attempted, by sensor and outcome', labels=('sensor', 'outcome'))
+_period_seconds = gauge('sensor_period_seconds', 'Current sampling period, by sensor', labels=('sensor',))
+
 
 class Sensor(ABC):
 
-    def __init__(self, scale: Literal['F', 'C'] = 'F', default_temperature: float = 0.0) -> None:
+    # Sampling period in seconds. Subclasses may override this to sample faster or slower than the global INTERVAL.
+    period: float = float(env['INTERVAL'])
+
+    # Seconds between samples when oversampling: the sensor is sampled this often and every `period` publishes the mean,
+    # min, max, standard deviation and count of the samples in between, instead of a single reading. None disables it.
+    sample_period: Optional[float] = float(env['OVERSAMPLE_PERIOD']) if env['OVERSAMPLE_PERIOD'] else None
+
+    # Attributes identifying this sensor's device on its bus (e.g. idVendor and idProduct), if it has one.
+    selector: Mapping[str, Any] = MappingProxyType({})
+
+    def __init__(self,
+                 scale: Literal['F', 'C'] = 'F',
+                 default_temperature: float = 0.0,
+                 period: Optional[float] = None,
+                 device: Optional[str] = None) -> None:
+        if period is not None:
+            self.period = period
+        # Identity of the device this instance reads, when several identical devices are attached (see lib.bus).
+        self.device = device
         self.scale = scale
         self._col: bool = False
         self._pub: bool = False
         self._temperature = default_temperature
-        self.cache()
-        log.info(f'Instantiating thread for sensor "{self.__class__.__name__.lower().removesuffix("sensor")}"')
+        self._window: Optional[Window] = None
+        # Suppresses readings that have not changed since the last one published, when DEADBAND is set.
+        self.deadband: Optional[Deadband] = deadband(self.kind, self.name)
+        self._schemas: Dict[Tuple[Tuple[str, ...], Tuple[Tuple[str, str], ...]], Schema] = {}
+        # Shortens the period while readings change quickly and lengthens it while they are flat, when ADAPTIVE is set.
+        # Oversampling sensors keep their period: it is the length of their aggregation window.
+        self.adaptive: Optional[AdaptivePeriod] = adaptive(self.kind, self.period) if not self.oversampling else None
+        if self.adaptive is not None:
+            self.period = self.adaptive.period
+        registry.register(self.name, self.period)
+        _period_seconds.set(self.period, self.name)
+        log.info(f'Instantiating thread for sensor "{self.name}"')
+
+    @property
+    def kind(self) -> str:
+        return self.__class__.__name__.lower().removesuffix('sensor')
+
+    @property
+    def name(self) -> str:
+        # Unique per instance: this is what the health registry, scheduler and metrics key on.
+        return self.kind if self.device is None else f'{self.kind}@{self.device}'
+
+    @property
+    def oversampling(self) -> bool:
+        return self.sample_period is not None and 0 < self.sample_period < self.period
+
+    @property
+    def tags(self) -> Dict[str, str]:
+        """
+        Tags that identify this sensor's points.
+        """
+        return {'device': self.device} if self.device is not None else {}
+
+    def schema(self, fields: Sequence[str], **tags: str) -> Schema:
+        """
+        The line-protocol layout of this sensor's points with the given fields, compiled on first use.
+
+        Args:
+            fields (Sequence[str]): field names, in the order their values will be encoded.
+            **tags (str): tags to add to this sensor's own.
+
+        Returns:
+            Schema: the schema, with this sensor's kind as measurement.
+        """
+        key = (tuple(fields), tuple(tags.items()))
+        if (schema := self._schemas.get(key)) is None:
+            schema = self._schemas[key] = Schema(self.kind, {**self.tags, **tags}, fields)
+        return schema
 
     @property
     def _collection(self) -> bool:
@@ -35,13 +110,13 @@ class Sensor(ABC):
     def _collection(self, value: bool) -> None:
         """
         Track whether or not a sensor has successfully collected its data.
-        This property adds the side-effect of updating the cache on-disk.
+        This property adds the side-effect of updating the health registry.
 
         Args:
             value (bool): value to set the collection indicator to (True or False).
         """
         self._col = value
-        self.cache()
+        registry.update(self.name, readout=value)
 
     @property
     def _publication(self) -> bool:
@@ -50,14 +125,21 @@ class Sensor(ABC):
     @_publication.setter
     def _publication(self, value: bool) -> None:
         """
-        Track whether or not a sensor has successfully collected its data.
-        This property adds the side-effect of updating the cache on-disk.
+        Track whether or not a sensor has successfully published its data.
+        This property adds the side-effect of updating the health registry.
 
         Args:
-            value (bool): value to set the collection indicator to (True or False).
+            value (bool): value to set the publication indicator to (True or False).
         """
         self._pub = value
-        self.cache()
+        registry.update(self.name, publish=value)
+
+    @property
+    def fields(self) -> Dict[str, float]:
+        """
+        The values from the latest successful collection, keyed by field name. Empty until a collection succeeds.
+        """
+        return {}
 
     @property
     def temperature(self) -> float:
@@ -99,29 +181,114 @@ class Sensor(ABC):
         """
         raise NotImplementedError
 
-    def __call__(self, publisher: Publisher) -> None:
+    def sample(self) -> bool:
+        """
+        Collect once and add the result to the current oversampling window.
+
+        Returns:
+            bool: True if the collection was successful, False otherwise.
         """
-        Make Sensors callable, wherein data collection and publication is carried out.
+        if not self._timed_collect():
+            return False
+
+        self._accumulate(self.fields)
+        return True
+
+    def _timed_collect(self, collect: Optional[Callable[[], bool]] = None) -> bool:
         """
-        self.collect()
-        self.publish(publisher)
+        Call `collect()`, recording how long it took and whether it succeeded, and keep successful readings in the
+        in-memory store.
 
-    def cache(self, file: Path = Path('healthcheck.json')) -> bool:
+        Args:
+            collect (Optional[Callable[[], bool]]): collects in place of `collect()`, e.g. from a stream, leaving the
+                newest reading in `fields`. (default: None)
+
+        Returns:
+            bool: True if the collection was successful, False otherwise.
         """
-        Write a cache to disk that healthchecks can pick up on to indicate the proper health.
+        _outcome = 'error'
+        try:
+            with _collect_seconds.time(self.name):
+                _ok = (collect or self.collect)()
+            _outcome = 'ok' if _ok else 'failed'
+            if _ok:
+                readings.record(self.name, self.fields)
+            return _ok
+        finally:
+            _collections.inc(self.name, _outcome)
+
+    def _accumulate(self, fields: Mapping[str, float]) -> None:
+        if self._window is None:
+            self._window = Window(tuple(fields))
+        self._window.add(tuple(fields.values()))
+
+    def publish_window(self, publisher: Publisher) -> bool:
+        """
+        Publish the aggregates of the samples taken since the last call, as one point per field (tagged with the field's
+        name) carrying its mean, min, max, stddev and count, then start a new window.
 
         Args:
-            file (Path): File to cache healthcheck results in. (default: Path('healthcheck.json'))
+            publisher (Publisher): the Publisher to submit the points to.
 
         Returns:
-            bool: True if caching the result was successful; False otherwise.
-        """
-        return write_json(
-            data={
-                "healthcheck": {
-                    "publish": self._publication,
-                    "readout": self._collection
-                }
-            },
-            path=Path(os.path.join(env['HEALTHCHECK_CACHE_PATH'], self.__class__.__name__.lower() + '_' + str(file)))
-        )
\ No newline at end of file
+            bool: True if there were samples and all points were submitted, False otherwise.
+        """
+        if not (aggregates := self._window.drain() if self._window is not None else {}):
+            log.warning(f'Sensor "{self.name}" collected no samples in the last {self.period}s window')
+            self._publication = False
+            return False
+
+        _ok = True
+        for field, stats in aggregates.items():
+            _ok = publisher.submit(self.schema(tuple(stats), field=field).encode(tuple(stats.values()))) and _ok
+
+        self._publication = _ok
+        return _ok
+
+    def _adapt(self) -> None:
+        """
+        Let the adaptive sampling policy, if any, pick the period until the next sample from the latest reading.
+        """
+        if self.adaptive is None:
+            return
+
+        if (period := self.adaptive.update(self.fields)) != self.period:
+            log.debug(f'Sensor "{self.name}" now samples every {period:.3g}s')
+            self.period = period
+            registry.update(self.name, period=period)
+            _period_seconds.set(period, self.name)
+
+    def close(self) -> None:
+        """
+        Release any resources (e.g. device handles) held by this sensor. The default implementation does nothing.
+        """
+
+    def __call__(self, publisher: Publisher) -> None:
+        """
+        Make Sensors callable, wherein data collection and publication is carried out. When oversampling, the samples
+        have already been collected by `sample()` and only their aggregates are published. Otherwise, with DEADBAND
+        set, readings that have not changed enough since the last one published are suppressed until the heartbeat. With
+        ADAPTIVE set, each reading also picks the period until the next one.
+        """
+        if self.oversampling:
+            self.publish_window(publisher)
+            return
+
+        if not self._timed_collect():
+            self.publish(publisher)
+            return
+
+        self._adapt()
+
+        if self.deadband is None:
+            self.publish(publisher)
+            return
+
+        _fields = self.fields
+        if not self.deadband.admit(_fields):
+            # Deliberately not written: the sensor is as healthy as if it had been.
+            self._publication = True
+            return
+
+        if self.publish(publisher):
+            self.deadband.commit(_fields)
\ No newline at end of file
@@ -0,0 +1,323 @@
+"""
+Run a sensor in a supervised worker process, so that a collection that hangs (e.g. a libusb call that never returns)
+can be killed and the sensor restarted, rather than holding a worker thread for the life of the daemon.
+"""
+
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import signal
+import traceback
+
+from threading import Lock
+from time import time_ns
+from orchidarium import env
+from orchidarium.lib.health import registry
+from orchidarium.lib.metrics import counter, gauge
+from orchidarium.lib.tsdb import readings
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from multiprocessing.connection import Connection
+    from multiprocessing.process import BaseProcess
+    from typing import Any, List, Optional, Tuple, Type
+    from orchidarium.publishers._base import Publisher
+    from ._base import Sensor
+    from ._registry import SensorSpec
+
+
+__all__ = [
+    'IsolatedSensor',
+    'WorkerError'
+]
+
+log = logging.getLogger(__name__)
+
+_period_seconds = gauge('sensor_period_seconds', 'Current sampling period, by sensor', labels=('sensor',))
+_restarts = counter('sensor_worker_restarts_total', 'Sensor worker processes killed or lost, by sensor and reason', labels=('sensor', 'reason'))
+
+# Spawned rather than forked: a forked worker would inherit the parent's libusb state and the locks of its threads.
+_context = multiprocessing.get_context('spawn')
+
+# Starting a worker spawns an interpreter, imports the sensor's dependencies and opens its device, which takes a while
+# on a Raspberry Pi.
+_START_SECONDS = 30.0
+
+
+class WorkerError(RuntimeError):
+    """
+    Raised when a sensor's worker process missed its deadline, exited or could not be started.
+    """
+
+
+class _Collector:
+    """
+    Stands in for the publisher inside a worker process, keeping the points a sensor submits as line protocol so that
+    they can be sent back to the parent and submitted to the real publisher there.
+    """
+
+    connected = True
+
+    def __init__(self) -> None:
+        self.records: List[str | bytes] = []
+
+    def submit(self, datum: Any) -> bool:
+        if not isinstance(datum, (str, bytes)):
+            from influxdb_client import Point, WritePrecision
+
+            if isinstance(datum, Point):
+                # Stamped here, so that the time recorded reflects when the sample was taken, not when it crossed the pipe.
+                if datum._time is None:
+                    datum.time(time_ns(), WritePrecision.NS)
+                datum = datum.to_line_protocol(precision=WritePrecision.NS)
+
+        self.records.append(datum)
+        return True
+
+    def drain(self) -> List[str | bytes]:
+        records, self.records = self.records, []
+        return records
+
+
+def _serve(cls: Type[Sensor], period: float, device: Optional[str], conn: Connection) -> None:
+    """
+    Worker process entry point: create the sensor, then answer requests from the parent until it asks the worker to
+    close or goes away.
+
+    Requests are 'call' (collect and publish) and 'sample' (collect into the oversampling window). Replies are
+    ('ok', result) or ('error', traceback); results carry the fields collected, if any.
+    """
+    from setproctitle import setproctitle
+
+    # The parent decides when workers stop; a Ctrl-C in the terminal is delivered to the whole process group.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # The parent tracks health and keeps readings from the replies; the worker must not overwrite its healthcheck files.
+    registry.persist_path = None
+    readings.capacity = 0
+
+    try:
+        sensor = cls(period=period, device=device)
+    except Exception:
+        conn.send(('error', traceback.format_exc()))
+        return
+
+    setproctitle(f'orchidarium: {sensor.name}')
+    conn.send(('ready', None))
+    collector = _Collector()
+
+    try:
+        while True:
+            try:
+                command = conn.recv()
+            except EOFError:
+                break
+
+            if command == 'close':
+                break
+
+            try:
+                if command == 'call':
+                    sensor(collector)  # type: ignore[arg-type]
+                    # When oversampling, a call only publishes the window; its readings were returned by 'sample'.
+                    fields = {} if sensor.oversampling else sensor.fields
+                    reply: Tuple[str, Any] = ('ok', (collector.drain(), sensor._collection, sensor._publication, fields, sensor.period))
+                else:
+                    reply = ('ok', (_ok := sensor.sample(), sensor.fields if _ok else {}))
+            except Exception:
+                collector.drain()
+                reply = ('error', traceback.format_exc())
+
+            conn.send(reply)
+    finally:
+        sensor.close()
+
+
+class IsolatedSensor:
+    """
+    Proxy for a sensor that lives in its own worker process, with the interface the runtimes schedule.
+
+    Every request to the worker has a deadline. A worker that misses it is killed, the sensor is marked unhealthy, and
+    a new worker is started on the next tick. Points travel back to the parent over a pipe as line protocol, and are
+    submitted to the publisher there.
+
+    Args:
+        spec (SensorSpec): the sensor to run.
+        device (Optional[str]): identity of the device the sensor should read, if there are several. (default: None)
+        deadline (Optional[float]): seconds a request may take before the worker is killed; SENSOR_DEADLINE, or the sensor's period, if omitted. (default: None)
+    """
+
+    def __init__(self, spec: SensorSpec, device: Optional[str] = None, deadline: Optional[float] = None) -> None:
+        self.spec = spec
+        self.device = device
+        self.period = spec.period
+        self.sample_period: Optional[float] = spec.cls.sample_period
+        if deadline is None:
+            deadline = float(env['SENSOR_DEADLINE']) if env['SENSOR_DEADLINE'] else spec.period
+        self.deadline = deadline
+        # One request in flight per worker; sampling and publishing ticks of the same sensor take turns.
+        self._lock = Lock()
+        self._process: Optional[BaseProcess] = None
+        self._conn: Optional[Connection] = None
+        # Statistics.
+        self.restarts: int = 0
+        registry.register(self.name, self.period)
+        _period_seconds.set(self.period, self.name)
+        log.info(f'Isolating sensor "{self.name}" in a worker process with a {self.deadline}s deadline')
+
+    @property
+    def kind(self) -> str:
+        return self.spec.cls.__name__.lower().removesuffix('sensor')
+
+    @property
+    def name(self) -> str:
+        return self.kind if self.device is None else f'{self.kind}@{self.device}'
+
+    @property
+    def oversampling(self) -> bool:
+        return self.sample_period is not None and 0 < self.sample_period < self.period
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self._process.pid if self._process is not None else None
+
+    def _start(self) -> None:
+        conn, child = _context.Pipe()
+        process = _context.Process(
+            target=_serve,
+            # Only what pickles: the spec's selector is a read-only mapping proxy.
+            args=(self.spec.cls, self.spec.period, self.device, child),
+            name=f'sensor-{self.name}',
+            daemon=True
+        )
+        try:
+            process.start()
+        except Exception as e:
+            conn.close()
+            raise WorkerError(f'Could not start worker for sensor "{self.name}": {e}') from e
+        finally:
+            child.close()
+        self._process, self._conn = process, conn
+
+        status, detail = self._receive(max(self.deadline, _START_SECONDS), 'start')
+        if status != 'ready':
+            self._kill('start')
+            raise WorkerError(f'Could not start worker for sensor "{self.name}". Full traceback: {detail}')
+
+        log.info(f'Started worker {self._process.pid} for sensor "{self.name}"')
+
+    def _receive(self, timeout: float, action: str) -> Tuple[str, Any]:
+        assert self._conn is not None
+
+        if not self._conn.poll(timeout):
+            self._kill('deadline')
+            raise WorkerError(f'Worker for sensor "{self.name}" did not answer "{action}" within {timeout}s, killed it')
+
+        try:
+            return self._conn.recv()
+        except (EOFError, OSError) as e:
+            self._kill('exit')
+            raise WorkerError(f'Worker for sensor "{self.name}" exited during {action}') from e
+
+    def _request(self, command: str) -> Tuple[str, Any]:
+        with self._lock:
+            if self._process is not None and not self._process.is_alive():
+                log.warning(f'Worker for sensor "{self.name}" exited with code {self._process.exitcode}, restarting it')
+                self._kill('exit')
+            if self._process is None:
+                self._start()
+
+            assert self._conn is not None
+            try:
+                self._conn.send(command)
+            except OSError as e:
+                self._kill('exit')
+                raise WorkerError(f'Worker for sensor "{self.name}" exited') from e
+
+            return self._receive(self.deadline, command)
+
+    def _kill(self, reason: str) -> None:
+        process, conn, self._process, self._conn = self._process, self._conn, None, None
+
+        if process is not None:
+            if process.is_alive():
+                process.kill()
+            process.join(timeout=5.0)
+            if process.is_alive():
+                # Stuck in uninterruptible sleep in the kernel; there is nothing more we can do from here.
+                log.error(f'Worker {process.pid} for sensor "{self.name}" did not exit after SIGKILL')
+        if conn is not None:
+            conn.close()
+
+        self.restarts += 1
+        _restarts.inc(self.name, reason)
+
+    def sample(self) -> bool:
+        """
+        Collect once in the worker and add the result to its oversampling window.
+
+        Returns:
+            bool: True if the collection was successful, False otherwise.
+        """
+        try:
+            status, detail = self._request('sample')
+        except WorkerError as e:
+            log.error(str(e))
+            registry.update(self.name, readout=False)
+            return False
+
+        if status != 'ok':
+            log.error(f'Sensor "{self.name}" failed to sample. Full traceback: {detail}')
+            return False
+
+        _ok, fields = detail
+        if _ok:
+            readings.record(self.name, fields)
+        return _ok
+
+    def __call__(self, publisher: Publisher) -> None:
+        """
+        Collect and publish in the worker, submit the points it returns to `publisher` and record the outcome.
+        """
+        try:
+            status, detail = self._request('call')
+        except WorkerError as e:
+            log.error(str(e))
+            registry.update(self.name, readout=False, publish=False)
+            return
+
+        if status != 'ok':
+            log.error(f'Sensor "{self.name}" failed. Full traceback: {detail}')
+            return
+
+        records, readout, published, fields, period = detail
+        if readout and fields:
+            readings.record(self.name, fields)
+        # The worker's sensor adapts its own period, if ADAPTIVE is set; the runtime schedules this proxy by it.
+        if period != self.period:
+            self.period = period
+            registry.update(self.name, period=period)
+            _period_seconds.set(period, self.name)
+        submitted = [publisher.submit(record) for record in records]
+        registry.update(self.name, readout=readout, publish=published and all(submitted))
+
+    def close(self) -> None:
+        """
+        Ask the worker to release its device and exit, killing it if it does not within its deadline.
+        """
+        with self._lock:
+            if self._process is None or self._conn is None:
+                return
+
+            process, conn, self._process, self._conn = self._process, self._conn, None, None
+            try:
+                conn.send('close')
+            except OSError:
+                pass
+            process.join(timeout=self.deadline)
+            if process.is_alive():
+                log.warning(f'Worker {process.pid} for sensor "{self.name}" did not exit within {self.deadline}s, killing it')
+                process.kill()
+                process.join(timeout=5.0)
+            conn.close()
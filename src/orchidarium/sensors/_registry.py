@@ -0,0 +1,233 @@
+"""
+Registry of the sensor types the daemon can run, resolved once at startup into an immutable list of specs.
+
+Sensors register themselves with the `register_sensor` decorator. Sensors shipped in other packages are discovered
+through the `orchidarium.sensors` entry point group, e.g. in a plugin's pyproject.toml:
+
+    [tool.poetry.plugins."orchidarium.sensors"]
+    light = "orchidarium_light:LightSensor"
+"""
+
+
+from __future__ import annotations
+
+import logging
+
+from threading import Lock
+from types import MappingProxyType
+from orchidarium import env
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, Iterable, Mapping, Optional, Set, Tuple, Type, TypeVar
+    from orchidarium.sensors import Sensor
+
+    S = TypeVar('S', bound=Type[Sensor])
+
+
+__all__ = [
+    'register_sensor',
+    'sensor_specs',
+    'SensorSpec'
+]
+
+log = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = 'orchidarium.sensors'
+
+
+def sensor_name(cls: Type[Sensor]) -> str:
+    """
+    Derive a sensor's name from its type, the same way `Sensor.name` does (e.g. HumiditySensor -> "humidity").
+    """
+    return cls.__name__.lower().removesuffix('sensor')
+
+
+class SensorSpec(NamedTuple):
+    """
+    Everything the runtime needs to know to create and schedule one sensor.
+    """
+    name: str
+    cls: Type[Sensor]
+    # Sampling period in seconds.
+    period: float
+    # Attributes that identify the sensor's device on its bus (e.g. idVendor and idProduct); empty if it has none.
+    selector: Mapping[str, Any]
+
+    @classmethod
+    def of(cls, sensor: Type[Sensor], period: Optional[float] = None) -> SensorSpec:
+        """
+        Build the spec of a sensor type from its class attributes.
+
+        Args:
+            sensor (Type[Sensor]): the sensor type.
+            period (Optional[float]): sampling period overriding the type's own. (default: None)
+
+        Returns:
+            SensorSpec: the spec.
+        """
+        return cls(
+            name=sensor_name(sensor),
+            cls=sensor,
+            period=float(period if period is not None else sensor.period),
+            selector=MappingProxyType(dict(sensor.selector))
+        )
+
+    def create(self, device: Optional[str] = None) -> Sensor:
+        """
+        Instantiate the sensor with this spec's period.
+
+        Args:
+            device (Optional[str]): identity of the device the instance should read, if there are several. (default: None)
+
+        Returns:
+            Sensor: the new sensor.
+        """
+        return self.cls(period=self.period, device=device)
+
+
+_registered: Dict[str, Type[Sensor]] = {}
+# Set once plugins are loaded and the registry is resolved; no sensor can be registered after that.
+_frozen: bool = False
+# Specs for the configuration in the environment, built on first use.
+_specs: Optional[Tuple[SensorSpec, ...]] = None
+_lock = Lock()
+
+
+def register_sensor(cls: S) -> S:
+    """
+    Class decorator that makes a sensor type available to the daemon.
+
+    Args:
+        cls (S): the Sensor subclass.
+
+    Raises:
+        RuntimeError: if the registry was already resolved, since the sensor would silently never run.
+        ValueError: if a different type is already registered under the same name.
+
+    Returns:
+        S: the class, unchanged.
+    """
+    name = sensor_name(cls)
+
+    with _lock:
+        if _frozen:
+            raise RuntimeError(f'Cannot register sensor "{name}" after the sensor registry has been resolved')
+
+        if (existing := _registered.get(name)) is not None and existing is not cls:
+            raise ValueError(f'Sensor "{name}" is already registered by {existing.__module__}.{existing.__qualname__}')
+
+        _registered[name] = cls
+
+    return cls
+
+
+def _split(value: str) -> Set[str]:
+    return {item.strip().lower() for item in value.split(',') if item.strip()}
+
+
+def _periods(value: str) -> Dict[str, float]:
+    """
+    Parse per-sensor period overrides of the form "humidity=10,soil=300".
+    """
+    periods = {}
+    for item in value.split(','):
+        if not item.strip():
+            continue
+        name, sep, period = item.partition('=')
+        if not sep:
+            raise ValueError(f'Invalid sensor period override "{item}", expected "<sensor>=<seconds>"')
+        periods[name.strip().lower()] = float(period)
+    return periods
+
+
+def _load_entry_points(group: str = ENTRY_POINT_GROUP) -> None:
+    """
+    Import the sensors advertised by installed packages. A plugin that fails to load is logged and skipped.
+
+    Args:
+        group (str): entry point group to load. (default: 'orchidarium.sensors')
+    """
+    # importlib.metadata is comparatively slow to import, and only needed once.
+    from importlib.metadata import entry_points
+    from orchidarium.sensors import Sensor
+
+    for entry_point in entry_points(group=group):
+        try:
+            cls = entry_point.load()
+        except Exception as e:
+            log.error(f'Could not load sensor plugin "{entry_point.name}" ({entry_point.value}): {e}')
+            continue
+
+        if not (isinstance(cls, type) and issubclass(cls, Sensor)):
+            log.error(f'Sensor plugin "{entry_point.name}" ({entry_point.value}) is not a Sensor subclass, skipping')
+            continue
+
+        # Plugins may or may not have applied the decorator themselves.
+        if _registered.get(sensor_name(cls)) is not cls:
+            register_sensor(cls)
+
+        log.info(f'Loaded sensor plugin "{entry_point.name}" from {entry_point.value}')
+
+
+def _freeze() -> None:
+    """
+    Load plugins and close the registry to further registrations, once.
+    """
+    global _frozen
+
+    if _frozen:
+        return
+
+    _load_entry_points()
+
+    with _lock:
+        _frozen = True
+
+
+def _resolve(enabled: Set[str], disabled: Set[str], periods: Mapping[str, float]) -> Tuple[SensorSpec, ...]:
+    for unknown in (enabled | disabled | set(periods)) - set(_registered):
+        log.warning(f'Sensor "{unknown}" is configured but not registered; known sensors: {", ".join(_registered)}')
+
+    specs = tuple(
+        SensorSpec.of(cls, period=periods.get(name))
+        for name, cls in _registered.items()
+        if (not enabled or name in enabled) and name not in disabled
+    )
+
+    log.info(f'Resolved {len(specs)} sensor(s): {", ".join(f"{s.name} ({s.period:g}s)" for s in specs) or "none"}')
+
+    return specs
+
+
+def sensor_specs(enabled: Optional[Iterable[str]] = None,
+                 disabled: Optional[Iterable[str]] = None,
+                 periods: Optional[Mapping[str, float]] = None) -> Tuple[SensorSpec, ...]:
+    """
+    Return the specs of the sensors the daemon should run. The first call loads plugins and freezes the registry; every
+    call then selects from it with its own arguments. The specs for the configuration in the environment (i.e. no
+    arguments) are only built once, and later calls without arguments return the same tuple.
+
+    Args:
+        enabled (Optional[Iterable[str]]): names of the only sensors to run; all registered sensors if empty. (default: SENSORS_ENABLED)
+        disabled (Optional[Iterable[str]]): names of sensors not to run. (default: SENSORS_DISABLED)
+        periods (Optional[Mapping[str, float]]): per-sensor sampling periods overriding their defaults. (default: SENSOR_PERIODS)
+
+    Returns:
+        Tuple[SensorSpec, ...]: the sensor specs, in registration order.
+    """
+    global _specs
+
+    _freeze()
+
+    if enabled is None and disabled is None and periods is None:
+        with _lock:
+            if _specs is None:
+                _specs = _resolve(_split(env['SENSORS_ENABLED']), _split(env['SENSORS_DISABLED']), _periods(env['SENSOR_PERIODS']))
+            return _specs
+
+    return _resolve(
+        set(enabled) if enabled is not None else _split(env['SENSORS_ENABLED']),
+        set(disabled) if disabled is not None else _split(env['SENSORS_DISABLED']),
+        dict(periods) if periods is not None else _periods(env['SENSOR_PERIODS'])
+    )
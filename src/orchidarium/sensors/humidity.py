@@ -1,77 +1,189 @@
 from __future__ import annotations
 
-import re
 import logging
 
-from usb.core import find
+from usb.core import USBError
 from orchidarium import env
-from orchidarium.sensors import Sensor
-from orchidarium.lib.bus import InterfaceClaim, read
+from types import MappingProxyType
+from orchidarium.sensors import Sensor, register_sensor
+from orchidarium.lib.bus import DeviceReader, devices
+from orchidarium.lib.frame import FrameParser
+from orchidarium.lib.metrics import histogram
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
+    from typing import Any, Dict, List, Optional, Tuple
     from orchidarium.publishers import Publisher
 
 
 log = logging.getLogger(__name__)
 
+_reads_per_sample = histogram('usb_reads_per_sample', 'USB reads needed to complete a frame, by sensor', buckets=(1, 2, 3, 5, 10), labels=('sensor',))
 
+
+@register_sensor
 class HumiditySensor(Sensor):
 
+    _ID_VENDOR: int = 0x0487
+    _ID_PRODUCT: int = 0x0007
+
+    selector = MappingProxyType({'idVendor': _ID_VENDOR, 'idProduct': _ID_PRODUCT})
+
     _TEMPERATURE_FAHRENHEIT: float = 0.0
     _HUMIDITY: float = 0.0
 
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        # Drop our cached device handle as soon as the probe is unplugged, rather than on the next failed read.
+        devices.watch()
+
+        # Frames look like "T: 72.5, RH: 61.2" and may be split across packets.
+        self._parser = FrameParser(fields=(b'T', b'RH'))
+
+        # In streaming mode a background thread keeps reading the probe, and collect() just takes the newest frame.
+        self._reader: Optional[DeviceReader[Tuple[float, ...]]] = DeviceReader(
+            devices,
+            self._ID_VENDOR,
+            self._ID_PRODUCT,
+            parse=self._parser.feed,
+            identity=self.device
+        ) if env['USB_STREAMING'] else None
+        self._seq: int = 0
+
     def collect(self) -> bool:
-        device = find(
-            idVendor=int(
-                '0x0487',
-                base=16
-            ),
-            idProduct=int(
-                '0x0007',
-                base=16
-            )
-        )
+        if self._reader is not None:
+            return self._collect_streaming()
+
+        handle = devices.get(self._ID_VENDOR, self._ID_PRODUCT, self.device)
 
-        if device is None:
+        if handle is None:
             # Exit early if the USB device is not available.
-            log.error(f'USB device with idVendor "{env["USB_VENDOR_ID"]}" and idProduct "{env["USB_PRODUCT_ID"]}" not found, exiting.')
+            log.error(f'USB device with idVendor "{self._ID_VENDOR:#06x}" and idProduct "{self._ID_PRODUCT:#06x}"{" and identity " + repr(self.device) if self.device else ""} not found, exiting.')
 
             self._collection = False
 
             return False
         else:
-            log.debug(f'Successfully located humidity device:\n\n{device}\n')
+            log.debug(f'Successfully located humidity device:\n\n{handle.device}\n')
 
-        with InterfaceClaim(device, detach=True):
-            _match: re.Pattern = re.compile(r'T: [0-9]+.[0-9]+, RH: [0-9]+.[0-9]+')
-            _extract_temperature: re.Pattern = re.compile(r'(?<=T: )[0-9]+.?[0-9]*(?=,)')
-            _extract_humidity: re.Pattern = re.compile(r'(?<=, RH: )[0-9+.?[0-9]*')
+        # Whatever was left over from the previous sample is too old to be stitched onto what we read now.
+        self._parser.reset()
 
-            for i in range(10):
-                _res = read(device[0][(0,0)][0], device).decode('utf-8', errors='replace')
-                log.debug(f'Raw sensor read {i + 1} / 10: {_res}')
-                if re.match(_match, _res):
+        _reads = 0
+        try:
+            for _reads in range(1, 11):
+                _res = handle.read()
+                log.debug(f'Raw sensor read {_reads} / 10: {_res.decode("utf-8", errors="replace")}')
+                if _frames := self._parser.feed(_res):
+                    self._TEMPERATURE_FAHRENHEIT, self._HUMIDITY = _frames[-1]
 
-                    _search_temperature = re.search(_extract_temperature, _res)
-                    _search_humidity = re.search(_extract_humidity, _res)
+                    log.debug(f'Collected temperature (F): {self._TEMPERATURE_FAHRENHEIT}. Collected (relative) humidity value: {self._HUMIDITY}')
 
-                    if _search_temperature and _search_humidity:
-                        self._TEMPERATURE_FAHRENHEIT = float(_search_temperature.group(0))
-                        self._HUMIDITY = float(_search_humidity.group(0))
+                    self._collection = True
+                    return True
+        except USBError as e:
+            devices.invalidate(self._ID_VENDOR, self._ID_PRODUCT, self.device, reason=str(e))
+        finally:
+            _reads_per_sample.observe(_reads, self.name)
 
-                        log.debug(f'Collected temperature (F): {self._TEMPERATURE_FAHRENHEIT}. Collected (relative) humidity value: {self._HUMIDITY}')
-
-                        self._collection = True
-                        return True
-                    else:
-                        log.error(f'Could not retrieve temperature or humidity reading.')
-                    break
+        if self._parser.errors:
+            log.debug(f'Humidity frame parse errors so far: {dict(self._parser.errors)}')
 
         self._collection = False
         return False
 
+    def _collect_streaming(self) -> bool:
+        """
+        Take the newest frame from the background reader, provided it was read within the last sampling period.
+
+        Returns:
+            bool: True if a fresh frame was available, False otherwise.
+        """
+        self._reader.start()  # type: ignore[union-attr]
+
+        if (_reading := self._reader.latest(max_age=self.period)) is None:  # type: ignore[union-attr]
+            log.warning(f'No fresh frame from humidity device within the last {self.period}s')
+            self._collection = False
+            return False
+
+        self._TEMPERATURE_FAHRENHEIT, self._HUMIDITY = _reading
+
+        log.debug(f'Collected temperature (F): {self._TEMPERATURE_FAHRENHEIT}. Collected (relative) humidity value: {self._HUMIDITY}')
+
+        self._collection = True
+        return True
+
+    def frames(self) -> List[Tuple[float, Tuple[float, ...]]]:
+        """
+        Return every frame the background reader has parsed since the last call, for oversampling.
+
+        Returns:
+            List[Tuple[float, Tuple[float, ...]]]: (monotonic read time, (temperature, humidity)) pairs, oldest-first;
+            empty when not in streaming mode.
+        """
+        if self._reader is None:
+            return []
+
+        _frames, self._seq, _lost = self._reader.frames.since(self._seq)
+
+        if _lost:
+            log.warning(f'Humidity device produced {_lost} frame(s) faster than they were consumed')
+
+        return _frames
+
+    def close(self) -> None:
+        if self._reader is not None:
+            self._reader.stop()
+        devices.invalidate(self._ID_VENDOR, self._ID_PRODUCT, self.device, reason='sensor closed')
+
+    def sample(self) -> bool:
+        if self._reader is None:
+            return super().sample()
+
+        # The background reader already parses every frame the probe sends, so use all of them rather than the newest.
+        self._reader.start()
+
+        return self._timed_collect(self._drain)
+
+    def _drain(self) -> bool:
+        """
+        Add every frame streamed since the last sample to the oversampling window, keeping the newest as the reading.
+
+        Returns:
+            bool: True if there were new frames, False otherwise.
+        """
+        if not (_frames := self.frames()):
+            self._collection = False
+            return False
+
+        for _, (_temperature, _humidity) in _frames:
+            self._accumulate({'temperature': _temperature, 'humidity': _humidity})
+
+        self._TEMPERATURE_FAHRENHEIT, self._HUMIDITY = _frames[-1][1]
+        self._collection = True
+        return True
+
+    @property
+    def tags(self) -> Dict[str, str]:
+        return {'scale': 'F', **super().tags}
+
+    @property
+    def fields(self) -> Dict[str, float]:
+        if not self._collection:
+            return {}
+
+        return {
+            'temperature': self._TEMPERATURE_FAHRENHEIT,
+            'humidity': self._HUMIDITY
+        }
+
     def publish(self, publisher: Publisher) -> bool:
-        ...
-        self._publication = True
-        return True
\ No newline at end of file
+        if not self._collection:
+            self._publication = False
+            return False
+
+        self._publication = publisher.submit(
+            self.schema(('temperature', 'humidity')).encode((self._TEMPERATURE_FAHRENHEIT, self._HUMIDITY))
+        )
+
+        return self._publication
@@ -1,32 +1,106 @@
 """
 Define a soil sensor type that encapsulates the logic for interacting with our soil sensor.
+
+The probe is a Modbus RTU unit on an RS-485 line, reached through a CH340 USB serial adapter. It keeps its seven
+channels in consecutive holding registers, so a sample is a single transaction that reads all of them at once.
 """
 
 
 from __future__ import annotations
 
 import logging
-import re
 
-from orchidarium.sensors import Sensor
-from orchidarium.lib.bus import InterfaceClaim, read
+from orchidarium import env
+from orchidarium.sensors import Sensor, register_sensor
+from orchidarium.lib.modbus import ModbusClient, ModbusError, SerialTransport
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
+    from typing import Any, Dict, Optional, Tuple
+    from orchidarium.lib.modbus import Transport
     from orchidarium.publishers import Publisher
 
 
 log = logging.getLogger(__name__)
 
 
+@register_sensor
 class SoilSensor(Sensor):
+    """
+    A soil probe read over Modbus RTU, all of its registers in one transaction.
+
+    Args:
+        *args (Any): passed on to Sensor.
+        transport (Optional[Transport]): the line the probe is on, e.g. a fake one in tests; the serial port at
+            SOIL_PORT if omitted. (default: None)
+        **kwargs (Any): passed on to Sensor.
+    """
+
+    # The probe's register map, from address 0x0000: (field, divisor, signed).
+    _REGISTERS: Tuple[Tuple[str, int, bool], ...] = (
+        ('moisture', 10, False),        # volumetric water content, %
+        ('temperature', 10, True),      # degrees Celsius
+        ('conductivity', 1, False),     # electrical conductivity, uS/cm
+        ('ph', 10, False),
+        ('nitrogen', 1, False),         # mg/kg
+        ('phosphorus', 1, False),       # mg/kg
+        ('potassium', 1, False)         # mg/kg
+    )
+
+    def __init__(self, *args: Any, transport: Optional[Transport] = None, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.transport: Transport = transport if transport is not None else SerialTransport(
+            env['SOIL_PORT'],
+            baudrate=int(env['SOIL_BAUDRATE'])
+        )
+        self._client = ModbusClient(self.transport, unit=int(env['SOIL_UNIT']), timeout=float(env['SOIL_TIMEOUT']))
+        self._values: Dict[str, float] = {}
 
     def collect(self) -> bool:
-        self._collection = False
+        try:
+            registers = self._client.read_registers(0x0000, len(self._REGISTERS))
+        except ModbusError as e:
+            log.warning(f'Soil probe on unit {self._client.unit} did not answer: {e}')
+            self._collection = False
+            return False
+        except OSError as e:
+            # Most likely the adapter was unplugged; the port is reopened on the next sample.
+            log.error(f'Soil probe serial port unavailable: {e}')
+            self.transport.close()
+            self._collection = False
+            return False
+
+        values: Dict[str, float] = {}
+        for (field, divisor, signed), register in zip(self._REGISTERS, registers):
+            if signed and register & 0x8000:
+                register -= 0x10000
+            values[field] = register / divisor
+
+        self.temperature = values['temperature']
+        values['temperature'] = self.temperature
+        self._values = values
 
-        return False
+        log.debug(f'Collected soil readings: {values}')
+
+        self._collection = True
+        return True
+
+    def close(self) -> None:
+        self.transport.close()
+
+    @property
+    def tags(self) -> Dict[str, str]:
+        return {'scale': self.scale, **super().tags}
+
+    @property
+    def fields(self) -> Dict[str, float]:
+        return dict(self._values) if self._collection else {}
 
     def publish(self, publisher: Publisher) -> bool:
-        ...
-        self._publication = True
-        return True
\ No newline at end of file
+        if not self._collection:
+            self._publication = False
+            return False
+
+        self._publication = publisher.submit(self.schema(tuple(self._values)).encode(tuple(self._values.values())))
+
+        return self._publication
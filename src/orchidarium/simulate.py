@@ -0,0 +1,444 @@
+"""
+Load-test the daemon's scheduler, health registry and publisher path with synthetic sensors.
+
+Synthetic sensors are ordinary `Sensor` subclasses that produce values from a configurable distribution and fail,
+raise or stall at configurable rates. They are registered and scheduled exactly like real sensors, and their points
+are written through the real InfluxDB publisher to a local stand-in (or a real InfluxDB) that measures how long each
+point took from being sampled to arriving.
+"""
+
+
+from __future__ import annotations
+
+import gzip
+import logging
+
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from random import Random
+from threading import Event, Lock, Thread, active_count
+from time import monotonic, process_time, sleep, thread_time, time_ns
+from zlib import crc32
+from orchidarium import env
+from orchidarium.lib.health import registry
+from orchidarium.lib.lineprotocol import Schema
+from orchidarium.sensors import Sensor, register_sensor, sensor_specs
+from orchidarium.sensors._registry import sensor_name
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, List, Literal, Optional, Tuple, Type
+    from orchidarium.publishers import Publisher
+    from orchidarium.sensors import SensorSpec
+
+    Distribution = Literal['gauss', 'uniform', 'walk', 'constant']
+
+
+__all__ = [
+    'InfluxDBSink',
+    'SyntheticSensor',
+    'simulate',
+    'synthetic_sensors'
+]
+
+log = logging.getLogger(__name__)
+
+
+class SyntheticSensor(Sensor):
+    """
+    A sensor that makes up its readings. Subclasses set the class attributes below; see `synthetic_sensors()`.
+    """
+
+    distribution: Distribution = 'gauss'
+    mean: float = 50.0
+    spread: float = 10.0
+    # Probabilities, per sample, of a failed collection, of an exception and of stalling for `stall_seconds`.
+    failure: float = 0.0
+    error: float = 0.0
+    stall: float = 0.0
+    stall_seconds: float = 0.0
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        # Seeded from the name (not hash(), which is salted per process) so that runs are repeatable.
+        self._rng = Random(crc32(self.name.encode()))
+        self._value: float = self.mean
+        self._sampled_at: int = 0
+        self._schema = Schema('synthetic', {'sensor': self.name}, ('value',))
+        # Statistics.
+        self.samples: int = 0
+        self.cpu: float = 0.0
+
+    def _draw(self) -> float:
+        if self.distribution == 'gauss':
+            return self._rng.gauss(self.mean, self.spread)
+        elif self.distribution == 'uniform':
+            return self._rng.uniform(self.mean - self.spread, self.mean + self.spread)
+        elif self.distribution == 'walk':
+            return self._value + self._rng.gauss(0.0, self.spread)
+        return self.mean
+
+    def collect(self) -> bool:
+        if self.stall and self._rng.random() < self.stall:
+            sleep(self.stall_seconds)
+
+        _roll = self._rng.random()
+
+        if _roll < self.error:
+            raise RuntimeError(f'Injected error in synthetic sensor "{self.name}"')
+
+        if _roll < self.error + self.failure:
+            self._collection = False
+            return False
+
+        self._value = self._draw()
+        self._sampled_at = time_ns()
+        self._collection = True
+        return True
+
+    @property
+    def fields(self) -> Dict[str, float]:
+        return {'value': self._value} if self._collection else {}
+
+    def publish(self, publisher: Publisher) -> bool:
+        if not self._collection:
+            self._publication = False
+            return False
+
+        # Stamped with the time of collection, so the sink can measure sample-to-write latency.
+        self._publication = publisher.submit(self._schema.encode((self._value,), self._sampled_at))
+        return self._publication
+
+    def __call__(self, publisher: Publisher) -> None:
+        _cpu = thread_time()
+        try:
+            super().__call__(publisher)
+        finally:
+            self.cpu += thread_time() - _cpu
+            self.samples += 1
+
+
+def synthetic_sensors(count: int, rate: float, **attributes: Any) -> List[Type[SyntheticSensor]]:
+    """
+    Create (but do not register) `count` distinct synthetic sensor types, named synthetic0000, synthetic0001, ...
+
+    Args:
+        count (int): number of sensor types.
+        rate (float): samples per second per sensor.
+        **attributes (Any): class attributes of SyntheticSensor to override (distribution, mean, failure, ...).
+
+    Returns:
+        List[Type[SyntheticSensor]]: the sensor types.
+    """
+    return [
+        type(f'Synthetic{i:04d}Sensor', (SyntheticSensor,), {'period': 1.0 / rate, **attributes})
+        for i in range(count)
+    ]
+
+
+class _SinkHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+    server: _SinkServer
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _reply(self, status: HTTPStatus, body: bytes = b'') -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        if self.path.startswith(('/ping', '/health')):
+            self._reply(HTTPStatus.NO_CONTENT)
+        else:
+            self._reply(HTTPStatus.NOT_FOUND, b'{"code":"not found"}')
+
+    do_HEAD = do_GET
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        sink = self.server.sink
+
+        if not self.path.startswith('/api/v2/write'):
+            self._reply(HTTPStatus.NOT_FOUND, b'{"code":"not found"}')
+            return
+
+        if sink.latency:
+            sleep(sink.latency)
+
+        if sink.status != HTTPStatus.NO_CONTENT:
+            self._reply(sink.status, b'{"code":"injected failure"}')
+            return
+
+        if self.headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+
+        sink._record(body)
+        self._reply(HTTPStatus.NO_CONTENT)
+
+
+class _SinkServer(ThreadingHTTPServer):
+
+    daemon_threads = True
+
+    def __init__(self, sink: InfluxDBSink, address: Tuple[str, int]) -> None:
+        self.sink = sink
+        super().__init__(address, _SinkHandler)
+
+
+class InfluxDBSink:
+    """
+    A local HTTP server that accepts InfluxDB v2 `/ping` and `/api/v2/write` requests and counts what it receives, so
+    that a simulation can measure the publisher path without a real InfluxDB.
+
+    Set `status` to make writes fail (e.g. HTTPStatus.SERVICE_UNAVAILABLE) and `latency` to slow them down.
+
+    Args:
+        host (str): address to bind. (default: '127.0.0.1')
+        port (int): port to bind; 0 picks a free one. (default: 0)
+        keep (bool): keep the received lines in `lines`, rather than only counting them. (default: False)
+        track_delay (bool): record in `delays` how many seconds passed between each point's (nanosecond) timestamp
+            and its arrival. (default: False)
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, keep: bool = False, track_delay: bool = False) -> None:
+        self._server = _SinkServer(self, (host, port))
+        self._thread: Optional[Thread] = None
+        self._lock = Lock()
+        self.keep = keep
+        self.track_delay = track_delay
+        self.status: HTTPStatus = HTTPStatus.NO_CONTENT
+        self.latency: float = 0.0
+        # Statistics.
+        self.lines: List[bytes] = []
+        self.delays: List[float] = []
+        self.requests: int = 0
+        self.points: int = 0
+        self.bytes: int = 0
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        if isinstance(host, (bytes, bytearray)):
+            host = host.decode()
+        return f'http://{host}:{port}'
+
+    def start(self) -> InfluxDBSink:
+        self._thread = Thread(target=self._server.serve_forever, daemon=True, name='influxdb-sink')
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _record(self, body: bytes) -> None:
+        _now = time_ns()
+        lines = [line for line in body.split(b'\n') if line]
+        delays = [(_now - int(line.rsplit(b' ', 1)[1])) / 1e9 for line in lines] if self.track_delay else []
+        with self._lock:
+            self.requests += 1
+            self.points += len(lines)
+            self.bytes += len(body)
+            self.delays.extend(delays)
+            if self.keep:
+                self.lines.extend(lines)
+
+    def __enter__(self) -> InfluxDBSink:
+        return self.start()
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+def _percentile(values: List[float], q: float) -> float:
+    return values[min(int(q * len(values)), len(values) - 1)] if values else 0.0
+
+
+def _watch(publisher: Any, duration: float, sink: Optional[InfluxDBSink], depths: List[int], threads: List[int]) -> Tuple[float, float]:
+    """
+    Sample the publisher's queue depth and the number of threads once a second for `duration` seconds.
+
+    Args:
+        publisher (Any): the publisher under test; anything with a `queue_depth`.
+        duration (float): how long to watch, in seconds.
+        sink (Optional[InfluxDBSink]): the sink receiving the points, for progress logging; None if there is none.
+        depths (List[int]): the queue depths are appended here.
+        threads (List[int]): the numbers of active threads are appended here.
+
+    Returns:
+        Tuple[float, float]: the monotonic and process CPU times at which watching started.
+    """
+    _cpu, _start = process_time(), monotonic()
+
+    while (_remaining := duration - (monotonic() - _start)) > 0:
+        sleep(min(1.0, _remaining))
+        depths.append(publisher.queue_depth)
+        threads.append(active_count())
+        log.info(f'{monotonic() - _start:6.1f}s: queue depth {depths[-1]}, delivered {sink.points if sink else "?"} point(s)')
+
+    return _start, _cpu
+
+
+def _run_threads(specs: Tuple[SensorSpec, ...], duration: float, sink: Optional[InfluxDBSink], depths: List[int], threads: List[int]) -> Dict[str, Any]:
+    from orchidarium.publishers.influxdb import InfluxDBPublisher
+    from orchidarium.runtime import Runtime
+
+    with Runtime(publisher=InfluxDBPublisher, sensors=specs) as runtime:
+        publisher: InfluxDBPublisher = runtime.publisher  # type: ignore[assignment]
+
+        thread = Thread(target=runtime.run, daemon=True, name='simulate')
+        thread.start()
+
+        _start, _cpu = _watch(publisher, duration, sink, depths, threads)
+
+        runtime.stop()
+        thread.join()
+
+        return {
+            'elapsed': monotonic() - _start,
+            'cpu': process_time() - _cpu,
+            'writer': publisher.stats(),
+            'ticks': runtime.stats(),
+            'sensors': runtime.sensors,
+            'healthy': registry.healthy(),
+            'ready': registry.ready()
+        }
+
+
+def _run_asyncio(specs: Tuple[SensorSpec, ...], duration: float, sink: Optional[InfluxDBSink], depths: List[int], threads: List[int]) -> Dict[str, Any]:
+    import asyncio
+    from orchidarium.aio import AsyncRuntime
+    from orchidarium.publishers.influxdb_async import AsyncInfluxDBPublisher
+
+    started = Event()
+    state: Dict[str, Any] = {}
+
+    async def _main() -> None:
+        try:
+            async with AsyncRuntime(publisher=AsyncInfluxDBPublisher, sensors=specs) as runtime:
+                state['runtime'] = runtime
+                started.set()
+                await runtime.run()
+                state['result'] = {
+                    'elapsed': monotonic() - state['start'],
+                    'cpu': process_time() - state['cpu'],
+                    'writer': runtime.publisher.stats(),  # type: ignore[union-attr]
+                    'ticks': runtime.stats(),
+                    'sensors': runtime.sensors,
+                    'healthy': registry.healthy(),
+                    'ready': registry.ready()
+                }
+        except BaseException as e:
+            state['error'] = e
+            raise
+        finally:
+            started.set()
+
+    thread = Thread(target=asyncio.run, args=(_main(),), daemon=True, name='simulate')
+    thread.start()
+    started.wait()
+
+    if 'runtime' not in state:
+        thread.join()
+        raise RuntimeError(f'The asyncio runtime failed to start: {state.get("error")}')
+
+    runtime: AsyncRuntime = state['runtime']
+    state['start'], state['cpu'] = _watch(runtime.publisher, duration, sink, depths, threads)
+
+    runtime.stop()
+    thread.join()
+
+    if 'result' not in state:
+        raise RuntimeError(f'The asyncio runtime failed: {state.get("error")}')
+
+    return state['result']
+
+
+def simulate(count: int,
+             rate: float,
+             duration: float,
+             local: bool = True,
+             runtime: str = 'threads',
+             **attributes: Any) -> Dict[str, Any]:
+    """
+    Run `count` synthetic sensors through the real runtime for `duration` seconds and report how the pipeline coped.
+
+    Args:
+        count (int): number of synthetic sensors.
+        rate (float): samples per second per sensor.
+        duration (float): seconds to run for.
+        local (bool): write to a local InfluxDB stand-in rather than the configured INFLUXDB_HOST. (default: True)
+        runtime (str): 'threads' for the thread-pool runtime, or 'asyncio'. (default: 'threads')
+        **attributes (Any): SyntheticSensor class attributes to override (distribution, mean, spread, failure, ...).
+
+    Raises:
+        ValueError: if the runtime is not recognized.
+
+    Returns:
+        Dict[str, Any]: throughput, queue depth, sample-to-write latency, CPU and scheduler statistics.
+    """
+    if runtime not in ('threads', 'asyncio'):
+        raise ValueError(f'Unknown runtime "{runtime}", expected "threads" or "asyncio"')
+
+    types = synthetic_sensors(count, rate, **attributes)
+    for cls in types:
+        register_sensor(cls)
+    specs = sensor_specs(enabled=[sensor_name(cls) for cls in types])
+
+    # Keep the simulation from overwriting the healthcheck files of a real daemon.
+    registry.persist_path = None
+
+    sink: Optional[InfluxDBSink] = InfluxDBSink(track_delay=True).start() if local else None
+    if sink is not None:
+        env['INFLUXDB_HOST'] = sink.url
+
+    depths: List[int] = []
+    threads: List[int] = []
+
+    try:
+        _delivered = sink.points if sink is not None else 0
+        run = _run_asyncio if runtime == 'asyncio' else _run_threads
+        result = run(specs, duration, sink, depths, threads)
+        # Closing the runtime flushed the write queue, so everything sampled during the run has been delivered by now.
+        delivered = (sink.points - _delivered) if sink is not None else None
+    finally:
+        if sink is not None:
+            sink.close()
+
+    elapsed: float = result['elapsed']
+    sensors: List[SyntheticSensor] = result['sensors']
+    ticks: Dict[str, Dict[str, int]] = result['ticks']
+    samples = sum(sensor.samples for sensor in sensors)
+    per_sample_us = sorted(sensor.cpu / sensor.samples * 1e6 for sensor in sensors if sensor.samples)
+    delays = sorted(sink.delays) if sink is not None else []
+
+    return {
+        'runtime': runtime,
+        'sensors': count,
+        'rate': rate,
+        'duration': elapsed,
+        'samples': samples,
+        'expected_points_per_second': count * rate * (1.0 - attributes.get('failure', 0.0) - attributes.get('error', 0.0)),
+        'points_per_second': delivered / elapsed if delivered is not None else None,
+        'points_delivered': sink.points if sink is not None else None,
+        'queue_depth_max': max(depths, default=0),
+        'queue_depth_mean': sum(depths) / len(depths) if depths else 0.0,
+        'threads_max': max(threads, default=active_count()),
+        'latency_p50_ms': _percentile(delays, 0.50) * 1e3,
+        'latency_p99_ms': _percentile(delays, 0.99) * 1e3,
+        'latency_max_ms': delays[-1] * 1e3 if delays else 0.0,
+        'cpu_per_sample_us_p50': _percentile(per_sample_us, 0.50),
+        'cpu_per_sample_us_max': per_sample_us[-1] if per_sample_us else 0.0,
+        'cpu_per_sensor_percent': sum(sensor.cpu for sensor in sensors) / count / elapsed * 100,
+        'process_cpu_percent': result['cpu'] / elapsed * 100,
+        'ticks_late': sum(t['late'] for t in ticks.values()),
+        'ticks_skipped': sum(t['skipped'] for t in ticks.values()),
+        'healthy': result['healthy'],
+        'ready': result['ready'],
+        **result['writer']
+    }
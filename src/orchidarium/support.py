@@ -1,11 +1,6 @@
 from __future__ import annotations
 
-import inspect
-import orchidarium.sensors
-
-from functools import lru_cache
-# from cachetools import TTLCache
-# from orchidarium import env
+from orchidarium.sensors import sensor_specs
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -13,36 +8,22 @@ if TYPE_CHECKING:
     from orchidarium.sensors import Sensor
 
 
-@lru_cache(maxsize=1)
 def sensor_count() -> int:
     """
-    Return the number of supported sensors.
+    Return the number of enabled sensors.
 
     Returns:
-        int: the number of supported sensors [0-inf).
+        int: the number of enabled sensors [0-inf).
     """
-    import inspect
-
-    subclasses = []
-    for _, obj in inspect.getmembers(orchidarium.sensors, inspect.isclass):
-        if issubclass(obj, orchidarium.sensors.Sensor) and obj is not orchidarium.sensors.Sensor:
-            subclasses.append(obj)
-    return len(subclasses)
-
-
-# cache: TTLCache = TTLCache(
-#     maxsize=sensor_count(),
-#     ttl=int(env['HEALTHCHECK_CACHE_TTL'])
-# )
+    return len(sensor_specs())
 
 
 def sensor_generator() -> Generator[Type[Sensor]]:
     """
-    Iterate over sensor types with this generator.
+    Iterate over enabled sensor types with this generator.
 
     Yields:
         Generator[Type[Sensor]]: A list of current Sensor implementation callables.
     """
-    for _, obj in inspect.getmembers(orchidarium.sensors, inspect.isclass):
-        if issubclass(obj, orchidarium.sensors.Sensor) and obj is not orchidarium.sensors.Sensor:
-            yield obj
\ No newline at end of file
+    for spec in sensor_specs():
+        yield spec.cls
@@ -0,0 +1,10 @@
+"""
+Shared test setup. The daemon reads its configuration from the environment when `orchidarium` is first imported, so it
+is set here, before any test module imports the package: no healthcheck files and no spool unless a test asks for one.
+"""
+
+
+import os
+
+os.environ.setdefault('HEALTHCHECK_CACHE_PATH', '')
+os.environ.setdefault('SPOOL_PATH', '')
@@ -0,0 +1,373 @@
+"""
+Fake pyusb devices and a fake Modbus serial line for exercising the bus layer and sensors without hardware.
+"""
+
+
+from __future__ import annotations
+
+from array import array
+from itertools import cycle
+from random import Random
+from time import sleep
+from usb.core import USBError, USBTimeoutError
+from orchidarium.lib.modbus import READ_HOLDING_REGISTERS, READ_INPUT_REGISTERS, crc16
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Any, Callable, Iterable, Iterator, List, MutableSequence, Optional, Set, Tuple, Union
+
+    Packet = Union[bytes, BaseException]
+
+
+__all__ = [
+    'FakeDevice',
+    'FakeEndpoint',
+    'FakeModbusTransport',
+    'fake_finder',
+    'humidity_packet',
+    'humidity_stream',
+    'soil_registers'
+]
+
+
+def humidity_packet(temperature: float, humidity: float, size: int = 64) -> bytes:
+    """
+    Encode a reading the way the humidity probe reports it, padded to a full packet.
+
+    Args:
+        temperature (float): temperature reading.
+        humidity (float): relative humidity reading.
+        size (int): packet size to pad to. (default: 64)
+
+    Returns:
+        bytes: the packet.
+    """
+    return f'T: {temperature:.1f}, RH: {humidity:.1f}\r\n'.encode('ascii').ljust(size, b'\0')
+
+
+def humidity_stream(count: int,
+                    split: float = 0.0,
+                    busy: float = 0.0,
+                    timeout: float = 0.0,
+                    size: int = 64,
+                    seed: int = 0) -> List[Packet]:
+    """
+    Script a stream of humidity probe packets with a configurable share of faults, for `FakeDevice`.
+
+    Args:
+        count (int): number of frames in the stream.
+        split (float): probability that a frame is split across two packets. (default: 0.0)
+        busy (float): probability of a "Resource busy" error before a packet. (default: 0.0)
+        timeout (float): probability of a read timeout before a packet. (default: 0.0)
+        size (int): packet size. (default: 64)
+        seed (int): seed for the random choices, so runs are repeatable. (default: 0)
+
+    Returns:
+        List[Packet]: the packets and errors, in order.
+    """
+    rng = Random(seed)
+    stream: List[Packet] = []
+
+    for i in range(count):
+        if rng.random() < busy:
+            stream.append(USBError('Resource busy', errno=16))
+        if rng.random() < timeout:
+            stream.append(USBTimeoutError('Operation timed out', errno=110))
+
+        packet = humidity_packet(60 + i % 300 / 10, 40 + i % 500 / 10, size=size)
+
+        if rng.random() < split:
+            frame = packet.rstrip(b'\0')
+            cut = rng.randrange(1, len(frame))
+            stream.append(frame[:cut].ljust(size, b'\0'))
+            stream.append(frame[cut:].ljust(size, b'\0'))
+        else:
+            stream.append(packet)
+
+    return stream
+
+
+class FakeEndpoint:
+
+    def __init__(self, address: int = 0x81, max_packet_size: int = 64) -> None:
+        self.bEndpointAddress = address
+        self.wMaxPacketSize = max_packet_size
+
+
+class _FakeContext:
+    """
+    Stand-in for pyusb's internal device context, which `usb.util.claim_interface` and friends call into.
+    """
+
+    def managed_claim_interface(self, device: FakeDevice, interface: int) -> None:
+        device.claims += 1
+        device.claimed.add(interface)
+
+    def managed_release_interface(self, device: FakeDevice, interface: int) -> None:
+        device.claimed.discard(interface)
+
+    def dispose(self, device: FakeDevice, close_handle: bool = True) -> None:
+        device.claimed.clear()
+
+
+class FakeDevice:
+    """
+    A USB device that replays a scripted stream of packets and errors.
+
+    Args:
+        packets (Iterable[Packet]): packets to return from `read()`, in order; exceptions in the stream are raised instead.
+        repeat (bool): loop over `packets` forever rather than raising a timeout once they run out. (default: True)
+        id_vendor (int): USB vendor ID. (default: 0x0487)
+        id_product (int): USB product ID. (default: 0x0007)
+        bus (int): bus number. (default: 1)
+        address (int): device address on the bus. (default: 1)
+        port_numbers (Tuple[int, ...]): port path from the root hub. (default: (1,))
+        serial_number (Optional[str]): serial number string descriptor. (default: None)
+    """
+
+    def __init__(self,
+                 packets: Iterable[Packet],
+                 repeat: bool = True,
+                 id_vendor: int = 0x0487,
+                 id_product: int = 0x0007,
+                 bus: int = 1,
+                 address: int = 1,
+                 port_numbers: Tuple[int, ...] = (1,),
+                 serial_number: Optional[str] = None) -> None:
+        self._packets: Iterator[Packet]
+        if repeat:
+            self._packets = cycle(packets)
+        else:
+            self._packets = iter(packets)
+        self.idVendor = id_vendor
+        self.idProduct = id_product
+        self.bus = bus
+        self.address = address
+        self.port_numbers = port_numbers
+        self.serial_number = serial_number
+        self.endpoint = FakeEndpoint()
+        self._ctx = _FakeContext()
+        self.kernel_driver_active: bool = True
+        self.connected: bool = True
+        # Statistics.
+        self.claimed: Set[int] = set()
+        self.claims: int = 0
+        self.reads: int = 0
+
+    def __getitem__(self, index: int) -> Any:
+        # device[0][(interface, alternate)][endpoint]
+        return {(0, 0): [self.endpoint]}
+
+    def is_kernel_driver_active(self, interface: int) -> bool:
+        return self.kernel_driver_active
+
+    def detach_kernel_driver(self, interface: int) -> None:
+        self.kernel_driver_active = False
+
+    def attach_kernel_driver(self, interface: int) -> None:
+        self.kernel_driver_active = True
+
+    def unplug(self) -> None:
+        """
+        Make every further operation fail as if the device had been physically removed.
+        """
+        self.connected = False
+
+    def read(self, endpoint: int, size_or_buffer: Union[int, array], timeout: Optional[int] = None) -> Union[array, int]:
+        """
+        Return the next scripted packet, with the same semantics as `usb.core.Device.read`.
+
+        Args:
+            endpoint (int): endpoint address.
+            size_or_buffer (Union[int, array]): number of bytes to read, or a buffer to read into.
+            timeout (Optional[int]): ignored.
+
+        Raises:
+            USBError: if the device was unplugged.
+            BaseException: any exception scripted into the packet stream.
+
+        Returns:
+            Union[array, int]: the packet as an array, or the number of bytes written into the given buffer.
+        """  # noqa: DOC503 (the scripted exception is raised by name, which pydoclint cannot resolve to a type)
+        if not self.connected:
+            raise USBError('No such device', errno=19)
+
+        self.reads += 1
+
+        try:
+            packet = next(self._packets)
+        except StopIteration:
+            raise USBError('Operation timed out', errno=110)
+
+        if isinstance(packet, BaseException):
+            raise packet
+
+        if isinstance(size_or_buffer, int):
+            return array('B', packet[:size_or_buffer])
+
+        n = min(len(packet), len(size_or_buffer))
+        size_or_buffer[:n] = array('B', packet[:n])
+        return n
+
+
+def fake_finder(devices: List[FakeDevice]) -> Callable[..., Any]:
+    """
+    Build a drop-in replacement for `usb.core.find` that searches a list of fake devices.
+
+    Args:
+        devices (List[FakeDevice]): the devices "plugged in" to the fake bus.
+
+    Returns:
+        Callable[..., Any]: a function with the signature of `usb.core.find`.
+    """
+    def _find(find_all: bool = False, backend: Any = None, custom_match: Any = None, **args: Any) -> Any:
+        matches = [
+            device for device in devices
+            if device.connected
+            and all(getattr(device, k) == v for k, v in args.items())
+            and (custom_match is None or custom_match(device))
+        ]
+        if find_all:
+            return iter(matches)
+        return matches[0] if matches else None
+    return _find
+
+
+def soil_registers(moisture: float = 35.0,
+                   temperature: float = 22.5,
+                   conductivity: int = 450,
+                   ph: float = 6.2,
+                   nitrogen: int = 30,
+                   phosphorus: int = 12,
+                   potassium: int = 60) -> List[int]:
+    """
+    Encode a reading the way the soil probe lays out its holding registers 0x0000-0x0006.
+
+    Args:
+        moisture (float): volumetric water content in %, in steps of 0.1. (default: 35.0)
+        temperature (float): temperature in degrees Celsius, in steps of 0.1; may be negative. (default: 22.5)
+        conductivity (int): electrical conductivity in uS/cm. (default: 450)
+        ph (float): pH, in steps of 0.1. (default: 6.2)
+        nitrogen (int): nitrogen in mg/kg. (default: 30)
+        phosphorus (int): phosphorus in mg/kg. (default: 12)
+        potassium (int): potassium in mg/kg. (default: 60)
+
+    Returns:
+        List[int]: the register values.
+    """
+    return [
+        round(moisture * 10),
+        round(temperature * 10) & 0xFFFF,
+        conductivity,
+        round(ph * 10),
+        nitrogen,
+        phosphorus,
+        potassium
+    ]
+
+
+class FakeModbusTransport:
+    """
+    A Modbus RTU unit behind a serial line, for `orchidarium.lib.modbus.ModbusClient`. It answers register reads from
+    `registers`, which may be changed between transactions, with exception responses for unsupported functions or
+    addresses, and stays silent on requests for another unit or with a bad CRC, like a real device.
+
+    Set `baudrate` to make transactions take as long as they would on the wire, and `corrupt` or `silent` to inject
+    garbled or missing responses.
+
+    Args:
+        registers (MutableSequence[int]): register values, from address 0.
+        unit (int): the unit's address. (default: 1)
+        baudrate (Optional[int]): if set, sleep for the time each frame takes to cross a line of this speed.
+            (default: None)
+        latency (float): seconds the unit takes to start answering. (default: 0.0)
+        corrupt (float): probability that a response has one byte flipped. (default: 0.0)
+        silent (float): probability that a request goes unanswered. (default: 0.0)
+        seed (int): seed for the random faults, so runs are repeatable. (default: 0)
+    """
+
+    def __init__(self,
+                 registers: MutableSequence[int],
+                 unit: int = 1,
+                 baudrate: Optional[int] = None,
+                 latency: float = 0.0,
+                 corrupt: float = 0.0,
+                 silent: float = 0.0,
+                 seed: int = 0) -> None:
+        self.registers = registers
+        self.unit = unit
+        self.baudrate = baudrate
+        self.latency = latency
+        self.corrupt = corrupt
+        self.silent = silent
+        self._rng = Random(seed)
+        self._pending = bytearray()
+        self.connected: bool = True
+        # Statistics.
+        self.transactions: int = 0
+        self.bytes_written: int = 0
+        self.bytes_read: int = 0
+
+    def _wire(self, size: int) -> None:
+        if self.baudrate:
+            # 8N1: a start bit, eight data bits and a stop bit per byte.
+            sleep(size * 10 / self.baudrate)
+
+    def _respond(self, request: bytes) -> bytes:
+        if len(request) != 8 or crc16(request[:-2]) != int.from_bytes(request[-2:], 'little') or request[0] != self.unit:
+            return b''
+
+        function = request[1]
+        address, count = int.from_bytes(request[2:4], 'big'), int.from_bytes(request[4:6], 'big')
+
+        if function not in (READ_HOLDING_REGISTERS, READ_INPUT_REGISTERS):
+            response = bytes((self.unit, function | 0x80, 0x01))
+        elif not 1 <= count <= 125 or address + count > len(self.registers):
+            response = bytes((self.unit, function | 0x80, 0x02))
+        else:
+            response = bytes((self.unit, function, 2 * count)) + b''.join(
+                value.to_bytes(2, 'big') for value in self.registers[address:address + count]
+            )
+
+        return response + crc16(response).to_bytes(2, 'little')
+
+    def write(self, data: bytes) -> None:
+        if not self.connected:
+            raise OSError(19, 'No such device')
+
+        self._wire(len(data))
+        self.transactions += 1
+        self.bytes_written += len(data)
+
+        if self.silent and self._rng.random() < self.silent:
+            return
+
+        response = bytearray(self._respond(bytes(data)))
+        if response and self.corrupt and self._rng.random() < self.corrupt:
+            response[self._rng.randrange(3, len(response))] ^= 0xFF
+
+        if response:
+            sleep(self.latency)
+            self._wire(len(response))
+        self._pending += response
+
+    def read(self, size: int, timeout: float) -> bytes:
+        if not self.connected:
+            raise OSError(19, 'No such device')
+
+        data = bytes(self._pending[:size])
+        del self._pending[:size]
+        self.bytes_read += len(data)
+        return data
+
+    def flush(self) -> None:
+        del self._pending[:]
+
+    def close(self) -> None:
+        del self._pending[:]
+
+    def unplug(self) -> None:
+        """
+        Make every further operation fail as if the adapter had been physically removed.
+        """
+        self.connected = False
@@ -0,0 +1,183 @@
+from threading import Event, Thread
+from time import monotonic
+
+import pytest
+
+from usb.core import USBError
+from fakes import FakeDevice, fake_finder, humidity_packet, humidity_stream
+from orchidarium.lib.bus import DeviceManager, RetryExhaustedError, communicate
+from orchidarium.lib.retry import CircuitBreaker, RetryPolicy
+
+POLICY = RetryPolicy(base_delay=0.0, max_delay=0.0, deadline=1.0, max_attempts=3)
+
+
+def test_handles_are_cached_until_invalidated() -> None:
+    device = FakeDevice(humidity_stream(3))
+    manager = DeviceManager(finder=fake_finder([device]))
+
+    handle = manager.get(0x0487, 0x0007)
+    assert handle is not None
+    assert manager.get(0x0487, 0x0007) is handle
+    assert device.claims == 1
+
+    manager.invalidate(0x0487, 0x0007, reason='test')
+    assert manager.get(0x0487, 0x0007) is not handle
+    assert device.claims == 2
+
+
+def test_failed_claim_hands_the_device_back() -> None:
+    device = FakeDevice(humidity_stream(3))
+
+    def _gone(device: FakeDevice, interface: int) -> None:
+        raise USBError('No such device', errno=19)
+
+    device._ctx.managed_claim_interface = _gone  # type: ignore[method-assign]
+    manager = DeviceManager(finder=fake_finder([device]))
+
+    assert manager.get(0x0487, 0x0007) is None
+    # The kernel driver detached before the claim is attached again.
+    assert device.kernel_driver_active
+
+
+def test_a_slow_device_does_not_hold_up_the_others() -> None:
+    fast = FakeDevice(humidity_stream(3), id_product=0x0001)
+    slow = FakeDevice(humidity_stream(3), id_product=0x0002)
+    manager = DeviceManager(finder=fake_finder([fast, slow]))
+    handle = manager.get(0x0487, 0x0001)
+
+    claiming, release = Event(), Event()
+    _claim = slow._ctx.managed_claim_interface
+
+    def _stuck(device: FakeDevice, interface: int) -> None:
+        claiming.set()
+        release.wait(5)
+        _claim(device, interface)
+
+    slow._ctx.managed_claim_interface = _stuck  # type: ignore[method-assign]
+    thread = Thread(target=manager.get, args=(0x0487, 0x0002))
+    thread.start()
+    assert claiming.wait(5)
+
+    # The slow device is still being claimed, yet the cached handle comes straight back.
+    _start = monotonic()
+    assert manager.get(0x0487, 0x0001) is handle
+    assert monotonic() - _start < 1.0
+
+    release.set()
+    thread.join(5)
+    assert slow.claims == 1
+
+
+def test_missing_device() -> None:
+    manager = DeviceManager(finder=fake_finder([]))
+
+    assert manager.get(0x0487, 0x0007) is None
+
+
+def test_reads_packets() -> None:
+    manager = DeviceManager(finder=fake_finder([FakeDevice([humidity_packet(72.5, 48.1)])]))
+    handle = manager.get(0x0487, 0x0007)
+
+    assert handle is not None
+    assert handle.read().rstrip(b'\0') == b'T: 72.5, RH: 48.1\r\n'
+
+
+def test_busy_errors_are_retried() -> None:
+    calls = []
+
+    def _flaky() -> str:
+        calls.append(1)
+        if len(calls) < 3:
+            raise USBError('Resource busy', errno=16)
+        return 'ok'
+
+    assert communicate(_flaky, policy=POLICY) == 'ok'
+    assert len(calls) == 3
+
+
+def test_breaker_opens_after_repeated_failures() -> None:
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60.0, name='test')
+
+    def _fail() -> None:
+        raise USBError('Resource busy', errno=16)
+
+    for _ in range(2):
+        with pytest.raises(RetryExhaustedError):
+            communicate(_fail, policy=POLICY, breaker=breaker)
+
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+class Clock:
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _half_open(clock: Clock) -> CircuitBreaker:
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30.0, probe_timeout=5.0, name='test', clock=clock)
+    breaker.record_failure()
+    clock.now = 30.0
+    return breaker
+
+
+def test_half_open_lets_one_probe_through() -> None:
+    clock = Clock()
+    breaker = _half_open(clock)
+
+    assert breaker.available
+    assert breaker.allow()
+    assert not breaker.available
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_lost_probe_times_out() -> None:
+    clock = Clock()
+    breaker = _half_open(clock)
+    assert breaker.allow()
+
+    clock.now = 34.0
+    assert not breaker.allow()
+
+    # The probe never reported back; the next caller becomes the probe.
+    clock.now = 35.0
+    assert breaker.allow()
+    assert not breaker.allow()
+
+
+def test_unexpected_errors_count_against_the_breaker() -> None:
+    clock = Clock()
+    breaker = _half_open(clock)
+
+    def _bug() -> None:
+        raise ValueError('not a USB error')
+
+    with pytest.raises(ValueError):
+        communicate(_bug, policy=POLICY, breaker=breaker)
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.trips == 2
+
+
+def test_device_is_not_opened_while_a_probe_is_in_flight() -> None:
+    device = FakeDevice(humidity_stream(3))
+    manager = DeviceManager(finder=fake_finder([device]))
+    breaker = manager.breaker(0x0487, 0x0007)
+    breaker.failure_threshold = 1
+    breaker.reset_timeout = 0.0
+    breaker.record_failure()
+
+    # Another caller holds the half-open probe.
+    assert breaker.allow()
+    assert manager.get(0x0487, 0x0007) is None
+    assert device.claims == 0
+
+    breaker.record_success()
+    assert manager.get(0x0487, 0x0007) is not None
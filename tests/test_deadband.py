@@ -0,0 +1,80 @@
+import pytest
+
+from orchidarium.lib.adaptive import AdaptivePeriod
+from orchidarium.lib.deadband import Deadband, thresholds
+
+
+class Clock:
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_thresholds_prefer_the_sensor_kind() -> None:
+    value = 'temperature=0.2,humidity=1,soil.moisture=0.5,soil.temperature=0.1'
+
+    assert thresholds(value, 'humidity') == {'temperature': 0.2, 'humidity': 1.0}
+    assert thresholds(value, 'soil') == {'temperature': 0.1, 'humidity': 1.0, 'moisture': 0.5}
+    assert thresholds('', 'soil') == {}
+
+
+def test_thresholds_must_be_assignments() -> None:
+    with pytest.raises(ValueError):
+        thresholds('temperature', 'humidity')
+
+
+def test_deadband_suppresses_small_changes_until_the_heartbeat() -> None:
+    clock = Clock()
+    deadband = Deadband({'temperature': 0.5}, heartbeat=60.0, clock=clock)
+
+    assert deadband.admit({'temperature': 70.0})
+    deadband.commit({'temperature': 70.0})
+
+    clock.now = 10.0
+    assert not deadband.admit({'temperature': 70.3})
+    assert deadband.admit({'temperature': 70.6})
+
+    clock.now = 61.0
+    assert deadband.admit({'temperature': 70.0})
+
+    assert deadband.stats() == {'published': 3, 'suppressed': 1, 'ratio': 0.25}
+
+
+def test_fields_without_threshold_publish_on_any_change() -> None:
+    deadband = Deadband({}, heartbeat=60.0, clock=Clock())
+    deadband.commit({'humidity': 40.0})
+
+    assert not deadband.admit({'humidity': 40.0})
+    assert deadband.admit({'humidity': 40.1})
+
+
+def test_adaptive_period_follows_the_rate_of_change() -> None:
+    clock = Clock()
+    adaptive = AdaptivePeriod({'temperature': 0.2}, minimum=5.0, maximum=60.0, clock=clock)
+    assert adaptive.period == 60.0
+
+    assert adaptive.update({'temperature': 70.0}) == 60.0
+
+    # 6F in 60s: 0.1F/s, so 0.2F is expected every 2s, clamped to the minimum.
+    clock.now = 60.0
+    assert adaptive.update({'temperature': 76.0}) == 5.0
+
+    # Once flat, the smoothed rate decays and the period grows back, at most doubling per sample.
+    periods = [adaptive.period]
+    while periods[-1] < 60.0 and len(periods) < 50:
+        clock.now += adaptive.period
+        periods.append(adaptive.update({'temperature': 76.0}))
+
+    assert periods[-1] == 60.0
+    assert all(previous <= period <= 2 * previous for previous, period in zip(periods, periods[1:]))
+
+
+def test_adaptive_period_validates_its_bounds() -> None:
+    with pytest.raises(ValueError):
+        AdaptivePeriod({'temperature': 0.2}, minimum=10.0, maximum=5.0)
+
+    with pytest.raises(ValueError):
+        AdaptivePeriod({'temperature': 0.2}, minimum=1.0, maximum=5.0, alpha=0.0)
@@ -0,0 +1,70 @@
+from fakes import humidity_packet
+from orchidarium.lib.frame import FrameParser
+
+
+def test_padded_packet() -> None:
+    parser = FrameParser((b'T', b'RH'))
+
+    assert parser.feed(humidity_packet(72.5, 48.1)) == [(72.5, 48.1)]
+    assert parser.frames == 1
+
+
+def test_frame_split_across_packets() -> None:
+    parser = FrameParser((b'T', b'RH'))
+    frame = humidity_packet(72.5, 48.1).rstrip(b'\0')
+
+    assert parser.feed(frame[:7]) == []
+    assert parser.feed(frame[7:]) == [(72.5, 48.1)]
+
+
+def test_padded_packet_without_a_terminator() -> None:
+    parser = FrameParser((b'T', b'RH'))
+
+    assert parser.feed(b'T: 72.5, RH: 48.1'.ljust(64, b'\0')) == [(72.5, 48.1)]
+    assert parser.feed(b'T: 73.0, RH: 49.0'.ljust(64, b'\0')) == [(73.0, 49.0)]
+    assert not parser.errors
+
+
+def test_unterminated_frame_split_across_packets() -> None:
+    parser = FrameParser((b'T', b'RH'))
+
+    # A value cut off at the end of a packet is not a complete frame yet.
+    assert parser.feed(b'T: 72.5, RH: 4'.ljust(64, b'\0')) == []
+    assert parser.feed(b'8.1'.ljust(64, b'\0')) == [(72.5, 48.1)]
+
+
+def test_terminator_in_the_next_packet() -> None:
+    parser = FrameParser((b'T', b'RH'))
+
+    assert parser.feed(b'T: 72.5, RH: 48.1\r') == [(72.5, 48.1)]
+    assert parser.feed(b'\nT: 73.0, RH: 49.0\r\n') == [(73.0, 49.0)]
+    assert not parser.errors
+
+
+def test_several_frames_in_one_packet() -> None:
+    parser = FrameParser((b'T', b'RH'))
+
+    assert parser.feed(b'T: 70.0, RH: 40.0\r\nT: 71.0, RH: 41.0\r\n') == [(70.0, 40.0), (71.0, 41.0)]
+
+
+def test_malformed_frames_are_counted() -> None:
+    parser = FrameParser((b'T', b'RH'))
+
+    assert parser.feed(b'T: 70.0\r\nX: 1, RH: 2\r\nT: abc, RH: 2\r\nT: 70.0, RH: 40.0\r\n') == [(70.0, 40.0)]
+    assert parser.errors == {'malformed': 2, 'value': 1}
+
+
+def test_overflow_discards_the_partial_frame() -> None:
+    parser = FrameParser((b'T', b'RH'), max_frame=16)
+
+    assert parser.feed(b'T: 70.0, RH: 40.0 and then some') == []
+    assert parser.errors['overflow'] == 1
+    assert parser.feed(b'T: 70.0, RH: 40.0\r\n') == [(70.0, 40.0)]
+
+
+def test_reset_drops_the_partial_frame() -> None:
+    parser = FrameParser((b'T', b'RH'))
+    parser.feed(b'T: 70.0, R')
+    parser.reset()
+
+    assert parser.feed(b'T: 71.0, RH: 41.0\r\n') == [(71.0, 41.0)]
@@ -0,0 +1,37 @@
+import asyncio
+
+import pytest
+
+from orchidarium.lib.http import AsyncHTTPConnection
+
+
+async def _request(response: bytes) -> int:
+    async def _reply(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        await reader.readuntil(b'\r\n\r\n')
+        writer.write(response)
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(_reply, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    connection = AsyncHTTPConnection(f'http://127.0.0.1:{port}', timeout=5.0)
+
+    try:
+        return (await connection.request('GET', '/ping')).status
+    finally:
+        await connection.close()
+        server.close()
+
+
+@pytest.mark.parametrize('response', [
+    b'HTTP/1.1 OK\r\n\r\n',
+    b'HTTP/1.1 200 OK\r\nContent-Length: many\r\n\r\n',
+    b'HTTP/1.1 200 OK\r\nX-Padding: ' + b'x' * 2**17 + b'\r\n\r\n',
+])
+def test_malformed_responses_are_connection_errors(response: bytes) -> None:
+    with pytest.raises(ConnectionError, match='Malformed response'):
+        asyncio.run(_request(response))
+
+
+def test_well_formed_response() -> None:
+    assert asyncio.run(_request(b'HTTP/1.1 204 No Content\r\n\r\n')) == 204
@@ -0,0 +1,60 @@
+import math
+
+import pytest
+
+from influxdb_client import Point, WritePrecision
+from orchidarium.lib.lineprotocol import Schema
+
+
+def _point(measurement: str, tags: dict, fields: dict, timestamp: int) -> bytes:
+    point = Point(measurement)
+    for key, value in tags.items():
+        point.tag(key, value)
+    for key, value in fields.items():
+        point.field(key, value)
+    point.time(timestamp, WritePrecision.NS)
+    return point.to_line_protocol(precision=WritePrecision.NS).encode('utf-8')
+
+
+@pytest.mark.parametrize('measurement, tags, fields', [
+    ('humidity', {'scale': 'F'}, {'temperature': 72.5, 'humidity': 48.0}),
+    ('soil', {'device': '1-1.2', 'scale': 'C'}, {'moisture': 35.1, 'nitrogen': 30}),
+    ('with space,comma', {'key=eq': 'a value,with=specials'}, {'field name': -1.25e-7}),
+    ('trailing', {'path': 'C:\\'}, {'value': 1e21}),
+])
+def test_matches_the_client(measurement: str, tags: dict, fields: dict) -> None:
+    # The client sorts fields by key; a schema keeps its own order, so give it the same one.
+    fields = dict(sorted(fields.items()))
+    schema = Schema(measurement, tags, tuple(fields))
+
+    assert schema.encode(tuple(fields.values()), 1_700_000_000_000_000_000) == _point(measurement, tags, fields, 1_700_000_000_000_000_000)
+
+
+def test_empty_tags_are_left_out() -> None:
+    schema = Schema('m', {'device': '', 'scale': 'F'}, ('v',))
+
+    assert schema.encode((1.0,), 5) == b'm,scale=F v=1 5'
+
+
+def test_non_finite_values_are_left_out() -> None:
+    schema = Schema('m', {}, ('a', 'b'))
+
+    assert schema.encode((math.nan, 2.5), 5) == b'm b=2.5 5'
+
+    with pytest.raises(ValueError):
+        schema.encode((math.nan, math.inf), 5)
+
+
+def test_values_must_match_the_fields() -> None:
+    schema = Schema('m', {}, ('a', 'b'))
+
+    with pytest.raises(ValueError):
+        schema.encode((1.0,), 5)
+
+    with pytest.raises(ValueError):
+        schema.encode((True, 1.0), 5)
+
+
+def test_needs_a_field() -> None:
+    with pytest.raises(ValueError):
+        Schema('m', {}, ())
@@ -0,0 +1,50 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Thread
+
+from orchidarium.lib.metrics import Counter, Histogram
+
+
+def _in_threads(count: int, target) -> None:
+    threads = [Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_counts_merge_across_threads() -> None:
+    counter = Counter('test_merge_total', labels=('kind',))
+    counter.inc('a')
+
+    _in_threads(4, lambda: counter.inc('a', amount=2.0))
+
+    assert counter.value('a') == 9.0
+    assert counter.snapshot() == {'a': 9.0}
+
+
+def test_exited_threads_are_folded_into_the_base_shard() -> None:
+    counter = Counter('test_fold_total')
+    histogram = Histogram('test_fold_seconds', buckets=(1.0,))
+
+    def _work() -> None:
+        counter.inc()
+        histogram.observe(0.5)
+        histogram.observe(2.0)
+
+    _in_threads(50, _work)
+
+    # Pool workers exit on shutdown, so their shards are folded as well.
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(lambda _: _work(), range(20)))
+
+    assert not counter._shards
+    assert not histogram._shards
+    assert counter.value() == 70.0
+    assert histogram.snapshot() == {'buckets': {1.0: 70, float('inf'): 140}, 'count': 140, 'sum': 175.0}
+
+
+def test_label_values_are_escaped() -> None:
+    counter = Counter('test_exposition_total', 'Things', labels=('kind',))
+    counter.inc('a"b')
+
+    assert counter.expose() == ['test_exposition_total{kind="a\\"b"} 1.0']
@@ -0,0 +1,137 @@
+from typing import List
+
+import pytest
+
+from fakes import FakeModbusTransport, soil_registers
+from orchidarium.lib.modbus import (
+    READ_INPUT_REGISTERS,
+    ModbusClient,
+    ModbusExceptionError,
+    ModbusTimeoutError,
+    crc16
+)
+from orchidarium.lib.retry import RetryPolicy
+from orchidarium.publishers import Publisher
+from orchidarium.sensors import SoilSensor
+
+# Retry straight away, so failing transactions do not slow the tests down.
+POLICY = RetryPolicy(base_delay=0.0, max_delay=0.0, max_attempts=3)
+
+
+class Collector(Publisher):
+
+    def __init__(self) -> None:
+        self.records: List[bytes] = []
+
+    @property
+    def connected(self) -> bool:
+        return True
+
+    def connect(self) -> bool:
+        return True
+
+    def close(self) -> None:
+        pass
+
+    def submit(self, record: bytes) -> bool:
+        self.records.append(record)
+        return True
+
+
+def test_crc16() -> None:
+    # Read one holding register from unit 1; the CRC is sent low byte first as 84 0A.
+    assert crc16(bytes.fromhex('010300000001')) == 0x0A84
+
+
+def test_reads_registers_in_one_transaction() -> None:
+    transport = FakeModbusTransport(soil_registers())
+    client = ModbusClient(transport, policy=POLICY)
+
+    assert client.read_registers(0, 7) == tuple(soil_registers())
+    assert client.read_registers(2, 2, READ_INPUT_REGISTERS) == tuple(soil_registers()[2:4])
+    assert transport.transactions == 2
+
+
+def test_exception_responses_are_not_retried() -> None:
+    transport = FakeModbusTransport(soil_registers())
+    client = ModbusClient(transport, policy=POLICY)
+
+    with pytest.raises(ModbusExceptionError) as e:
+        client.read_registers(5, 10)
+
+    assert e.value.code == 0x02
+    assert transport.transactions == 1
+
+
+def test_garbled_responses_are_retried() -> None:
+    transport = FakeModbusTransport(soil_registers(), corrupt=0.5, seed=3)
+    client = ModbusClient(transport, policy=RetryPolicy(base_delay=0.0, max_delay=0.0, max_attempts=20))
+
+    for _ in range(20):
+        assert client.read_registers(0, 7) == tuple(soil_registers())
+
+    assert transport.transactions > 20
+
+
+def test_silence_times_out_after_the_last_attempt() -> None:
+    transport = FakeModbusTransport(soil_registers(), silent=1.0)
+    client = ModbusClient(transport, timeout=0.01, policy=POLICY)
+
+    with pytest.raises(ModbusTimeoutError):
+        client.read_registers(0, 7)
+
+    assert transport.transactions == 3
+
+
+def test_other_units_are_ignored() -> None:
+    transport = FakeModbusTransport(soil_registers(), unit=2)
+    client = ModbusClient(transport, unit=1, timeout=0.01, policy=POLICY)
+
+    with pytest.raises(ModbusTimeoutError):
+        client.read_registers(0, 7)
+
+
+def test_request_bounds() -> None:
+    client = ModbusClient(FakeModbusTransport([]), policy=POLICY)
+
+    with pytest.raises(ValueError):
+        client.read_registers(0, 126)
+
+    with pytest.raises(ValueError):
+        ModbusClient(FakeModbusTransport([]), unit=0)
+
+
+def test_soil_sensor_decodes_every_channel() -> None:
+    sensor = SoilSensor(scale='C', transport=FakeModbusTransport(soil_registers(temperature=-3.4)))
+    publisher = Collector()
+
+    sensor(publisher)
+
+    assert sensor.fields == {
+        'moisture': 35.0,
+        'temperature': -3.4,
+        'conductivity': 450.0,
+        'ph': 6.2,
+        'nitrogen': 30.0,
+        'phosphorus': 12.0,
+        'potassium': 60.0
+    }
+    assert publisher.records[0].startswith(
+        b'soil,scale=C moisture=35,temperature=-3.4,conductivity=450,ph=6.2,nitrogen=30,phosphorus=12,potassium=60 '
+    )
+
+
+def test_soil_sensor_reports_fahrenheit_by_default() -> None:
+    sensor = SoilSensor(transport=FakeModbusTransport(soil_registers(temperature=20.0)))
+
+    assert sensor.collect()
+    assert sensor.fields['temperature'] == 68.0
+
+
+def test_soil_sensor_fails_while_unplugged() -> None:
+    transport = FakeModbusTransport(soil_registers())
+    sensor = SoilSensor(transport=transport)
+    transport.unplug()
+
+    assert not sensor.collect()
+    assert sensor.fields == {}
@@ -0,0 +1,122 @@
+import socket
+
+from pathlib import Path
+from threading import Thread
+from time import monotonic, sleep
+from typing import Callable, List
+
+import pytest
+
+from orchidarium import env
+from orchidarium.publishers._batch import BatchWriter
+from orchidarium.publishers.influxdb import InfluxDBPublisher
+from orchidarium.simulate import InfluxDBSink
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _wait_for(condition: Callable[[], bool], timeout: float = 10.0) -> bool:
+    _deadline = monotonic() + timeout
+    while not condition():
+        if monotonic() > _deadline:
+            return False
+        sleep(0.05)
+    return True
+
+
+def test_unexpected_writer_errors_are_spilled() -> None:
+    spilled = []
+
+    def _write(batch) -> None:
+        raise RuntimeError('bug in the writer')
+
+    def _spill(records) -> bool:
+        spilled.extend(records)
+        return True
+
+    writer = BatchWriter(_write, batch_size=2, flush_interval=60.0, spill=_spill)
+    writer.start()
+    writer.put(b'a 1')
+    writer.put(b'b 2')
+
+    # The flusher survives the error and keeps spilling later batches too.
+    assert _wait_for(lambda: len(spilled) == 2)
+    assert writer.running
+    writer.put(b'c 3')
+    writer.close()
+
+    assert spilled == [b'a 1', b'b 2', b'c 3']
+    assert writer.dropped == 0
+
+
+def test_spill_backpressure_spills_outside_the_lock() -> None:
+    spilled = []
+    locked: List[bool] = []
+
+    def _probe() -> None:
+        if _acquired := writer._cond.acquire(timeout=1):
+            writer._cond.release()
+        locked.append(_acquired)
+
+    def _spill(records) -> bool:
+        # Another thread can take the lock while the records are being written out.
+        probe = Thread(target=_probe)
+        probe.start()
+        probe.join()
+        spilled.extend(records)
+        return True
+
+    writer = BatchWriter(lambda batch: None, batch_size=10, max_queue=1, backpressure='spill', spill=_spill)
+    assert writer.put(b'a 1')
+    # The queue is full, so the record is spilled, which counts as accepted.
+    assert writer.put(b'b 2')
+
+    assert spilled == [b'b 2']
+    assert locked == [True]
+    assert writer.dropped == 0
+
+
+def test_spill_backpressure_reports_dropped_records() -> None:
+    writer = BatchWriter(lambda batch: None, batch_size=10, max_queue=1, backpressure='spill', spill=lambda records: False)
+    assert writer.put(b'a 1')
+
+    assert not writer.put(b'b 2')
+    assert writer.dropped == 1
+
+
+@pytest.fixture
+def publisher(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    port = _free_port()
+    monkeypatch.setitem(env, 'INFLUXDB_HOST', f'http://127.0.0.1:{port}')
+    monkeypatch.setitem(env, 'INFLUXDB_FLUSH_INTERVAL', '0.2')
+    monkeypatch.setitem(env, 'SPOOL_PATH', str(tmp_path))
+
+    publisher = InfluxDBPublisher()
+    yield publisher, port
+    publisher.close()
+
+
+def test_points_are_spooled_before_the_first_connect_and_replayed(publisher) -> None:
+    publisher, port = publisher
+
+    # Nothing is listening yet, so the first connect fails.
+    assert not publisher.connect()
+
+    for i in range(5):
+        assert publisher.submit(f'm v={i} {i}'.encode())
+
+    assert _wait_for(lambda: publisher.stats()['spilled'] == 5)
+    assert publisher._spool.pending
+
+    with InfluxDBSink(port=port, keep=True) as sink:
+        publisher.submit(b'm v=5 5')
+
+        assert _wait_for(lambda: sink.points == 6)
+        assert sorted(sink.lines) == [f'm v={i} {i}'.encode() for i in range(6)]
+        assert not publisher._spool.pending
+        assert publisher.connected
+        assert publisher.stats()['dropped'] == 0
@@ -0,0 +1,47 @@
+import json
+
+from http import HTTPStatus
+from time import sleep
+
+import pytest
+
+from fakes import FakeDevice, fake_finder, humidity_stream
+from orchidarium.api.readings import readings_reply
+from orchidarium.lib.bus import DeviceManager, DeviceReader
+from orchidarium.lib.tsdb import readings
+from orchidarium.sensors.humidity import HumiditySensor
+
+
+@pytest.mark.parametrize('args', [
+    {'since': 'inf'},
+    {'since': '1e400'},
+    {'since': 'nan'},
+    {'since': '1e300'},
+    {'step': 'inf'},
+    {'step': '-1m'},
+])
+def test_out_of_range_queries_are_rejected(args: dict) -> None:
+    status, _, body = readings_reply({'field': 'temperature', **args})
+
+    assert status == HTTPStatus.BAD_REQUEST
+    assert 'error' in json.loads(body)
+
+
+def test_streamed_samples_are_kept_in_the_store() -> None:
+    device = FakeDevice(humidity_stream(3))
+    sensor = HumiditySensor(device='streamed')
+    sensor._reader = DeviceReader(
+        DeviceManager(finder=fake_finder([device])), 0x0487, 0x0007, parse=sensor._parser.feed
+    )
+
+    try:
+        for _ in range(100):
+            if sensor.sample():
+                break
+            sleep(0.05)
+        else:
+            pytest.fail('no frames were streamed')
+    finally:
+        sensor.close()
+
+    assert set(readings.latest()[sensor.name]) == {'temperature', 'humidity'}
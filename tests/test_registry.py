@@ -0,0 +1,34 @@
+import pytest
+
+from orchidarium.sensors import Sensor, register_sensor, sensor_specs
+
+
+def _names(specs) -> list:
+    return [spec.name for spec in specs]
+
+
+def test_every_call_selects_with_its_own_arguments() -> None:
+    assert _names(sensor_specs(enabled=['humidity'])) == ['humidity']
+    assert _names(sensor_specs(enabled=['soil'])) == ['soil']
+    assert 'humidity' not in _names(sensor_specs(enabled=[], disabled=['humidity']))
+    assert 'soil' in _names(sensor_specs(enabled=[], disabled=['humidity']))
+
+
+def test_period_overrides() -> None:
+    specs = sensor_specs(enabled=['humidity', 'soil'], periods={'soil': 300.0})
+
+    assert {spec.name: spec.period for spec in specs}['soil'] == 300.0
+
+
+def test_configured_specs_are_resolved_once() -> None:
+    assert sensor_specs() is sensor_specs()
+
+
+def test_registry_is_frozen_once_resolved() -> None:
+    sensor_specs()
+
+    class LateSensor(Sensor):
+        pass
+
+    with pytest.raises(RuntimeError):
+        register_sensor(LateSensor)
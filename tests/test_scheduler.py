@@ -0,0 +1,126 @@
+import asyncio
+
+from concurrent.futures import Future
+from threading import Thread
+from time import sleep
+
+import pytest
+
+from orchidarium.aio import AsyncRuntime
+from orchidarium.lib.metrics import counter
+from orchidarium.lib.scheduler import Scheduler, Task
+
+
+def _done(callback) -> Future:
+    future: Future = Future()
+    future.set_result(callback())
+    return future
+
+
+def test_deadlines_are_fixed_rate() -> None:
+    task = Task('t', period=10.0, callback=lambda: None, origin=100.0)
+    assert task.deadline == 100.0
+
+    # Dispatched late, but the next deadline is still on the original grid.
+    assert task.advance(now=105.0) == 0
+    assert task.deadline == 110.0
+
+
+def test_missed_ticks_are_skipped() -> None:
+    task = Task('t', period=10.0, callback=lambda: None, origin=100.0)
+
+    # The ticks due at 110, 120 and 130 are all in the past.
+    assert task.advance(now=135.0) == 3
+    assert task.deadline == 140.0
+
+
+def test_retime_counts_from_the_last_deadline() -> None:
+    task = Task('t', period=60.0, callback=lambda: None, origin=0.0)
+    task.advance(now=0.0)
+
+    task.retime(5.0)
+
+    assert task.period == 5.0
+    assert task.deadline == 5.0
+
+
+def test_period_must_be_positive() -> None:
+    with pytest.raises(ValueError):
+        Task('t', period=0.0, callback=lambda: None, origin=0.0)
+
+
+def test_duplicate_names_are_rejected() -> None:
+    scheduler = Scheduler(submit=_done)
+    scheduler.add('t', period=1.0, callback=lambda: None)
+
+    with pytest.raises(ValueError):
+        scheduler.add('t', period=1.0, callback=lambda: None)
+
+
+def _run(scheduler: Scheduler, seconds: float) -> None:
+    thread = Thread(target=scheduler.run, daemon=True)
+    thread.start()
+    sleep(seconds)
+    scheduler.stop()
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+
+
+def test_fires_on_its_period() -> None:
+    fired = []
+    scheduler = Scheduler(submit=_done)
+    scheduler.add('t', period=0.05, callback=lambda: fired.append(1))
+
+    _run(scheduler, 0.32)
+
+    assert 5 <= len(fired) <= 8
+    assert scheduler.stats()['t']['fired'] == len(fired)
+
+
+def test_busy_task_skips_ticks() -> None:
+    # A future that never completes: the first tick is still "running" when every later one comes due.
+    scheduler = Scheduler(submit=lambda callback: Future())
+    scheduler.add('t', period=0.02, callback=lambda: None)
+
+    _run(scheduler, 0.2)
+
+    stats = scheduler.stats()['t']
+    assert stats['fired'] == 1
+    assert stats['skipped'] >= 3
+
+
+def test_reschedule_changes_the_period() -> None:
+    fired = []
+    scheduler = Scheduler(submit=_done)
+    scheduler.add('t', period=60.0, callback=lambda: fired.append(1))
+    scheduler.reschedule('t', 0.05)
+
+    _run(scheduler, 0.32)
+
+    assert scheduler.tasks['t'].period == 0.05
+    assert len(fired) >= 4
+
+
+def test_asyncio_runtime_schedules_like_the_scheduler() -> None:
+    fired = []
+    ticks = counter('scheduler_ticks_total', labels=('task', 'outcome'))
+
+    def _slow() -> None:
+        sleep(0.11)
+        fired.append(1)
+
+    async def _main() -> None:
+        async with AsyncRuntime(publisher=None, sensors=()) as runtime:
+            # Each run overruns the next two deadlines, so those ticks are skipped.
+            task = asyncio.create_task(runtime._every('async', 0.05, _slow))
+            await asyncio.sleep(0.5)
+            task.cancel()
+            stats = runtime.stats()['async']
+
+        assert stats['fired'] == len(fired)
+        assert 3 <= stats['fired'] <= 5
+        assert stats['skipped'] >= 2 * (stats['fired'] - 1)
+        assert ticks.value('async', 'fired') == stats['fired']
+        assert ticks.value('async', 'skipped') == stats['skipped']
+
+    asyncio.run(_main())
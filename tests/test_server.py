@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from orchidarium.api.server import HealthServer
+
+
+async def _exchange(request: bytes) -> bytes:
+    server = await HealthServer().start('127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+
+    try:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(request)
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), 5.0)
+        writer.close()
+        return response
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+def _status(response: bytes) -> int:
+    return int(response.split(b' ', 2)[1])
+
+
+def test_health_replies_with_json() -> None:
+    response = asyncio.run(_exchange(b'GET /health HTTP/1.1\r\nConnection: close\r\n\r\n'))
+
+    assert _status(response) in (200, 503)
+    assert b'Content-Type: application/json' in response
+    assert response.endswith((b'{"status": "OK"}', b'{"status": "Failed"}'))
+
+
+def test_unknown_paths_are_not_found() -> None:
+    response = asyncio.run(_exchange(b'GET /nope HTTP/1.1\r\nConnection: close\r\n\r\n'))
+
+    assert _status(response) == 404
+
+
+def test_request_bodies_are_discarded() -> None:
+    # The body is skipped and the second request on the connection is still answered.
+    response = asyncio.run(_exchange(
+        b'GET /nope HTTP/1.1\r\nContent-Length: 5\r\n\r\nhello'
+        b'GET /nope HTTP/1.1\r\nConnection: close\r\n\r\n'
+    ))
+
+    assert response.count(b'HTTP/1.1 404') == 2
+
+
+@pytest.mark.parametrize('length, status', [
+    (b'abc', 400),
+    (b'-1', 400),
+    (b'+5', 400),
+    (b'1_0', 400),
+    (b'99999999999999999999', 413),
+])
+def test_invalid_content_lengths_are_rejected(length: bytes, status: int) -> None:
+    response = asyncio.run(_exchange(b'GET /nope HTTP/1.1\r\nContent-Length: ' + length + b'\r\n\r\n'))
+
+    assert _status(response) == status
+    assert b'Connection: close' in response
@@ -0,0 +1,112 @@
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from orchidarium.lib.spool import Spool
+
+
+def _replay(spool: Spool) -> List[bytes]:
+    sent: List[bytes] = []
+    spool.replay(sent.append)
+    return sent
+
+
+def test_replay_delivers_in_order_and_empties_the_spool(tmp_path: Path) -> None:
+    spool = Spool(tmp_path)
+    spool.append([b'a 1', b'b 2'])
+    spool.append([b'c 3'])
+
+    assert spool.pending
+    assert _replay(spool) == [b'a 1\nb 2\nc 3']
+    assert not spool.pending
+    assert _replay(spool) == []
+
+
+def test_replay_resumes_after_a_failed_send(tmp_path: Path) -> None:
+    spool = Spool(tmp_path)
+    spool.append([b'a 1'])
+
+    def _fail(body: bytes) -> None:
+        raise ConnectionError('down')
+
+    with pytest.raises(ConnectionError):
+        spool.replay(_fail)
+
+    assert spool.pending
+    assert _replay(spool) == [b'a 1']
+
+
+def test_corrupt_tail_is_skipped(tmp_path: Path) -> None:
+    spool = Spool(tmp_path)
+    spool.append([b'a 1'])
+    spool.append([b'b 2'])
+    spool.close()
+
+    # A torn write: the last record loses its final byte.
+    segment = next(tmp_path.glob('*.seg'))
+    segment.write_bytes(segment.read_bytes()[:-1])
+
+    assert _replay(spool) == [b'a 1']
+    assert spool.corrupt_records == 1
+
+
+def test_crc_mismatch_is_skipped(tmp_path: Path) -> None:
+    spool = Spool(tmp_path)
+    spool.append([b'a 1'])
+    spool.close()
+
+    segment = next(tmp_path.glob('*.seg'))
+    data = bytearray(segment.read_bytes())
+    data[-1] ^= 0xFF
+    segment.write_bytes(bytes(data))
+
+    assert _replay(spool) == []
+    assert spool.corrupt_records == 1
+
+
+def test_oldest_segments_are_discarded_over_the_limit(tmp_path: Path) -> None:
+    spool = Spool(tmp_path, max_bytes=100, segment_bytes=40)
+    for i in range(10):
+        spool.append([f'point{i} value={i}'.encode()])
+
+    assert spool.discarded_segments > 0
+    assert spool.size <= 100 + 40
+
+    sent = b'\n'.join(_replay(spool))
+    assert b'point9' in sent
+    assert b'point0' not in sent
+
+
+def test_replay_can_be_bounded_to_the_oldest_segments(tmp_path: Path) -> None:
+    # Every append fills a segment, so each batch gets one of its own.
+    spool = Spool(tmp_path, segment_bytes=1)
+    spool.append([b'a 1'])
+    spool.append([b'b 2'])
+    spool.append([b'c 3'])
+
+    sent: List[bytes] = []
+    spool.replay(sent.append, max_segments=2)
+    assert sent == [b'a 1', b'b 2']
+    assert spool.pending
+
+    spool.replay(sent.append, max_segments=2)
+    assert sent == [b'a 1', b'b 2', b'c 3']
+    assert not spool.pending
+
+
+def test_bounded_replay_leaves_the_active_segment_open_while_older_ones_remain(tmp_path: Path) -> None:
+    spool = Spool(tmp_path, segment_bytes=1)
+    spool.append([b'a 1'])
+    spool.segment_bytes = 2**20
+    spool.append([b'b 2'])
+
+    sent: List[bytes] = []
+    spool.replay(sent.append, max_segments=1)
+    assert sent == [b'a 1']
+
+    # Still the active segment, so later appends land in it and are replayed together.
+    spool.append([b'c 3'])
+    spool.replay(sent.append, max_segments=1)
+    assert sent == [b'a 1', b'b 2\nc 3']
+    assert not spool.pending